@@ -0,0 +1,33 @@
+from pathlib import Path
+from typing import List, Optional
+
+# 外部のコーパスを指定しなかった場合に使う文章
+# 漢字・カタカナ・数字・記号・疑問文などが偏りなく含まれるようにしている
+sample_sentences = [
+    "こんにちは、ヒホです。",
+    "今日はいい天気ですね。明日も晴れるでしょうか？",
+    "吾輩は猫である。名前はまだ無い。どこで生れたかとんと見当がつかぬ。",
+    "東京都千代田区の会議室で、午後三時から打ち合わせを行います。",
+    "このソフトウェアは、テキストを音声に変換するためのエンジンです。",
+    "2023年4月1日に、バージョン0.1.0をリリースしました。",
+    "メロスは激怒した。必ず、かの邪智暴虐の王を除かなければならぬと決意した。",
+    "えっ、本当ですか？それはちょっと困りますね……。",
+    "国境の長いトンネルを抜けると雪国であった。夜の底が白くなった。",
+    "音声合成の品質を評価するために、さまざまな文章を読み上げてみます。",
+]
+
+
+def load_corpus(text_file: Optional[Path], repeat: int) -> List[str]:
+    """
+    ベンチマークに使う文章のリストを返す
+    text_fileを指定した場合は空行を除いた各行を、指定しなかった場合はsample_sentencesを使う
+    """
+    if text_file is not None:
+        sentences = [
+            line.strip()
+            for line in text_file.read_text(encoding="utf-8").splitlines()
+            if line.strip() != ""
+        ]
+    else:
+        sentences = sample_sentences
+    return sentences * repeat
@@ -0,0 +1,80 @@
+"""
+フルコンテキストラベルからPhonemeを作成する処理の速度とメモリ使用量を計測する
+
+ラベルの全てのcontextを正規表現で辞書にしていた以前の方法と、
+必要なcontextだけを切り出す現在のPhoneme.from_labelを比較する
+
+Examples
+--------
+$ python -m benchmark.full_context_label --repeat 100
+"""
+import argparse
+import time
+import tracemalloc
+from pathlib import Path
+from typing import Callable, List
+
+import pyopenjtalk
+
+from voicevox_engine.full_context_label import Phoneme, parse_label_contexts
+
+from .corpus import load_corpus
+
+
+def measure(func: Callable[[List[str]], list], labels: List[str], number: int):
+    best = float("inf")
+    for _ in range(number):
+        start = time.perf_counter()
+        func(labels)
+        best = min(best, time.perf_counter() - start)
+
+    tracemalloc.start()
+    result = func(labels)  # noqa: F841
+    memory, _ = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    return best, memory
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.split("\n\n")[0])
+    parser.add_argument("--text_file", type=Path, default=None, help="1行1文のテキストファイル")
+    parser.add_argument("--repeat", type=int, default=100, help="コーパスを繰り返す回数")
+    parser.add_argument("--number", type=int, default=5, help="計測する回数。最も速かった結果を表示する")
+    args = parser.parse_args()
+
+    sentences = load_corpus(args.text_file, args.repeat)
+    labels = [
+        label
+        for sentence in sentences
+        for label in pyopenjtalk.extract_fullcontext(sentence)
+    ]
+    print(f"{len(sentences)} sentences, {len(labels)} labels")
+
+    results = [
+        (
+            "regex (all contexts)",
+            measure(
+                lambda labels: [parse_label_contexts(label) for label in labels],
+                labels,
+                args.number,
+            ),
+        ),
+        (
+            "Phoneme.from_label",
+            measure(
+                lambda labels: [Phoneme.from_label(label) for label in labels],
+                labels,
+                args.number,
+            ),
+        ),
+    ]
+
+    print(f"{'':<24}{'time [ms]':>12}{'memory [KiB]':>16}")
+    for name, (seconds, memory) in results:
+        print(f"{name:<24}{seconds * 1000:12.1f}{memory / 1024:16.1f}")
+    (base_seconds, base_memory), (seconds, memory) = (r for _, r in results)
+    print(f"speedup: {base_seconds / seconds:.2f}x, memory: {memory / base_memory:.2%}")
+
+
+if __name__ == "__main__":
+    main()
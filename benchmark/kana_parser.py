@@ -0,0 +1,132 @@
+"""
+AquesTalkライクな読み仮名のパースにかかる時間が、入力長に対して線形に増えることを確認する
+
+全体の文字数を変えた場合と、1つのアクセント句のモーラ数を変えた場合のそれぞれについて、
+最も短い入力と比べて1文字あたりの処理時間が--max_ratio倍を超えた場合は終了コード1で終了する
+
+Examples
+--------
+$ python -m benchmark.kana_parser
+"""
+import argparse
+import random
+import sys
+import time
+from typing import List
+
+from voicevox_engine.kana_parser import (
+    ACCENT_SYMBOL,
+    LOOP_LIMIT,
+    NOPAUSE_DELIMITER,
+    PAUSE_DELIMITER,
+    UNVOICE_SYMBOL,
+    parse_kana,
+)
+from voicevox_engine.mora_list import openjtalk_text2mora
+
+
+def make_phrase(rng: random.Random, mora_num: int) -> str:
+    texts = list(openjtalk_text2mora.keys())
+    moras = []
+    for _ in range(mora_num):
+        text = rng.choice(texts)
+        if (
+            openjtalk_text2mora[text][1] in ["a", "i", "u", "e", "o"]
+            and rng.random() < 0.1
+        ):
+            text = UNVOICE_SYMBOL + text
+        moras.append(text)
+    accent = rng.randint(1, mora_num)
+    return "".join(moras[:accent]) + ACCENT_SYMBOL + "".join(moras[accent:])
+
+
+def make_text(rng: random.Random, length: int, mora_num: int) -> str:
+    phrases: List[str] = []
+    total = 0
+    while total < length:
+        phrase = make_phrase(rng, mora_num)
+        phrases.append(phrase)
+        total += len(phrase) + 1
+    delimiters = [rng.choice([NOPAUSE_DELIMITER, PAUSE_DELIMITER]) for _ in phrases]
+    return "".join(p + d for p, d in zip(phrases, delimiters))[:-1]
+
+
+def measure(text: str, number: int) -> float:
+    best = float("inf")
+    for _ in range(number):
+        start = time.perf_counter()
+        parse_kana(text)
+        best = min(best, time.perf_counter() - start)
+    return best
+
+
+def run_series(title: str, texts: List[str], number: int, max_ratio: float) -> bool:
+    print(title)
+    print(f"{'length':>10}{'time [ms]':>12}{'us/char':>10}{'ratio':>8}")
+    base = None
+    ok = True
+    for text in texts:
+        seconds = measure(text, number)
+        per_char = seconds / len(text)
+        if base is None:
+            base = per_char
+        ratio = per_char / base
+        ok = ok and ratio <= max_ratio
+        print(
+            f"{len(text):>10}{seconds * 1000:12.2f}{per_char * 1e6:10.3f}{ratio:8.2f}"
+        )
+    return ok
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.split("\n\n")[0])
+    parser.add_argument(
+        "--lengths",
+        type=int,
+        nargs="+",
+        default=[1000, 10000, 100000],
+        help="全体の文字数を変える場合に計測する文字数",
+    )
+    parser.add_argument(
+        "--mora_nums",
+        type=int,
+        nargs="+",
+        default=[10, 100, LOOP_LIMIT - 10],
+        help="アクセント句のモーラ数を変える場合に計測するモーラ数",
+    )
+    parser.add_argument("--number", type=int, default=5, help="計測する回数。最も速かった結果を表示する")
+    parser.add_argument(
+        "--max_ratio",
+        type=float,
+        default=3.0,
+        help="最も短い入力と比べた、1文字あたりの処理時間の許容倍率",
+    )
+    args = parser.parse_args()
+
+    rng = random.Random(0)
+    ok = run_series(
+        "text length (8 moras per accent phrase)",
+        [make_text(rng, length, 8) for length in sorted(args.lengths)],
+        args.number,
+        args.max_ratio,
+    )
+    ok = (
+        run_series(
+            "moras per accent phrase (one accent phrase)",
+            [make_phrase(rng, mora_num) for mora_num in sorted(args.mora_nums)],
+            args.number,
+            args.max_ratio,
+        )
+        and ok
+    )
+
+    if not ok:
+        print(
+            f"Error: processing time per character exceeded {args.max_ratio}x",
+            file=sys.stderr,
+        )
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,150 @@
+"""
+モーフィングの品質ごとに、解析と合成にかかる時間、パラメータのメモリ量、音質の劣化を計測する
+
+OpenJTalkで合成した音声をベース話者、声の高さを変えて合成した音声をターゲット話者としてモーフィングする
+音質の劣化は、highで合成した音声とのメル周波数の帯域ごとの対数スペクトル距離(dB)で表す
+
+Examples
+--------
+$ python -m benchmark.morphing_quality --sentences 3
+"""
+import argparse
+import time
+from typing import Callable, Tuple, TypeVar
+
+import numpy as np
+import pyopenjtalk
+
+from voicevox_engine.morphing import (
+    MorphingQuality,
+    create_morphing_parameter,
+    synthesis_morphing,
+)
+from voicevox_engine.morphing_cache import morphing_parameter_nbytes
+
+from .corpus import sample_sentences
+
+T = TypeVar("T")
+
+# 音声合成エンジンのデフォルトのサンプリングレート
+sampling_rate = 48000
+output_sampling_rate = 24000
+
+
+def measure(func: Callable[[], T], number: int) -> Tuple[float, T]:
+    best = float("inf")
+    for _ in range(number):
+        start = time.perf_counter()
+        result = func()
+        best = min(best, time.perf_counter() - start)
+    return best, result
+
+
+def mel_filterbank(fs: int, n_fft: int, n_mels: int) -> np.ndarray:
+    def hz_to_mel(hz):
+        return 2595 * np.log10(1 + hz / 700)
+
+    def mel_to_hz(mel):
+        return 700 * (10 ** (mel / 2595) - 1)
+
+    freqs = np.linspace(0, fs / 2, n_fft // 2 + 1)
+    edges = mel_to_hz(np.linspace(hz_to_mel(0), hz_to_mel(fs / 2), n_mels + 2))
+    lower, center, upper = edges[:-2, None], edges[1:-1, None], edges[2:, None]
+    return np.clip(
+        np.minimum(
+            (freqs - lower) / (center - lower), (upper - freqs) / (upper - center)
+        ),
+        0,
+        None,
+    )
+
+
+def log_spectral_distance(reference: np.ndarray, wave: np.ndarray, fs: int) -> float:
+    """
+    無音のフレームを除いた、メル周波数の帯域ごとの対数スペクトル距離(dB)の平均
+    調波の細かな位置のずれではなく、スペクトル包絡の違いを比べるため、帯域ごとのパワーにまとめてから比べる
+    """
+    from scipy.signal import stft
+
+    n_fft = 1024
+    length = min(len(reference), len(wave))
+    filterbank = mel_filterbank(fs, n_fft, n_mels=40)
+    _, _, x = stft(reference[:length], nperseg=n_fft)
+    _, _, y = stft(wave[:length], nperseg=n_fft)
+    x_power = filterbank @ np.abs(x) ** 2 + 1e-10
+    y_power = filterbank @ np.abs(y) ** 2 + 1e-10
+    distance = np.sqrt(
+        np.mean((10 * np.log10(x_power) - 10 * np.log10(y_power)) ** 2, axis=0)
+    )
+    frame_power = x_power.sum(axis=0)
+    voiced = frame_power > frame_power.max() * 1e-6
+    return float(distance[voiced].mean())
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.split("\n\n")[0])
+    parser.add_argument("--sentences", type=int, default=3, help="つなげて1つの音声にする文章の数")
+    parser.add_argument("--half_tone", type=float, default=4.0, help="ターゲット話者の声の高さ(半音)")
+    parser.add_argument("--morph_rate", type=float, default=0.5, help="モーフィングの割合")
+    parser.add_argument("--number", type=int, default=3, help="計測する回数。最も速かった結果を表示する")
+    args = parser.parse_args()
+
+    text = "".join(sample_sentences[: args.sentences])
+    base_wave, fs = pyopenjtalk.tts(text)
+    target_wave, _ = pyopenjtalk.tts(text, half_tone=args.half_tone)
+    # エンジンと同じく、48kHzのfloat32の波形をモーフィングする
+    base_wave = (base_wave / 32768).astype(np.float32)
+    target_wave = (target_wave / 32768).astype(np.float32)
+    assert fs == sampling_rate
+    print(f"wave: {len(base_wave) / fs:.1f} s, {fs} Hz")
+
+    results = []
+    for quality in MorphingQuality:
+        analysis_seconds, morph_param = measure(
+            lambda quality=quality: create_morphing_parameter(
+                base_wave, target_wave, fs, quality=quality
+            ),
+            args.number,
+        )
+        synthesis_seconds, morph_wave = measure(
+            lambda morph_param=morph_param: synthesis_morphing(
+                morph_param, args.morph_rate, output_sampling_rate
+            ),
+            args.number,
+        )
+        if quality == MorphingQuality.HIGH:
+            high_param = morph_param
+        results.append(
+            (
+                quality.value,
+                analysis_seconds,
+                synthesis_seconds,
+                morphing_parameter_nbytes(morph_param),
+                morph_wave,
+            )
+        )
+
+    reference = results[0][-1]
+    print(
+        f"{'quality':<12}{'analysis [s]':>14}{'synthesis [s]':>15}"
+        f"{'parameter [MiB]':>17}{'distance [dB]':>15}"
+    )
+    for name, analysis_seconds, synthesis_seconds, nbytes, morph_wave in results:
+        print(
+            f"{name:<12}{analysis_seconds:14.2f}{synthesis_seconds:15.2f}"
+            f"{nbytes / 1024 ** 2:17.1f}"
+            f"{log_spectral_distance(reference, morph_wave, output_sampling_rate):15.2f}"
+        )
+
+    # 距離の目安として、highでモーフィングの割合を0.1変えた場合の距離を表示する
+    shifted_wave = synthesis_morphing(
+        high_param, min(args.morph_rate + 0.1, 1.0), output_sampling_rate
+    )
+    print(
+        "reference: high with morph_rate +0.1 -> "
+        f"{log_spectral_distance(reference, shifted_wave, output_sampling_rate):.2f} dB"
+    )
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,96 @@
+"""
+長い文章に対するフルコンテキストラベルの解析とUtterance.phonemesの処理時間が、
+文字数に対して線形に増えることを確認する
+
+最も短い文章と比べて、1文字あたりの処理時間が--max_ratio倍を超えた場合は終了コード1で終了する
+
+Examples
+--------
+$ python -m benchmark.utterance_scaling --lengths 1000 10000 100000
+"""
+import argparse
+import sys
+import time
+import tracemalloc
+from pathlib import Path
+from typing import Callable, List, Tuple
+
+from voicevox_engine.full_context_label import extract_full_context_label
+
+from .corpus import load_corpus
+
+
+def measure(func: Callable[[], object]) -> Tuple[float, int]:
+    start = time.perf_counter()
+    func()
+    seconds = time.perf_counter() - start
+
+    tracemalloc.start()
+    func()
+    _, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    return seconds, peak
+
+
+def make_text(sentences: List[str], length: int) -> str:
+    text = ""
+    while len(text) < length:
+        text += "".join(sentences)
+    return text[:length]
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.split("\n\n")[0])
+    parser.add_argument("--text_file", type=Path, default=None, help="1行1文のテキストファイル")
+    parser.add_argument(
+        "--lengths",
+        type=int,
+        nargs="+",
+        default=[1000, 10000, 100000],
+        help="計測する文章の文字数",
+    )
+    parser.add_argument(
+        "--max_ratio",
+        type=float,
+        default=3.0,
+        help="最も短い文章と比べた、1文字あたりの処理時間の許容倍率",
+    )
+    args = parser.parse_args()
+
+    sentences = load_corpus(args.text_file, repeat=1)
+    lengths = sorted(args.lengths)
+
+    print(
+        f"{'length':>8}{'labels':>10}{'extract [ms]':>16}"
+        f"{'phonemes [ms]':>16}{'memory [KiB]':>16}{'ratio':>8}"
+    )
+    base_seconds_per_char = None
+    failed = False
+    for length in lengths:
+        text = make_text(sentences, length)
+        extract_seconds = time.perf_counter()
+        utterance = extract_full_context_label(text)
+        extract_seconds = time.perf_counter() - extract_seconds
+        phonemes_seconds, memory = measure(lambda u=utterance: u.phonemes)
+
+        seconds_per_char = (extract_seconds + phonemes_seconds) / length
+        if base_seconds_per_char is None:
+            base_seconds_per_char = seconds_per_char
+        ratio = seconds_per_char / base_seconds_per_char
+        failed = failed or ratio > args.max_ratio
+
+        print(
+            f"{length:>8}{len(utterance.phonemes):>10}{extract_seconds * 1000:16.1f}"
+            f"{phonemes_seconds * 1000:16.1f}{memory / 1024:16.1f}{ratio:8.2f}"
+        )
+
+    if failed:
+        print(
+            f"Error: processing time per character exceeded {args.max_ratio}x",
+            file=sys.stderr,
+        )
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,70 @@
+"""
+合成した波形をステレオのwavファイルとして書き出すときのピークメモリ使用量を計測する
+
+波形全体を`numpy.array([wave, wave]).T`で複製していた以前の方法と、
+書き込み時に少しずつ2チャンネルに複製する現在のwrite_waveを比較する
+
+Examples
+--------
+$ python -m benchmark.wave_output --seconds 600
+"""
+import argparse
+import tracemalloc
+from tempfile import TemporaryFile
+from typing import Callable
+
+import numpy
+import soundfile
+
+from voicevox_engine.utility import write_wave
+
+
+def write_stereo_copy(f, wave: numpy.ndarray, sampling_rate: int) -> None:
+    soundfile.write(
+        file=f,
+        data=numpy.array([wave, wave]).T,
+        samplerate=sampling_rate,
+        format="WAV",
+    )
+
+
+def write_stereo_blocks(f, wave: numpy.ndarray, sampling_rate: int) -> None:
+    write_wave(file=f, wave=wave, sampling_rate=sampling_rate, stereo=True)
+
+
+def measure_peak(
+    func: Callable[..., None], wave: numpy.ndarray, sampling_rate: int
+) -> int:
+    with TemporaryFile() as f:
+        tracemalloc.start()
+        func(f, wave, sampling_rate)
+        _, peak = tracemalloc.get_traced_memory()
+        tracemalloc.stop()
+    return peak
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.split("\n\n")[0])
+    parser.add_argument("--seconds", type=float, default=600, help="波形の長さ(秒)")
+    parser.add_argument("--sampling_rate", type=int, default=48000, help="サンプリングレート")
+    args = parser.parse_args()
+
+    wave = numpy.random.uniform(
+        -0.5, 0.5, int(args.seconds * args.sampling_rate)
+    ).astype(numpy.float32)
+    print(f"wave: {wave.nbytes / 1024 ** 2:.1f} MiB (float32, mono)")
+
+    results = [
+        ("numpy.array([wave, wave]).T", write_stereo_copy),
+        ("write_wave(stereo=True)", write_stereo_blocks),
+    ]
+    peaks = [measure_peak(func, wave, args.sampling_rate) for _, func in results]
+
+    print(f"{'':<32}{'peak [MiB]':>12}")
+    for (name, _), peak in zip(results, peaks):
+        print(f"{name:<32}{peak / 1024 ** 2:12.1f}")
+    print(f"memory: {peaks[1] / peaks[0]:.2%}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,27 @@
+"""
+SQLiteのデータベースに保存したユーザー辞書を、jsonに書き出すプログラムです。
+書き出したjsonは、--user_dict_store jsonで起動した場合のユーザー辞書としてそのまま使えます。
+
+実行例:
+python export_user_dict.py --output_path=user_dict.json
+"""
+
+import argparse
+from pathlib import Path
+
+from voicevox_engine.user_dict import (
+    export_user_dict_json,
+    open_user_dict_store,
+    set_user_dict_store,
+    user_dict_db_path,
+)
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--db_path", type=Path, default=user_dict_db_path)
+    parser.add_argument("--output_path", type=Path, required=True)
+    args = parser.parse_args()
+    if not args.db_path.is_file():
+        raise SystemExit(f"{args.db_path} が見つかりません。")
+    set_user_dict_store(open_user_dict_store(db_path=args.db_path))
+    export_user_dict_json(json_path=args.output_path)
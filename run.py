@@ -6,55 +6,78 @@ import multiprocessing
 import os
 import re
 import sys
+import time
 import traceback
 import zipfile
 from functools import lru_cache
 from io import BytesIO, TextIOWrapper
 from pathlib import Path
+from queue import Queue
 from tempfile import NamedTemporaryFile, TemporaryFile
-from typing import Dict, List, Optional
+from threading import Thread
+from typing import TYPE_CHECKING, Dict, List, Optional
 
-import soundfile
 import uvicorn
 from fastapi import FastAPI, Form, HTTPException, Query, Request, Response
 from fastapi.middleware.cors import CORSMiddleware
 from fastapi.openapi.utils import get_openapi
-from fastapi.responses import HTMLResponse, JSONResponse
-from fastapi.templating import Jinja2Templates
+from fastapi.responses import HTMLResponse, JSONResponse, StreamingResponse
 from pydantic import ValidationError, conint
 from starlette.background import BackgroundTask
+from starlette.concurrency import run_in_threadpool
 from starlette.responses import FileResponse
 
 from voicevox_engine import __version__
-from voicevox_engine.cancellable_engine import CancellableEngine
-from voicevox_engine.downloadable_library import LibraryManager
+from voicevox_engine.analysis_session import (
+    AnalysisSessionManager,
+    AnalysisSessionNotFoundError,
+)
 from voicevox_engine.engine_manifest import EngineManifestLoader
 from voicevox_engine.engine_manifest.EngineManifest import EngineManifest
 from voicevox_engine.kana_parser import create_kana, parse_kana
-from voicevox_engine.metas.MetasStore import MetasStore, construct_lookup
+from voicevox_engine.metas.Metas import CoreSpeaker
+from voicevox_engine.metas.MetasStore import MetasStore
 from voicevox_engine.model import (
     AccentPhrase,
+    AccentPhraseCacheInfo,
     AudioQuery,
     DownloadableLibrary,
     InstalledLibrary,
     MorphableTargetInfo,
+    MorphingParameterCacheInfo,
     ParseKanaBadRequest,
     ParseKanaError,
     Speaker,
     SpeakerInfo,
     SpeakerNotFoundError,
     SupportedDevicesInfo,
+    SVModelUploadInfo,
+    UserDictImportFormat,
+    UserDictOperation,
+    UserDictOperationResult,
+    UserDictStatus,
     UserDictWord,
     VvlibManifest,
     WordTypes,
 )
 from voicevox_engine.morphing import (
+    MAX_MORPH_RATES,
+    MorphingAnalysisPool,
+    MorphingParameter,
+    MorphingPermissionMatrix,
+    MorphingQuality,
+    TargetF0Method,
+    construct_morphing_permission_matrix,
     get_morphable_targets,
-    is_synthesis_morphing_permitted,
+    set_morphing_analysis_pool,
     synthesis_morphing,
+    synthesis_morphing_multi,
+    synthesis_morphing_parameter,
+    synthesis_morphing_stream,
 )
-from voicevox_engine.morphing import (
-    synthesis_morphing_parameter as _synthesis_morphing_parameter,
+from voicevox_engine.morphing_cache import (
+    MorphingParameterCache,
+    morphing_parameter_key,
 )
 from voicevox_engine.part_of_speech_data import MAX_PRIORITY, MIN_PRIORITY
 from voicevox_engine.preset import Preset, PresetError, PresetManager
@@ -65,26 +88,57 @@ from voicevox_engine.setting import (
     SettingLoader,
 )
 
-# from voicevox_engine.sv_model import get_all_sv_models, register_sv_model
-from voicevox_engine.synthesis_engine import SynthesisEngineBase, make_synthesis_engines
+# from voicevox_engine.sv_model import (
+#     get_all_sv_models,
+#     register_sv_model,
+# )
+from voicevox_engine.sv_model import (
+    SVModelFileWriter,
+    SVModelUploadError,
+    commit_sv_model,
+)
+from voicevox_engine.synthesis_engine import (
+    FrontendPool,
+    SynthesisEngineBase,
+    make_synthesis_engines,
+    set_frontend_pool,
+)
+from voicevox_engine.synthesis_engine.synthesis_engine_base import accent_phrase_cache
 from voicevox_engine.user_dict import (
+    UserDictCompileWorker,
+    apply_user_dict_operations,
     apply_word,
     delete_word,
+    get_user_dict_compile_pending,
+    get_user_dict_version,
     import_user_dict,
-    read_dict,
+    import_user_dict_stream,
+    open_user_dict_store,
     rewrite_word,
+    search_dict,
+    set_compile_worker,
+    set_user_dict_store,
     update_dict,
 )
 from voicevox_engine.utility import (
     ConnectBase64WavesException,
+    StartupProfiler,
     connect_base64_waves,
     copy_model_and_info,
     delete_file,
     engine_root,
     get_latest_core_version,
     get_save_dir,
+    wave_stream_header,
+    wave_to_pcm16,
+    write_wave,
 )
 
+if TYPE_CHECKING:
+    from fastapi.templating import Jinja2Templates
+
+    from voicevox_engine.downloadable_library import LibraryManager
+
 
 def b64encode_str(s):
     return base64.b64encode(s).decode("utf-8")
@@ -122,9 +176,20 @@ def generate_app(
     root_dir: Optional[Path] = None,
     cors_policy_mode: CorsPolicyMode = CorsPolicyMode.localapps,
     allow_origin: Optional[List[str]] = None,
+    startup_profiler: Optional[StartupProfiler] = None,
+    morphing_parameter_cache: Optional[MorphingParameterCache] = None,
+    morphing_target_f0_method: TargetF0Method = TargetF0Method.HARVEST,
+    morphing_quality: MorphingQuality = MorphingQuality.HIGH,
+    sv_model_dir: Optional[Path] = None,
 ) -> FastAPI:
     if root_dir is None:
         root_dir = engine_root()
+    # SVモデルの保存先。テストで切り替えられるようにする
+    if sv_model_dir is None:
+        sv_model_dir = get_save_dir()
+
+    # startup_profilerが渡されたときのみ、起動完了時に計測結果を出力する
+    profiler = startup_profiler if startup_profiler is not None else StartupProfiler()
 
     default_sampling_rate = synthesis_engines[latest_core_version].default_sampling_rate
 
@@ -183,25 +248,49 @@ def generate_app(
     preset_manager = PresetManager(
         preset_path=root_dir / "presets.yaml",
     )
-    engine_manifest_data = EngineManifestLoader(
-        engine_root() / "engine_manifest.json", engine_root()
-    ).load_manifest()
-    library_manager = LibraryManager(
-        get_save_dir() / "library_info",
-        engine_manifest_data.supported_vvlib_manifest_version,
-        engine_manifest_data.brand_name,
-        engine_manifest_data.name,
-        engine_manifest_data.uuid,
-    )
+    analysis_session_manager = AnalysisSessionManager()
+    with profiler.measure("metas and manifest"):
+        engine_manifest_data = EngineManifestLoader(
+            engine_root() / "engine_manifest.json", engine_root()
+        ).load_manifest()
+        metas_store = MetasStore(get_save_dir() / "speaker_info")
+
+    # 音声ライブラリ管理や設定画面は利用頻度が低く、依存モジュールの読み込みも重いので、
+    # 起動時ではなく初回利用時に生成する
+    @lru_cache(maxsize=1)
+    def get_library_manager() -> "LibraryManager":
+        from voicevox_engine.downloadable_library import LibraryManager
+
+        return LibraryManager(
+            get_save_dir() / "library_info",
+            engine_manifest_data.supported_vvlib_manifest_version,
+            engine_manifest_data.brand_name,
+            engine_manifest_data.name,
+            engine_manifest_data.uuid,
+        )
 
-    metas_store = MetasStore(get_save_dir() / "speaker_info")
+    @lru_cache(maxsize=1)
+    def get_setting_ui_template() -> "Jinja2Templates":
+        from fastapi.templating import Jinja2Templates
 
-    setting_ui_template = Jinja2Templates(directory=engine_root() / "ui_template")
+        return Jinja2Templates(directory=engine_root() / "ui_template")
 
-    # キャッシュを有効化
-    # モジュール側でlru_cacheを指定するとキャッシュを制御しにくいため、HTTPサーバ側で指定する
-    # TODO: キャッシュを管理するモジュール側API・HTTP側APIを用意する
-    synthesis_morphing_parameter = lru_cache(maxsize=4)(_synthesis_morphing_parameter)
+    # モーフィング用パラメータは生成に時間がかかるので、同じクエリと話者の組み合わせではキャッシュしたものを使う
+    if morphing_parameter_cache is None:
+        morphing_parameter_cache = MorphingParameterCache()
+
+    # モーフィング可否はmetasが変わらない限り変化しないので、コアのmetasごとに一度だけ計算する
+    @lru_cache(maxsize=len(synthesis_engines))
+    def _morphing_permission_matrix(core_metas: str) -> MorphingPermissionMatrix:
+        speakers = metas_store.combine_metas(
+            [CoreSpeaker(**speaker) for speaker in json.loads(core_metas)]
+        )
+        return construct_morphing_permission_matrix(speakers)
+
+    def get_morphing_permission_matrix(
+        engine: SynthesisEngineBase,
+    ) -> MorphingPermissionMatrix:
+        return _morphing_permission_matrix(engine.speakers)
 
     # @app.on_event("startup")
     # async def start_catch_disconnection():
@@ -211,7 +300,10 @@ def generate_app(
 
     @app.on_event("startup")
     def apply_user_dict():
-        update_dict()
+        with profiler.measure("user dict compile"):
+            update_dict()
+        if startup_profiler is not None:
+            startup_profiler.report()
 
     def get_engine(core_version: Optional[str]) -> SynthesisEngineBase:
         if core_version is None:
@@ -220,18 +312,10 @@ def generate_app(
             return synthesis_engines[core_version]
         raise HTTPException(status_code=422, detail="不明なバージョンです")
 
-    @app.post(
-        "/audio_query",
-        response_model=AudioQuery,
-        tags=["クエリ作成"],
-        summary="音声合成用のクエリを作成する",
-    )
-    def audio_query(text: str, speaker: int, core_version: Optional[str] = None):
+    def default_audio_query(accent_phrases: List[AccentPhrase]) -> AudioQuery:
         """
-        クエリの初期値を得ます。ここで得られたクエリはそのまま音声合成に利用できます。各値の意味は`Schemas`を参照してください。
+        アクセント句に初期値を設定したクエリを作成する
         """
-        engine = get_engine(core_version)
-        accent_phrases = engine.create_accent_phrases(text, speaker_id=speaker)
         return AudioQuery(
             accent_phrases=accent_phrases,
             speedScale=1,
@@ -245,6 +329,20 @@ def generate_app(
             kana=create_kana(accent_phrases),
         )
 
+    @app.post(
+        "/audio_query",
+        response_model=AudioQuery,
+        tags=["クエリ作成"],
+        summary="音声合成用のクエリを作成する",
+    )
+    def audio_query(text: str, speaker: int, core_version: Optional[str] = None):
+        """
+        クエリの初期値を得ます。ここで得られたクエリはそのまま音声合成に利用できます。各値の意味は`Schemas`を参照してください。
+        """
+        engine = get_engine(core_version)
+        accent_phrases = engine.create_accent_phrases(text, speaker_id=speaker)
+        return default_audio_query(accent_phrases)
+
     @app.post(
         "/audio_query_from_preset",
         response_model=AudioQuery,
@@ -329,6 +427,54 @@ def generate_app(
         else:
             return engine.create_accent_phrases(text, speaker_id=speaker)
 
+    @app.post(
+        "/analysis_session",
+        response_model=str,
+        tags=["クエリ作成"],
+        summary="文章を少しずつ編集しながらクエリを作成するためのセッションを開始する",
+    )
+    def create_analysis_session():
+        """
+        セッションIDを返します。
+        セッションIDを指定して`/analysis_session/{session_id}/audio_query`を呼ぶと、
+        前回から変更された文だけを解析し直してクエリを作成します。
+        """
+        return analysis_session_manager.create_session()
+
+    @app.post(
+        "/analysis_session/{session_id}/audio_query",
+        response_model=AudioQuery,
+        tags=["クエリ作成"],
+        summary="セッション内で前回から変更された文だけを解析し直し、音声合成用のクエリを作成する",
+    )
+    def analysis_session_audio_query(
+        session_id: str, text: str, speaker: int, core_version: Optional[str] = None
+    ):
+        """
+        `/audio_query`と同様にクエリを作成します。
+        テキストは句点・感嘆符・疑問符・改行で文に区切られ、前回と同じ文は前回の解析結果がそのまま使われます。
+        """
+        engine = get_engine(core_version)
+        try:
+            session = analysis_session_manager.get_session(session_id)
+        except AnalysisSessionNotFoundError:
+            raise HTTPException(status_code=404, detail="該当するセッションが見つかりません")
+        accent_phrases = session.create_accent_phrases(engine, text, speaker_id=speaker)
+        return default_audio_query(accent_phrases)
+
+    @app.delete(
+        "/analysis_session/{session_id}",
+        status_code=204,
+        tags=["クエリ作成"],
+        summary="セッションを終了する",
+    )
+    def delete_analysis_session(session_id: str):
+        try:
+            analysis_session_manager.delete_session(session_id)
+        except AnalysisSessionNotFoundError:
+            raise HTTPException(status_code=404, detail="該当するセッションが見つかりません")
+        return Response(status_code=204)
+
     @app.post(
         "/mora_data",
         response_model=List[AccentPhrase],
@@ -405,8 +551,11 @@ def generate_app(
         )
 
         with NamedTemporaryFile(delete=False) as f:
-            soundfile.write(
-                file=f, data=wave, samplerate=query.outputSamplingRate, format="WAV"
+            write_wave(
+                file=f,
+                wave=wave,
+                sampling_rate=query.outputSamplingRate,
+                stereo=query.outputStereo,
             )
 
         return FileResponse(
@@ -491,11 +640,11 @@ def generate_app(
                     with TemporaryFile() as wav_file:
 
                         wave = engine.synthesis(query=queries[i], speaker_id=speaker)
-                        soundfile.write(
+                        write_wave(
                             file=wav_file,
-                            data=wave,
-                            samplerate=sampling_rate,
-                            format="WAV",
+                            wave=wave,
+                            sampling_rate=sampling_rate,
+                            stereo=queries[i].outputStereo,
                         )
                         wav_file.seek(0)
                         zip_file.writestr(f"{str(i + 1).zfill(3)}.wav", wav_file.read())
@@ -525,9 +674,9 @@ def generate_app(
         engine = get_engine(core_version)
 
         try:
-            speakers = metas_store.load_combined_metas(engine=engine)
             morphable_targets = get_morphable_targets(
-                speakers=speakers, base_speakers=base_speakers
+                permission_matrix=get_morphing_permission_matrix(engine),
+                base_speakers=base_speakers,
             )
             # jsonはint型のキーを持てないので、string型に変換する
             return [
@@ -539,6 +688,48 @@ def generate_app(
                 status_code=404, detail=f"該当する話者(speaker={e.speaker})が見つかりません"
             )
 
+    def get_morphing_parameter(
+        engine: SynthesisEngineBase,
+        query: AudioQuery,
+        base_speaker: int,
+        target_speaker: int,
+        core_version: Optional[str],
+    ) -> MorphingParameter:
+        """
+        モーフィングが許可されているか確かめ、モーフィング用パラメータを返す
+        生成したパラメータはキャッシュされる
+        """
+        try:
+            is_permitted = get_morphing_permission_matrix(engine).is_permitted(
+                base_speaker, target_speaker
+            )
+            if not is_permitted:
+                raise HTTPException(
+                    status_code=400,
+                    detail="指定された話者ペアでのモーフィングはできません",
+                )
+        except SpeakerNotFoundError as e:
+            raise HTTPException(
+                status_code=404, detail=f"該当する話者(speaker={e.speaker})が見つかりません"
+            )
+
+        return morphing_parameter_cache.get_or_create(
+            morphing_parameter_key(
+                core_version=core_version or latest_core_version,
+                query=query,
+                base_speaker=base_speaker,
+                target_speaker=target_speaker,
+            ),
+            lambda: synthesis_morphing_parameter(
+                engine=engine,
+                query=query,
+                base_speaker=base_speaker,
+                target_speaker=target_speaker,
+                target_f0_method=morphing_target_f0_method,
+                quality=morphing_quality,
+            ),
+        )
+
     @app.post(
         "/synthesis_morphing",
         response_class=FileResponse,
@@ -564,44 +755,22 @@ def generate_app(
         モーフィングの割合は`morph_rate`で指定でき、0.0でベースの話者、1.0でターゲットの話者に近づきます。
         """
         engine = get_engine(core_version)
-
-        try:
-            speakers = metas_store.load_combined_metas(engine=engine)
-            speaker_lookup = construct_lookup(speakers=speakers)
-            is_permitted = is_synthesis_morphing_permitted(
-                speaker_lookup, base_speaker, target_speaker
-            )
-            if not is_permitted:
-                raise HTTPException(
-                    status_code=400,
-                    detail="指定された話者ペアでのモーフィングはできません",
-                )
-        except SpeakerNotFoundError as e:
-            raise HTTPException(
-                status_code=404, detail=f"該当する話者(speaker={e.speaker})が見つかりません"
-            )
-
-        # 生成したパラメータはキャッシュされる
-        morph_param = synthesis_morphing_parameter(
-            engine=engine,
-            query=query,
-            base_speaker=base_speaker,
-            target_speaker=target_speaker,
+        morph_param = get_morphing_parameter(
+            engine, query, base_speaker, target_speaker, core_version
         )
 
         morph_wave = synthesis_morphing(
             morph_param=morph_param,
             morph_rate=morph_rate,
             output_fs=query.outputSamplingRate,
-            output_stereo=query.outputStereo,
         )
 
         with NamedTemporaryFile(delete=False) as f:
-            soundfile.write(
+            write_wave(
                 file=f,
-                data=morph_wave,
-                samplerate=query.outputSamplingRate,
-                format="WAV",
+                wave=morph_wave,
+                sampling_rate=query.outputSamplingRate,
+                stereo=query.outputStereo,
             )
 
         return FileResponse(
@@ -610,6 +779,118 @@ def generate_app(
             background=BackgroundTask(delete_file, f.name),
         )
 
+    @app.post(
+        "/synthesis_morphing_stream",
+        response_class=StreamingResponse,
+        responses={
+            200: {
+                "content": {
+                    "audio/wav": {"schema": {"type": "string", "format": "binary"}}
+                },
+            }
+        },
+        tags=["音声合成"],
+        summary="2人の話者でモーフィングした音声を、合成しながら少しずつ返す",
+    )
+    def _synthesis_morphing_stream(
+        query: AudioQuery,
+        base_speaker: int,
+        target_speaker: int,
+        morph_rate: float = Query(..., ge=0.0, le=1.0),  # noqa: B008
+        core_version: Optional[str] = None,
+    ):
+        """
+        `/synthesis_morphing`と同じ音声を、0.5秒ごとに合成しながらwavとして送ります。
+        音声全体の合成を待たずに再生を始められるので、長い音声でも最初の音声が届くまでの時間が短くなります。
+        長さが決まる前に送り始めるため、wavのヘッダのデータ長は0xFFFFFFFFになります。
+        """
+        engine = get_engine(core_version)
+        morph_param = get_morphing_parameter(
+            engine, query, base_speaker, target_speaker, core_version
+        )
+
+        def generate_wave():
+            yield wave_stream_header(
+                sampling_rate=query.outputSamplingRate, stereo=query.outputStereo
+            )
+            for block in synthesis_morphing_stream(
+                morph_param=morph_param,
+                morph_rate=morph_rate,
+                output_fs=query.outputSamplingRate,
+            ):
+                yield wave_to_pcm16(block, stereo=query.outputStereo)
+
+        return StreamingResponse(generate_wave(), media_type="audio/wav")
+
+    @app.post(
+        "/multi_synthesis_morphing",
+        response_class=FileResponse,
+        responses={
+            200: {
+                "content": {
+                    "application/zip": {
+                        "schema": {"type": "string", "format": "binary"}
+                    }
+                },
+            }
+        },
+        tags=["音声合成"],
+        summary="2人の話者で複数の割合でモーフィングした音声をまとめて合成する",
+    )
+    def multi_synthesis_morphing(
+        query: AudioQuery,
+        base_speaker: int,
+        target_speaker: int,
+        morph_rates: List[float] = Query(...),  # noqa: B008
+        core_version: Optional[str] = None,
+    ):
+        """
+        `/synthesis_morphing`と同じ音声を、`morph_rates`で指定した全ての割合についてまとめて合成します。
+        `morph_rates=0.25&morph_rates=0.5`のように複数指定でき、指定した順に`001.wav`、`002.wav`...としてzipにまとめて返します。
+        話者の解析は1度だけ行われるので、割合を変えながら`/synthesis_morphing`を呼ぶより高速です。
+        1回に指定できる割合の数には上限があり、超えた場合は422を返します。
+        """
+        if len(morph_rates) > MAX_MORPH_RATES:
+            raise HTTPException(
+                status_code=422,
+                detail=f"morph_ratesは{MAX_MORPH_RATES}個以下で指定してください",
+            )
+        if any(morph_rate < 0.0 or morph_rate > 1.0 for morph_rate in morph_rates):
+            raise HTTPException(
+                status_code=422, detail="morph_ratesは0.0から1.0の範囲で指定してください"
+            )
+
+        engine = get_engine(core_version)
+        morph_param = get_morphing_parameter(
+            engine, query, base_speaker, target_speaker, core_version
+        )
+
+        morph_waves = synthesis_morphing_multi(
+            morph_param=morph_param,
+            morph_rates=morph_rates,
+            output_fs=query.outputSamplingRate,
+        )
+
+        # 合成できた音声から順にzipへ書き込み、全ての音声をメモリ上に保持しないようにする
+        with NamedTemporaryFile(delete=False) as f:
+            with zipfile.ZipFile(f, mode="a") as zip_file:
+                for i, morph_wave in enumerate(morph_waves):
+                    with TemporaryFile() as wav_file:
+                        write_wave(
+                            file=wav_file,
+                            wave=morph_wave,
+                            sampling_rate=query.outputSamplingRate,
+                            stereo=query.outputStereo,
+                        )
+                        wav_file.seek(0)
+                        zip_file.writestr(f"{str(i + 1).zfill(3)}.wav", wav_file.read())
+
+        return FileResponse(
+            f.name,
+            media_type="application/zip",
+            background=BackgroundTask(delete_file, f.name),
+        )
+
     @app.post(
         "/connect_waves",
         response_class=FileResponse,
@@ -633,12 +914,7 @@ def generate_app(
             return HTTPException(status_code=422, detail=str(err))
 
         with NamedTemporaryFile(delete=False) as f:
-            soundfile.write(
-                file=f,
-                data=waves_nparray,
-                samplerate=sampling_rate,
-                format="WAV",
-            )
+            write_wave(file=f, wave=waves_nparray, sampling_rate=sampling_rate)
 
         return FileResponse(
             f.name,
@@ -826,7 +1102,7 @@ def generate_app(
         """
         if not engine_manifest_data.supported_features.manage_library:
             raise HTTPException(status_code=404, detail="この機能は実装されていません")
-        return library_manager.downloadable_libraries()
+        return get_library_manager().downloadable_libraries()
 
     @app.get(
         "/installed_libraries",
@@ -843,7 +1119,7 @@ def generate_app(
         """
         if not engine_manifest_data.supported_features.manage_library:
             raise HTTPException(status_code=404, detail="この機能は実装されていません")
-        return library_manager.installed_libraries()
+        return get_library_manager().installed_libraries()
 
     @app.post(
         "/install_library/{library_uuid}",
@@ -865,7 +1141,7 @@ def generate_app(
         archive = BytesIO(await request.body())
         loop = asyncio.get_event_loop()
         await loop.run_in_executor(
-            None, library_manager.install_library, library_uuid, archive
+            None, get_library_manager().install_library, library_uuid, archive
         )
         return Response(status_code=204)
 
@@ -885,7 +1161,7 @@ def generate_app(
         """
         if not engine_manifest_data.supported_features.manage_library:
             raise HTTPException(status_code=404, detail="この機能は実装されていません")
-        library_manager.uninstall_library(library_uuid)
+        get_library_manager().uninstall_library(library_uuid)
         return Response(status_code=204)
 
     @app.post("/initialize_speaker", status_code=204, tags=["その他"])
@@ -913,18 +1189,31 @@ def generate_app(
         return engine.is_initialized_speaker_synthesis(speaker)
 
     @app.get("/user_dict", response_model=Dict[str, UserDictWord], tags=["ユーザー辞書"])
-    def get_user_dict_words():
+    def get_user_dict_words(
+        surface: Optional[str] = None,
+        offset: int = Query(0, ge=0),  # noqa: B008
+        limit: Optional[int] = Query(None, ge=1),  # noqa: B008
+    ):
         """
         ユーザー辞書に登録されている単語の一覧を返します。
         単語の表層形(surface)は正規化済みの物を返します。
 
+        Parameters
+        ----------
+        surface: Optional[str]
+            指定すると、表層形が一致する単語だけを返します
+        offset: int
+            登録順で何件目の単語から返すか
+        limit: Optional[int]
+            返す単語の最大数。指定しない場合は全ての単語を返します
+
         Returns
         -------
         Dict[str, UserDictWord]
             単語のUUIDとその詳細
         """
         try:
-            return read_dict()
+            return search_dict(surface=surface, offset=offset, limit=limit)
         except Exception:
             traceback.print_exc()
             raise HTTPException(status_code=422, detail="辞書の読み込みに失敗しました。")
@@ -1036,6 +1325,52 @@ def generate_app(
             traceback.print_exc()
             raise HTTPException(status_code=422, detail="ユーザー辞書の更新に失敗しました。")
 
+    @app.post(
+        "/user_dict_operations",
+        response_model=List[UserDictOperationResult],
+        tags=["ユーザー辞書"],
+        summary="ユーザー辞書の言葉をまとめて追加・更新・削除する",
+    )
+    def user_dict_operations(operations: List[UserDictOperation]):
+        """
+        ユーザー辞書に対する追加(ADD)・更新(UPDATE)・削除(DELETE)をまとめて適用します。
+        操作は先頭から順に適用され、辞書の保存とコンパイルは最後に1回だけ行われます。
+        1件でも失敗した操作があった場合はユーザー辞書を変更せず、操作ごとの結果を422で返します。
+
+        Parameters
+        ----------
+        operations: List[UserDictOperation]
+            操作のリスト
+            ADDではsurface・pronunciation・accent_typeが、UPDATEではそれに加えてword_uuidが、DELETEではword_uuidが必要です
+        """
+        try:
+            results = apply_user_dict_operations(operations=operations)
+        except Exception:
+            traceback.print_exc()
+            raise HTTPException(status_code=422, detail="ユーザー辞書の更新に失敗しました。")
+        if not all(result.success for result in results):
+            raise HTTPException(
+                status_code=422, detail=[result.dict() for result in results]
+            )
+        return results
+
+    @app.get(
+        "/user_dict_status",
+        response_model=UserDictStatus,
+        tags=["ユーザー辞書"],
+        summary="ユーザー辞書の反映状況を取得する",
+    )
+    def user_dict_status():
+        """
+        ユーザー辞書の変更がOpenJTalkに反映されたかどうかを返します。
+        辞書のコンパイルはバックグラウンドで行われるため、変更直後は`pending`がtrueになります。
+        `version`は辞書がOpenJTalkに読み込まれるたびに1ずつ増えます。
+        """
+        return UserDictStatus(
+            version=get_user_dict_version(),
+            pending=get_user_dict_compile_pending(),
+        )
+
     @app.post("/import_user_dict", status_code=204, tags=["ユーザー辞書"])
     def import_user_dict_words(
         import_dict_data: Dict[str, UserDictWord], override: bool
@@ -1057,6 +1392,67 @@ def generate_app(
             traceback.print_exc()
             raise HTTPException(status_code=422, detail="ユーザー辞書のインポートに失敗しました。")
 
+    @app.post(
+        "/import_user_dict_stream",
+        responses={200: {"content": {"application/x-ndjson": {}}}},
+        tags=["ユーザー辞書"],
+        summary="CSV・JSONLのファイルからユーザー辞書に言葉をインポートする",
+    )
+    async def import_user_dict_stream_words(
+        request: Request, format: UserDictImportFormat, override: bool = False
+    ):
+        """
+        CSVまたはJSONLのファイルをリクエストボディとして受け取り、ユーザー辞書に言葉をインポートします。
+        CSVは1行目に列名を、JSONLは各行に1つのオブジェクトを書いてください。
+        列名・キーはword_uuid(省略可)・surface・pronunciation・accent_type・word_type(省略可)・priority(省略可)です。
+        読み込めなかった行は報告され、インポートは中断しません。辞書のコンパイルは最後に1回だけ行われます。
+        レスポンスは1000行ごとの進捗(UserDictImportProgress)を1行ずつ並べたJSONLで、最後の行でdoneがtrueになります。
+        インポートに失敗した場合は、最後の行のerrorに理由が入ります。
+        レスポンスを最後まで受け取らずに切断しても、インポートは最後まで行われます。
+
+        Parameters
+        ----------
+        format: UserDictImportFormat
+            ファイルの形式
+        override: bool
+            word_uuidが既に登録されている言葉と重複した場合、上書きするかどうか
+        """
+        # 大きなファイルも一度にメモリへ載せないよう、一時ファイルに書き込んでから読み込む
+        # ファイルへの書き込みでイベントループを止めないよう、スレッドプールで行う
+        body = await run_in_threadpool(TemporaryFile)
+        try:
+            async for chunk in request.stream():
+                await run_in_threadpool(body.write, chunk)
+            await run_in_threadpool(body.seek, 0)
+        except BaseException:
+            body.close()
+            raise
+
+        # レスポンスの送信と切り離し、クライアントが切断してもインポートを最後まで行う
+        # 進捗はキューを通してレスポンスに渡す
+        progress_queue: "Queue[Optional[str]]" = Queue()
+
+        def run_import():
+            try:
+                with TextIOWrapper(body, encoding="utf-8-sig", newline="") as file:
+                    for progress in import_user_dict_stream(
+                        file=file, format=format, override=override
+                    ):
+                        progress_queue.put(progress.json(ensure_ascii=False) + "\n")
+            finally:
+                progress_queue.put(None)
+
+        Thread(target=run_import).start()
+
+        def generate_progress():
+            while True:
+                line = progress_queue.get()
+                if line is None:
+                    return
+                yield line
+
+        return StreamingResponse(generate_progress(), media_type="application/x-ndjson")
+
     @app.get("/supported_devices", response_model=SupportedDevicesInfo, tags=["その他"])
     def supported_devices(
         core_version: Optional[str] = None,
@@ -1073,6 +1469,39 @@ def generate_app(
     def engine_manifest():
         return engine_manifest_data
 
+    @app.get(
+        "/accent_phrase_cache_info",
+        response_model=AccentPhraseCacheInfo,
+        tags=["その他"],
+        summary="テキスト解析結果のキャッシュの情報を取得する",
+    )
+    def accent_phrase_cache_info():
+        """
+        テキスト解析結果のキャッシュのヒット率やおおよそのメモリ使用量を返します。
+        ユーザー辞書が更新されるとキャッシュは破棄されます。
+        """
+        return accent_phrase_cache.info()
+
+    @app.get(
+        "/morphing_parameter_cache_info",
+        response_model=MorphingParameterCacheInfo,
+        tags=["その他"],
+        summary="モーフィング用パラメータのキャッシュの情報を取得する",
+    )
+    def morphing_parameter_cache_info():
+        """
+        モーフィング用パラメータのキャッシュのヒット率や使用しているメモリ・ディスクの量を返します。
+        """
+        return morphing_parameter_cache.info()
+
+    @app.delete("/morphing_parameter_cache", status_code=204, tags=["その他"])
+    def clear_morphing_parameter_cache():
+        """
+        モーフィング用パラメータのキャッシュを全て破棄します。
+        """
+        morphing_parameter_cache.clear()
+        return Response(status_code=204)
+
     @app.post(
         "/validate_kana",
         response_model=bool,
@@ -1104,6 +1533,31 @@ def generate_app(
                 detail=ParseKanaBadRequest(err).dict(),
             )
 
+    @app.post(
+        "/multi_validate_kana",
+        response_model=List[Optional[ParseKanaBadRequest]],
+        tags=["その他"],
+        summary="複数のテキストがAquesTalkライクな記法に従っているかまとめて判定する",
+    )
+    def multi_validate_kana(texts: List[str]):
+        """
+        複数のテキストがAquesTalkライクな記法に従っているかどうかを判定します。
+        テキストごとに、従っている場合は`null`が、従っていない場合はエラーの内容が、送った順番で返ります。
+
+        Parameters
+        ----------
+        texts: List[str]
+            判定する対象の文字列のリスト
+        """
+        results: List[Optional[ParseKanaBadRequest]] = []
+        for text in texts:
+            try:
+                parse_kana(text)
+                results.append(None)
+            except ParseKanaError as err:
+                results.append(ParseKanaBadRequest(err))
+        return results
+
     # @app.get("/sv_models", response_model=List[str], tags=["モデル登録"])
     # def get_sv_models():
     #     try:
@@ -1147,6 +1601,61 @@ def generate_app(
     #         raise HTTPException(status_code=500, detail="モデルの登録に失敗しました")
     #     return Response(status_code=204)
 
+    # SVモデルの登録は、上のbase64で全てのファイルを受け取る方法ではなく、
+    # ファイルを個別にアップロードしてからまとめて登録する方法でのみ受け付ける
+    @app.put("/sv_model_file/{uuid}/{file_path:path}", status_code=204, tags=["モデル登録"])
+    async def put_sv_model_file(
+        uuid: str, file_path: str, sha256: str, request: Request
+    ):
+        """
+        svモデルのファイルを1つアップロードします。
+        リクエストボディは受信した分から順にファイルへ書き込まれるため、大きなモデルも一度にメモリへ載りません。
+        全てのファイルをアップロードした後、`/commit_sv_model`で登録してください。
+
+        Parameters
+        ----------
+        uuid: str
+            モデル固有のUUID
+        file_path: str
+            保存先のパス。以下のいずれか
+            - model/variance_model.onnx, model/embedder_model.onnx, model/decoder_model.onnx
+            - speaker_info/${speaker_uuid}/portrait.png
+            - speaker_info/${speaker_uuid}/icons/${id}.png
+            - speaker_info/${speaker_uuid}/voice_samples/${id}_${index}.wav
+        sha256: str
+            ファイルのSHA-256。一致しない場合はエラーになります
+        """
+        try:
+            # ファイルへの書き込みでイベントループを止めないよう、スレッドプールで行う
+            writer = await run_in_threadpool(
+                SVModelFileWriter, uuid, file_path, sha256, sv_model_dir
+            )
+            try:
+                async for chunk in request.stream():
+                    await run_in_threadpool(writer.write, chunk)
+            except BaseException:
+                await run_in_threadpool(writer.abort)
+                raise
+            await run_in_threadpool(writer.close)
+        except SVModelUploadError as err:
+            raise HTTPException(status_code=422, detail=err.message)
+        return Response(status_code=204)
+
+    @app.post("/commit_sv_model", status_code=204, tags=["モデル登録"])
+    def post_commit_sv_model(sv_model: SVModelUploadInfo):
+        """
+        `/sv_model_file`でアップロードしたファイルをまとめてsvモデルとして登録します。
+        登録に失敗した場合は、既存のモデルが元に戻されます。
+        """
+        try:
+            commit_sv_model(sv_model, stored_dir=sv_model_dir)
+        except SVModelUploadError as err:
+            raise HTTPException(status_code=422, detail=err.message)
+        except Exception:
+            traceback.print_exc()
+            raise HTTPException(status_code=500, detail="モデルの登録に失敗しました")
+        return Response(status_code=204)
+
     @app.get("/setting", response_class=HTMLResponse, tags=["設定"])
     def setting_get(request: Request):
         settings = setting_loader.load_setting_file()
@@ -1157,7 +1666,7 @@ def generate_app(
         if allow_origin is None:
             allow_origin = ""
 
-        return setting_ui_template.TemplateResponse(
+        return get_setting_ui_template().TemplateResponse(
             "ui.html",
             {
                 "request": request,
@@ -1183,7 +1692,7 @@ def generate_app(
         if allow_origin is None:
             allow_origin = ""
 
-        return setting_ui_template.TemplateResponse(
+        return get_setting_ui_template().TemplateResponse(
             "ui.html",
             {
                 "request": request,
@@ -1277,6 +1786,63 @@ if __name__ == "__main__":
     parser.add_argument(
         "--load_all_models", action="store_true", help="指定すると起動時に全ての音声合成モデルを読み込みます。"
     )
+    parser.add_argument(
+        "--frontend_processes",
+        type=int,
+        default=0,
+        help="テキスト解析を行うプロセス数です。1以上を指定すると、テキスト解析を別のプロセスで並列に行います。",
+    )
+    parser.add_argument(
+        "--user_dict_compile_delay",
+        type=float,
+        default=0.5,
+        help="ユーザー辞書の変更をまとめてコンパイルするまでの待ち時間(秒)です。負の値を指定すると、変更のたびにその場でコンパイルします。",
+    )
+    parser.add_argument(
+        "--user_dict_store",
+        type=str,
+        choices=["json", "sqlite"],
+        default="json",
+        help="ユーザー辞書の保存形式です。sqliteを指定すると、登録された単語が多くても辞書の変更が遅くなりません。初めて指定した時にjsonのユーザー辞書を移行します。",
+    )
+    parser.add_argument(
+        "--morphing_processes",
+        type=int,
+        default=0,
+        help="モーフィングの解析を行うプロセス数です。1以上を指定すると、ベース話者とターゲット話者の解析を別のプロセスで並列に行います。",
+    )
+    parser.add_argument(
+        "--morphing_target_f0",
+        type=TargetF0Method,
+        choices=[method.value for method in TargetF0Method],
+        default=TargetF0Method.HARVEST,
+        help="モーフィングでターゲット話者の解析に使う基本周波数の推定方法です。dioはharvestより速く、baseはベース話者の推定結果を使うので最も速くなりますが、音質が下がることがあります。",
+    )
+    parser.add_argument(
+        "--morphing_quality",
+        type=MorphingQuality,
+        choices=[quality.value for quality in MorphingQuality],
+        default=MorphingQuality.HIGH,
+        help="モーフィングの品質です。standardやfastを指定すると、音質が下がる代わりに初回の生成が速くなり、キャッシュに必要なメモリが減ります。",
+    )
+    parser.add_argument(
+        "--morphing_cache_size",
+        type=int,
+        default=512,
+        help="モーフィング用パラメータのキャッシュに使うメモリの上限(MiB)です。",
+    )
+    parser.add_argument(
+        "--morphing_cache_dir",
+        type=Path,
+        default=None,
+        help="指定すると、メモリに収まらないモーフィング用パラメータのキャッシュをこのディレクトリに保存します。",
+    )
+    parser.add_argument(
+        "--morphing_cache_disk_size",
+        type=int,
+        default=2048,
+        help="--morphing_cache_dirに保存するキャッシュの上限(MiB)です。",
+    )
 
     # 引数へcpu_num_threadsの指定がなければ、環境変数をロールします。
     # 環境変数にもない場合は、Noneのままとします。
@@ -1320,30 +1886,65 @@ if __name__ == "__main__":
         "--setting_file", type=Path, default=USER_SETTING_PATH, help="設定ファイルを指定できます。"
     )
 
+    parser.add_argument(
+        "--startup_profile",
+        action="store_true",
+        help="指定すると起動完了時に、モジュールの読み込みや初期化など起動処理ごとの所要時間を出力します。",
+    )
+
     args = parser.parse_args()
 
+    # モジュールの読み込みはmainより前に終わっているので、ここまでのCPU時間で代用する
+    # 経過時間ではないので、totalには含めない
+    startup_profiler = StartupProfiler()
+    startup_profiler.note("import (cpu time)", time.process_time())
+
     if args.output_log_utf8:
         set_output_log_utf8()
 
     cpu_num_threads: Optional[int] = args.cpu_num_threads
 
     root_dir = args.sharevox_dir if args.sharevox_dir is not None else engine_root()
-    copy_model_and_info(root_dir)
-
-    synthesis_engines = make_synthesis_engines(
-        use_gpu=args.use_gpu,
-        voicelib_dirs=args.voicelib_dir,
-        sharevox_dir=args.sharevox_dir,
-        runtime_dirs=args.runtime_dir,
-        cpu_num_threads=cpu_num_threads,
-        enable_mock=args.enable_mock,
-        load_all_models=args.load_all_models,
-    )
+    with startup_profiler.measure("copy model and info"):
+        copy_model_and_info(root_dir)
+
+    with startup_profiler.measure("core load"):
+        synthesis_engines = make_synthesis_engines(
+            use_gpu=args.use_gpu,
+            voicelib_dirs=args.voicelib_dir,
+            sharevox_dir=args.sharevox_dir,
+            runtime_dirs=args.runtime_dir,
+            cpu_num_threads=cpu_num_threads,
+            enable_mock=args.enable_mock,
+            load_all_models=args.load_all_models,
+        )
     assert len(synthesis_engines) != 0, "音声合成エンジンがありません。"
     latest_core_version = get_latest_core_version(versions=synthesis_engines.keys())
 
+    frontend_pool = None
+    if args.frontend_processes > 0:
+        frontend_pool = FrontendPool(args.frontend_processes)
+        set_frontend_pool(frontend_pool)
+
+    morphing_analysis_pool = None
+    if args.morphing_processes > 0:
+        morphing_analysis_pool = MorphingAnalysisPool(args.morphing_processes)
+        set_morphing_analysis_pool(morphing_analysis_pool)
+
+    if args.user_dict_store == "sqlite":
+        set_user_dict_store(open_user_dict_store())
+
+    compile_worker = None
+    if args.user_dict_compile_delay >= 0:
+        compile_worker = UserDictCompileWorker(
+            debounce_seconds=args.user_dict_compile_delay
+        )
+        set_compile_worker(compile_worker)
+
     cancellable_engine = None
     if args.enable_cancellable_synthesis:
+        from voicevox_engine.cancellable_engine import CancellableEngine
+
         cancellable_engine = CancellableEngine(args)
 
     root_dir = args.sharevox_dir if args.sharevox_dir is not None else engine_root()
@@ -1372,7 +1973,27 @@ if __name__ == "__main__":
             root_dir=root_dir,
             cors_policy_mode=cors_policy_mode,
             allow_origin=allow_origin,
+            startup_profiler=startup_profiler if args.startup_profile else None,
+            morphing_parameter_cache=MorphingParameterCache(
+                max_bytes=args.morphing_cache_size * 1024**2,
+                spill_dir=args.morphing_cache_dir,
+                max_disk_bytes=args.morphing_cache_disk_size * 1024**2,
+            ),
+            morphing_target_f0_method=args.morphing_target_f0,
+            morphing_quality=args.morphing_quality,
         ),
         host=args.host,
         port=args.port,
     )
+
+    if compile_worker is not None:
+        # 反映待ちの変更をコンパイルしてから終了する
+        compile_worker.close()
+
+    # ワーカープロセスがサーバーの終了後も残らないよう、プロセスプールを終了する
+    if morphing_analysis_pool is not None:
+        set_morphing_analysis_pool(None)
+        morphing_analysis_pool.shutdown()
+    if frontend_pool is not None:
+        set_frontend_pool(None)
+        frontend_pool.shutdown()
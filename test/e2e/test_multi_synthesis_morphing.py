@@ -0,0 +1,56 @@
+import zipfile
+from io import BytesIO
+
+from fastapi.testclient import TestClient
+
+from voicevox_engine.morphing import MAX_MORPH_RATES
+
+# モックの音声合成エンジンは/audio_queryに対応していないので、クエリを直接作る
+query = {
+    "accent_phrases": [
+        {
+            "moras": [
+                {
+                    "text": "テ",
+                    "consonant": "t",
+                    "consonant_length": 0.1,
+                    "vowel": "e",
+                    "vowel_length": 0.1,
+                    "pitch": 5.0,
+                }
+            ],
+            "accent": 1,
+        }
+    ],
+    "speedScale": 1.0,
+    "pitchScale": 0.0,
+    "intonationScale": 1.0,
+    "volumeScale": 1.0,
+    "prePhonemeLength": 0.1,
+    "postPhonemeLength": 0.1,
+    "outputSamplingRate": 24000,
+    "outputStereo": False,
+    "kana": "テ'",
+}
+
+
+def multi_synthesis_morphing(client: TestClient, morph_rates):
+    return client.post(
+        "/multi_synthesis_morphing",
+        params={"base_speaker": 0, "target_speaker": 2, "morph_rates": morph_rates},
+        json=query,
+    )
+
+
+def test_multi_synthesis_morphing(client: TestClient):
+    response = multi_synthesis_morphing(client, [0.0, 0.5, 1.0])
+    assert response.status_code == 200
+    assert response.headers["content-type"] == "application/zip"
+    with zipfile.ZipFile(BytesIO(response.content)) as zip_file:
+        assert zip_file.namelist() == ["001.wav", "002.wav", "003.wav"]
+
+
+def test_multi_synthesis_morphing_invalid_morph_rates(client: TestClient):
+    assert multi_synthesis_morphing(client, [0.5, 1.5]).status_code == 422
+    too_many_rates = [0.5] * (MAX_MORPH_RATES + 1)
+    assert multi_synthesis_morphing(client, too_many_rates).status_code == 422
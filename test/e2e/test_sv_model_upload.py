@@ -0,0 +1,116 @@
+import hashlib
+import json
+from pathlib import Path
+
+import pytest
+from fastapi.testclient import TestClient
+from run import generate_app
+
+from voicevox_engine.setting import SettingLoader
+from voicevox_engine.synthesis_engine import make_synthesis_engines
+from voicevox_engine.utility.core_version_utility import get_latest_core_version
+
+sv_model_uuid = "b351e601-3e98-40d4-ac1d-19529d932c22"
+speaker_uuid = "7ffcb7ce-00ec-4bdc-82cd-45a8889e43ff"
+
+
+@pytest.fixture
+def sv_model_dir(tmp_path: Path) -> Path:
+    (tmp_path / "model").mkdir()
+    (tmp_path / "model" / "libraries.json").write_text(json.dumps({"official": True}))
+    return tmp_path
+
+
+@pytest.fixture
+def sv_model_client(sv_model_dir: Path) -> TestClient:
+    synthesis_engines = make_synthesis_engines(use_gpu=False)
+    latest_core_version = get_latest_core_version(versions=synthesis_engines.keys())
+    setting_loader = SettingLoader(Path("./default_setting.yml"))
+
+    return TestClient(
+        generate_app(
+            synthesis_engines=synthesis_engines,
+            latest_core_version=latest_core_version,
+            setting_loader=setting_loader,
+            sv_model_dir=sv_model_dir,
+        )
+    )
+
+
+def put_file(client: TestClient, file_path: str, data: bytes, sha256: str = None):
+    if sha256 is None:
+        sha256 = hashlib.sha256(data).hexdigest()
+    return client.put(
+        f"/sv_model_file/{sv_model_uuid}/{file_path}",
+        params={"sha256": sha256},
+        # 少しずつ送信する
+        data=(data[i : i + 4] for i in range(0, len(data), 4)),
+    )
+
+
+def test_upload_and_commit_sv_model(sv_model_client: TestClient, sv_model_dir: Path):
+    files = {
+        "model/variance_model.onnx": b"variance_model",
+        "model/embedder_model.onnx": b"embedder_model",
+        "model/decoder_model.onnx": b"decoder_model",
+        f"speaker_info/{speaker_uuid}/portrait.png": b"portrait",
+    }
+    for file_path, data in files.items():
+        assert put_file(sv_model_client, file_path, data).status_code == 204
+
+    response = sv_model_client.post(
+        "/commit_sv_model",
+        json={
+            "uuid": sv_model_uuid,
+            "metas": [
+                {
+                    "name": "小春音アミ",
+                    "speaker_uuid": speaker_uuid,
+                    "styles": [{"name": "ノーマル", "id": 0}],
+                    "version": "0.0.1",
+                }
+            ],
+            "model_config": {"length_regulator": "gaussian", "start_id": 1},
+            "policies": {speaker_uuid: "dummy policy"},
+        },
+    )
+    assert response.status_code == 204
+
+    model_dir = sv_model_dir / "model" / sv_model_uuid
+    assert (model_dir / "decoder_model.onnx").read_bytes() == b"decoder_model"
+    speaker_dir = sv_model_dir / "speaker_info" / speaker_uuid
+    assert (speaker_dir / "portrait.png").read_bytes() == b"portrait"
+    assert (speaker_dir / "policy.md").read_text(encoding="utf-8") == "dummy policy"
+    libraries = json.loads((sv_model_dir / "model" / "libraries.json").read_text())
+    assert sv_model_uuid in libraries
+
+
+def test_upload_sv_model_file_error(sv_model_client: TestClient, sv_model_dir: Path):
+    upload_dir = sv_model_dir / "sv_model_upload" / sv_model_uuid
+
+    # チェックサムが一致しない
+    response = put_file(
+        sv_model_client,
+        "model/decoder_model.onnx",
+        b"actual",
+        sha256=hashlib.sha256(b"expected").hexdigest(),
+    )
+    assert response.status_code == 422
+    assert not (upload_dir / "model" / "decoder_model.onnx").exists()
+    assert not (upload_dir / "model" / "decoder_model.onnx.part").exists()
+
+    # アップロードできないファイル
+    response = put_file(sv_model_client, "model/libraries.json", b"{}")
+    assert response.status_code == 422
+
+    # ファイルが揃っていない
+    response = sv_model_client.post(
+        "/commit_sv_model",
+        json={
+            "uuid": sv_model_uuid,
+            "metas": [],
+            "model_config": {"length_regulator": "gaussian", "start_id": 1},
+            "policies": {},
+        },
+    )
+    assert response.status_code == 422
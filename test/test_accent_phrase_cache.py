@@ -0,0 +1,113 @@
+from unittest import TestCase
+from unittest.mock import patch
+
+from voicevox_engine.dev.synthesis_engine import MockSynthesisEngine
+from voicevox_engine.model import AccentPhrase, Mora
+from voicevox_engine.synthesis_engine import synthesis_engine_base
+from voicevox_engine.synthesis_engine.accent_phrase_cache import (
+    AccentPhraseCache,
+    skeletons_to_accent_phrases,
+)
+
+
+def _skeletons(pause: bool = False):
+    return ((1, True, pause, (("コ", "k", "o"), ("ア", None, "a"))),)
+
+
+class TestAccentPhraseCache(TestCase):
+    def test_hit(self):
+        cache = AccentPhraseCache()
+        self.assertIsNone(cache.get("テキスト", 0))
+
+        cache.put("テキスト", 0, _skeletons(pause=True))
+        self.assertEqual(cache.get("テキスト", 0), _skeletons(pause=True))
+        self.assertEqual(cache.get("テキスト", 0), _skeletons(pause=True))
+
+        info = cache.info()
+        self.assertEqual((info.hits, info.misses, info.size), (2, 1, 1))
+        self.assertGreater(info.memory_bytes, 0)
+
+    def test_evict_least_recently_used(self):
+        cache = AccentPhraseCache(maxsize=2)
+        cache.put("a", 0, _skeletons())
+        cache.put("b", 0, _skeletons())
+        cache.get("a", 0)
+        cache.put("c", 0, _skeletons())
+
+        self.assertIsNotNone(cache.get("a", 0))
+        self.assertIsNone(cache.get("b", 0))
+        self.assertIsNotNone(cache.get("c", 0))
+        self.assertEqual(cache.info().size, 2)
+
+    def test_invalidate_by_user_dict_version(self):
+        cache = AccentPhraseCache()
+        cache.put("テキスト", 0, _skeletons())
+
+        self.assertIsNone(cache.get("テキスト", 1))
+        info = cache.info()
+        self.assertEqual(
+            (info.size, info.memory_bytes, info.user_dict_version), (0, 0, 1)
+        )
+
+        # 古い辞書での解析結果は保存しない
+        cache.put("テキスト", 0, _skeletons())
+        self.assertIsNone(cache.get("テキスト", 1))
+
+    def test_skeletons_to_accent_phrases(self):
+        self.assertEqual(
+            skeletons_to_accent_phrases(_skeletons(pause=True)),
+            [
+                AccentPhrase(
+                    moras=[
+                        Mora(
+                            text="コ",
+                            consonant="k",
+                            consonant_length=0,
+                            vowel="o",
+                            vowel_length=0,
+                            pitch=0,
+                        ),
+                        Mora(
+                            text="ア",
+                            consonant=None,
+                            consonant_length=None,
+                            vowel="a",
+                            vowel_length=0,
+                            pitch=0,
+                        ),
+                    ],
+                    accent=1,
+                    pause_mora=Mora(
+                        text="、",
+                        consonant=None,
+                        consonant_length=None,
+                        vowel="pau",
+                        vowel_length=0,
+                        pitch=0,
+                    ),
+                    is_interrogative=True,
+                )
+            ],
+        )
+
+    def test_create_accent_phrases_uses_cache(self):
+        engine = MockSynthesisEngine(speakers="", supported_devices="")
+        # 音素長・音高の推論はこのテストの対象外
+        engine.replace_mora_data = lambda accent_phrases, speaker_id: accent_phrases
+        with patch.object(
+            synthesis_engine_base, "accent_phrase_cache", AccentPhraseCache()
+        ), patch.object(
+            synthesis_engine_base,
+            "labels_to_accent_phrase_skeletons",
+            wraps=synthesis_engine_base.labels_to_accent_phrase_skeletons,
+        ) as extract_mock, patch.object(
+            synthesis_engine_base, "get_user_dict_version", return_value=0
+        ) as version_mock:
+            expected = engine.create_accent_phrases("テスト", 0)
+            self.assertEqual(engine.create_accent_phrases("テスト", 0), expected)
+            self.assertEqual(extract_mock.call_count, 1)
+
+            # ユーザー辞書が更新されたら解析し直す
+            version_mock.return_value = 1
+            self.assertEqual(engine.create_accent_phrases("テスト", 0), expected)
+            self.assertEqual(extract_mock.call_count, 2)
@@ -0,0 +1,112 @@
+from unittest import TestCase
+from unittest.mock import Mock, patch
+
+from voicevox_engine.analysis_session import (
+    AnalysisSession,
+    AnalysisSessionManager,
+    AnalysisSessionNotFoundError,
+)
+from voicevox_engine.dev.synthesis_engine import MockSynthesisEngine
+from voicevox_engine.synthesis_engine.synthesis_engine_base import analyze_text
+
+
+class TestAnalysisSession(TestCase):
+    def setUp(self):
+        self.engine = MockSynthesisEngine(speakers="", supported_devices="")
+        # 音素長・音高の推論はこのテストの対象外なので、呼ばれた回数だけを確認する
+        self.engine.replace_mora_data = Mock(
+            side_effect=lambda accent_phrases, speaker_id: accent_phrases
+        )
+        self.session = AnalysisSession()
+
+    def test_same_as_whole_text(self):
+        text = "こんにちは。ヒホです。元気ですか？"
+        self.assertEqual(
+            self.session.create_accent_phrases(self.engine, text, 0),
+            self.engine.create_accent_phrases(text, 0),
+        )
+
+    def test_reanalyze_changed_sentence(self):
+        self.session.create_accent_phrases(self.engine, "こんにちは。ヒホです。元気ですか？", 0)
+        self.assertEqual(self.engine.replace_mora_data.call_count, 3)
+
+        self.engine.replace_mora_data.reset_mock()
+        accent_phrases = self.session.create_accent_phrases(
+            self.engine, "こんにちは。ヒホでした。元気ですか？", 0
+        )
+        self.assertEqual(self.engine.replace_mora_data.call_count, 1)
+        self.assertEqual(
+            (self.session.reused_sentences, self.session.analyzed_sentences), (2, 1)
+        )
+        self.assertEqual(
+            accent_phrases,
+            self.engine.create_accent_phrases("こんにちは。ヒホでした。元気ですか？", 0),
+        )
+
+        # 最後の文の後ろに文を足すと、最後だった文にはポーズが付くので解析し直す
+        self.engine.replace_mora_data.reset_mock()
+        self.session.create_accent_phrases(self.engine, "こんにちは。ヒホでした。元気ですか？はい。", 0)
+        self.assertEqual(
+            (self.session.reused_sentences, self.session.analyzed_sentences), (2, 2)
+        )
+
+    def test_reanalyze_all_when_speaker_changed(self):
+        text = "こんにちは。ヒホです。"
+        self.session.create_accent_phrases(self.engine, text, 0)
+        self.session.create_accent_phrases(self.engine, text, 1)
+        self.assertEqual(self.session.analyzed_sentences, 2)
+        self.assertEqual(
+            self.engine.replace_mora_data.call_args.kwargs["speaker_id"], 1
+        )
+
+    def test_analyze_only_changed_sentences(self):
+        self.session.create_accent_phrases(self.engine, "こんにちは。ヒホです。", 0)
+        # 前回と同じ文は、共有のテキスト解析キャッシュに頼らずテキスト解析も行わない
+        with patch(
+            "voicevox_engine.analysis_session.analyze_text", wraps=analyze_text
+        ) as mock_analyze_text:
+            self.session.create_accent_phrases(self.engine, "こんにちは。ヒホでした。", 0)
+        self.assertEqual(
+            [call.args[0] for call in mock_analyze_text.call_args_list], ["ヒホでした。"]
+        )
+
+    def test_trailing_sentence_without_accent_phrases(self):
+        # 最後の文がアクセント句を持たない場合、その前の文にはポーズを付けない
+        text = "こんにちは。ヒホです。、"
+        self.assertEqual(
+            self.session.create_accent_phrases(self.engine, text, 0),
+            self.engine.create_accent_phrases(text, 0),
+        )
+
+    def test_reuse_accent_phrases(self):
+        # 同じ文は保持している解析結果をコピーせずに返す
+        text = "こんにちは。"
+        accent_phrases = self.session.create_accent_phrases(self.engine, text, 0)
+        self.assertIs(
+            self.session.create_accent_phrases(self.engine, text, 0)[0],
+            accent_phrases[0],
+        )
+
+
+class TestAnalysisSessionManager(TestCase):
+    def test_create_and_delete(self):
+        manager = AnalysisSessionManager()
+        session_id = manager.create_session()
+        self.assertIsInstance(manager.get_session(session_id), AnalysisSession)
+
+        manager.delete_session(session_id)
+        with self.assertRaises(AnalysisSessionNotFoundError):
+            manager.get_session(session_id)
+        with self.assertRaises(AnalysisSessionNotFoundError):
+            manager.delete_session(session_id)
+
+    def test_evict_least_recently_used(self):
+        manager = AnalysisSessionManager(max_sessions=2)
+        first = manager.create_session()
+        second = manager.create_session()
+        manager.get_session(first)
+        manager.create_session()
+
+        manager.get_session(first)
+        with self.assertRaises(AnalysisSessionNotFoundError):
+            manager.get_session(second)
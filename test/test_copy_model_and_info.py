@@ -0,0 +1,72 @@
+import json
+import sys
+from pathlib import Path
+from tempfile import TemporaryDirectory
+from unittest import TestCase
+from unittest.mock import patch
+
+from voicevox_engine.utility.copy_model_and_info import sync_files
+
+# voicevox_engine.utilityでは同名の関数がexportされているので、モジュールはsys.modulesから取得する
+copy_model_and_info_module = sys.modules["voicevox_engine.utility.copy_model_and_info"]
+
+
+class TestSyncFiles(TestCase):
+    def setUp(self):
+        self.tmp_dir = TemporaryDirectory()
+        self.tmp_dir_path = Path(self.tmp_dir.name)
+        self.root_dir = self.tmp_dir_path / "root"
+        self.user_dir = self.tmp_dir_path / "user"
+        self.root_dir.mkdir()
+        self.user_dir.mkdir()
+        self.file_hashes_path = self.tmp_dir_path / "file_hashes.json"
+
+        for name, content in [("a.onnx", b"aaa"), ("b.json", b"{}")]:
+            (self.root_dir / name).write_bytes(content)
+        self.file_pairs = [
+            (self.root_dir / name, self.user_dir / name)
+            for name in ["a.onnx", "b.json"]
+        ]
+
+    def tearDown(self):
+        self.tmp_dir.cleanup()
+
+    def test_copy_missing_and_changed(self):
+        (self.user_dir / "b.json").write_bytes(b"broken")
+
+        copied = sync_files(self.file_pairs, self.file_hashes_path)
+
+        self.assertEqual(
+            set(copied), {self.user_dir / "a.onnx", self.user_dir / "b.json"}
+        )
+        for src, dst in self.file_pairs:
+            self.assertEqual(src.read_bytes(), dst.read_bytes())
+        self.assertEqual(
+            set(json.loads(self.file_hashes_path.read_text())),
+            {str(p) for pair in self.file_pairs for p in pair},
+        )
+
+    def test_skip_hash_of_unchanged_files(self):
+        sync_files(self.file_pairs, self.file_hashes_path)
+
+        with patch.object(
+            copy_model_and_info_module, "_calc_file_hash", side_effect=AssertionError
+        ):
+            copied = sync_files(self.file_pairs, self.file_hashes_path)
+        self.assertEqual(copied, [])
+
+    def test_rehash_modified_file(self):
+        sync_files(self.file_pairs, self.file_hashes_path)
+
+        (self.user_dir / "a.onnx").write_bytes(b"modified")
+        copied = sync_files(self.file_pairs, self.file_hashes_path)
+
+        self.assertEqual(copied, [self.user_dir / "a.onnx"])
+        self.assertEqual((self.user_dir / "a.onnx").read_bytes(), b"aaa")
+
+    def test_broken_file_hashes(self):
+        self.file_hashes_path.write_text("{broken")
+
+        copied = sync_files(self.file_pairs, self.file_hashes_path)
+
+        self.assertEqual(len(copied), 2)
@@ -0,0 +1,68 @@
+from pathlib import Path
+from tempfile import TemporaryDirectory
+from unittest import TestCase
+
+from pyopenjtalk import unset_user_dict
+
+from voicevox_engine.full_context_label import extract_full_context_labels
+from voicevox_engine.synthesis_engine import FrontendPool
+from voicevox_engine.synthesis_engine.synthesis_engine_base import (
+    labels_to_accent_phrase_skeletons,
+)
+from voicevox_engine.user_dict import (
+    apply_word,
+    get_loaded_user_dict_path,
+    get_user_dict_version,
+)
+
+
+class TestFrontendPool(TestCase):
+    @classmethod
+    def setUpClass(cls):
+        cls.pool = FrontendPool(num_processes=1)
+
+    @classmethod
+    def tearDownClass(cls):
+        cls.pool.shutdown()
+
+    def setUp(self):
+        self.tmp_dir = TemporaryDirectory()
+        self.tmp_dir_path = Path(self.tmp_dir.name)
+
+    def tearDown(self):
+        unset_user_dict()
+        self.tmp_dir.cleanup()
+
+    def test_analyze(self):
+        text = "こんにちは、ヒホです。明日は晴れますか？"
+        self.assertEqual(
+            self.pool.analyze(text, 0, None),
+            labels_to_accent_phrase_skeletons(extract_full_context_labels(text)),
+        )
+
+    def test_reload_user_dict(self):
+        test_text = "テスト用の文字列"
+        pronunciation = "デフォルトノジショデハゼッタイニセイセイサレナイヨミ"
+        before = self.pool.analyze(test_text, 0, None)
+
+        apply_word(
+            surface=test_text,
+            pronunciation=pronunciation,
+            accent_type=1,
+            priority=10,
+            user_dict_path=self.tmp_dir_path / "user_dict.json",
+            compiled_dict_path=self.tmp_dir_path / "user.dic",
+        )
+        after = self.pool.analyze(
+            test_text, get_user_dict_version(), get_loaded_user_dict_path()
+        )
+
+        self.assertNotEqual(before, after)
+        self.assertEqual(
+            after,
+            labels_to_accent_phrase_skeletons(extract_full_context_labels(test_text)),
+        )
+        self.assertEqual(
+            "".join(text for *_, moras in after for text, _, _ in moras),
+            pronunciation,
+        )
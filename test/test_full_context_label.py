@@ -8,6 +8,10 @@ from voicevox_engine.full_context_label import (
     Mora,
     Phoneme,
     Utterance,
+    extract_full_context_label,
+    max_openjtalk_text_length,
+    parse_label_contexts,
+    split_text,
 )
 
 
@@ -144,6 +148,39 @@ class TestPhoneme(TestBasePhonemes):
             self.test_case_hello_hiho,
         )
 
+    def test_contexts(self) -> None:
+        for label, phoneme in zip(self.test_case_hello_hiho, self.phonemes_hello_hiho):
+            contexts = parse_label_contexts(label)
+            self.assertEqual(
+                [
+                    phoneme.phoneme,
+                    phoneme.a2,
+                    phoneme.f1,
+                    phoneme.f2,
+                    phoneme.f3,
+                    phoneme.f5,
+                    phoneme.i3,
+                ],
+                [contexts[key] for key in ["p3", "a2", "f1", "f2", "f3", "f5", "i3"]],
+            )
+            self.assertEqual(phoneme.contexts, contexts)
+
+    def test_set_context(self) -> None:
+        phoneme = deepcopy(self.phonemes_hello_hiho[1])
+        phoneme.set_context("a2", "5")
+        phoneme.set_context("k2", "3")
+        self.assertEqual(phoneme.a2, "5")
+        self.assertEqual(
+            phoneme.label,
+            self.test_case_hello_hiho[1]
+            .replace("/A:-4+1+5", "/A:-4+5+5")
+            .replace("/K:2+2-9", "/K:2+3-9"),
+        )
+
+    def test_invalid_label(self) -> None:
+        with self.assertRaises(ValueError):
+            Phoneme.from_label("sil")
+
 
 class TestMora(TestBasePhonemes):
     def setUp(self) -> None:
@@ -402,3 +439,46 @@ class TestUtterance(TestBasePhonemes):
 
     def test_labels(self):
         self.assertEqual(self.utterance_hello_hiho.labels, self.test_case_hello_hiho)
+
+
+class TestLongText(TestCase):
+    def test_split_text(self):
+        self.assertEqual(split_text("こんにちは。", max_length=10), ["こんにちは。"])
+        self.assertEqual(
+            split_text("こんにちは。ヒホです。元気ですか？", max_length=10),
+            ["こんにちは。", "ヒホです。", "元気ですか？"],
+        )
+        self.assertEqual(
+            split_text("あいう。えお。かきくけこさしすせそ", max_length=7),
+            ["あいう。えお。", "かきくけこさし", "すせそ"],
+        )
+
+    def test_extract_full_context_label(self):
+        text = "こんにちは、ヒホです。" * 300
+        self.assertGreater(len(text), max_openjtalk_text_length)
+
+        utterance = extract_full_context_label(text)
+        self.assertEqual(len(utterance.breath_groups), 600)
+        self.assertEqual(len(utterance.pauses), 601)
+
+        phonemes = utterance.phonemes
+        self.assertEqual(
+            " ".join(phoneme.phoneme for phoneme in phonemes),
+            "sil "
+            + "k o N n i ch i w a pau h i h o d e s U pau " * 299
+            + "k o N n i ch i w a pau h i h o d e s U sil",
+        )
+        # 同じ内容のアクセント句が並んでいても、発声全体での位置が設定される
+        accent_phrase_num = sum(
+            len(breath_group.accent_phrases) for breath_group in utterance.breath_groups
+        )
+        last_breath_group = utterance.breath_groups[-1]
+        for phoneme in last_breath_group.phonemes:
+            self.assertEqual(
+                phoneme.contexts["i5"],
+                str(accent_phrase_num - len(last_breath_group.accent_phrases) + 1),
+            )
+            self.assertEqual(
+                phoneme.contexts["i6"], str(len(last_breath_group.accent_phrases))
+            )
+            self.assertEqual(phoneme.contexts["k2"], str(accent_phrase_num))
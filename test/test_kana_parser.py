@@ -561,6 +561,18 @@ class TestParseKanaException(TestCase):
             err.exception.errcode, ParseKanaErrorCode.INTERROGATION_MARK_NOT_AT_END
         )
 
+        # 解釈できなかった位置から、次のアクセント記号までがエラーの箇所になる
+        with self.assertRaises(ParseKanaError) as err:
+            parse_kana("アイxウエ'オ")
+        self.assertEqual(err.exception.errcode, ParseKanaErrorCode.UNKNOWN_TEXT)
+        self.assertEqual(err.exception.kwargs, {"text": "xウエ"})
+
+    def test_loop_limit(self):
+        parse_kana("ア'" + "ア" * (kana_parser.LOOP_LIMIT - 2))
+        self._assert_error_code(
+            "ア'" + "ア" * kana_parser.LOOP_LIMIT, ParseKanaErrorCode.INFINITE_LOOP
+        )
+
 
 class TestCreateKana(TestCase):
     def test_create_kana_interrogative(self):
@@ -0,0 +1,322 @@
+from itertools import product
+from unittest import TestCase
+from unittest.mock import patch
+
+import numpy as np
+import pyworld as pw
+
+from voicevox_engine import morphing
+from voicevox_engine.metas.Metas import Speaker
+from voicevox_engine.model import SpeakerNotFoundError
+from voicevox_engine.morphing import (
+    MorphingAnalysisPool,
+    MorphingQuality,
+    TargetF0Method,
+    construct_morphing_permission_matrix,
+    create_morphing_parameter,
+    get_morphable_targets,
+    morphing_quality_settings,
+    synthesis_morphing,
+    synthesis_morphing_multi,
+    synthesis_morphing_stream,
+)
+
+
+def _speaker(speaker_uuid: str, style_ids, permitted_synthesis_morphing=None):
+    supported_features = (
+        {"permitted_synthesis_morphing": permitted_synthesis_morphing}
+        if permitted_synthesis_morphing is not None
+        else {}
+    )
+    return Speaker(
+        name=speaker_uuid,
+        speaker_uuid=speaker_uuid,
+        styles=[{"name": str(i), "id": i} for i in style_ids],
+        version="0.0.1",
+        supported_features=supported_features,
+    )
+
+
+class TestMorphingPermissionMatrix(TestCase):
+    def setUp(self):
+        self.speakers = [
+            _speaker("all_1", [0, 1]),
+            _speaker("all_2", [2], "ALL"),
+            _speaker("self_only_1", [3, 4], "SELF_ONLY"),
+            _speaker("self_only_2", [5], "SELF_ONLY"),
+            _speaker("nothing", [6, 7], "NOTHING"),
+        ]
+        self.style_ids = list(range(8))
+
+    def test_permission_matrix(self):
+        permission_matrix = construct_morphing_permission_matrix(self.speakers)
+        self.assertEqual(permission_matrix.style_ids, self.style_ids)
+        # ALL同士は話者が違っても可、SELF_ONLYは同一話者のみ可、NOTHINGは同一話者でも不可
+        permitted_groups = [{0, 1, 2}, {3, 4}, {5}]
+        for base_speaker, target_speaker in product(self.style_ids, repeat=2):
+            with self.subTest(base_speaker=base_speaker, target_speaker=target_speaker):
+                self.assertEqual(
+                    permission_matrix.is_permitted(base_speaker, target_speaker),
+                    any(
+                        base_speaker in group and target_speaker in group
+                        for group in permitted_groups
+                    ),
+                )
+
+    def test_get_morphable_targets(self):
+        permission_matrix = construct_morphing_permission_matrix(self.speakers)
+        morphable_targets = get_morphable_targets(
+            permission_matrix=permission_matrix, base_speakers=[0, 3]
+        )
+        self.assertEqual(
+            [
+                {k: v.is_morphable for k, v in targets.items()}
+                for targets in morphable_targets
+            ],
+            [
+                {
+                    0: True,
+                    1: True,
+                    2: True,
+                    3: False,
+                    4: False,
+                    5: False,
+                    6: False,
+                    7: False,
+                },
+                {
+                    0: False,
+                    1: False,
+                    2: False,
+                    3: True,
+                    4: True,
+                    5: False,
+                    6: False,
+                    7: False,
+                },
+            ],
+        )
+
+    def test_speaker_not_found(self):
+        permission_matrix = construct_morphing_permission_matrix(self.speakers)
+        with self.assertRaises(SpeakerNotFoundError):
+            get_morphable_targets(
+                permission_matrix=permission_matrix, base_speakers=[8]
+            )
+        with self.assertRaises(SpeakerNotFoundError):
+            permission_matrix.is_permitted(0, 8)
+
+
+def _wave(f0: float, fs: int = 8000, seconds: float = 0.3) -> np.ndarray:
+    t = np.arange(int(fs * seconds)) / fs
+    return 0.3 * np.sin(2 * np.pi * f0 * t) + 0.01 * np.random.RandomState(0).randn(
+        len(t)
+    )
+
+
+class TestCreateMorphingParameter(TestCase):
+    def setUp(self):
+        self.fs = 8000
+        self.base_wave = _wave(220.0, self.fs)
+        self.target_wave = _wave(330.0, self.fs)
+
+    def _assert_aperiodicity_close(self, a: np.ndarray, b: np.ndarray):
+        # d4cは内部で乱数を使うので、呼び出しごとに一部のフレームの結果が変わることがある
+        # そのため、ほとんどのフレームが一致していることを確かめる
+        self.assertEqual(a.shape, b.shape)
+        self.assertGreater(np.mean(np.all(a == b, axis=1)), 0.95)
+
+    def _assert_parameter_equal(self, a, b):
+        self.assertEqual((a.fs, a.frame_period), (b.fs, b.frame_period))
+        for name in ["base_f0", "base_spectrogram", "target_spectrogram"]:
+            np.testing.assert_array_equal(getattr(a, name), getattr(b, name))
+        self._assert_aperiodicity_close(a.base_aperiodicity, b.base_aperiodicity)
+
+    def test_harvest(self):
+        morph_param = create_morphing_parameter(
+            self.base_wave, self.target_wave, self.fs
+        )
+
+        base_f0, base_time_axis = pw.harvest(self.base_wave, self.fs, frame_period=1.0)
+        target_f0, target_time_axis = pw.harvest(
+            self.target_wave, self.fs, frame_period=1.0
+        )
+        np.testing.assert_array_equal(morph_param.base_f0, base_f0)
+        self._assert_aperiodicity_close(
+            morph_param.base_aperiodicity,
+            pw.d4c(self.base_wave, base_f0, base_time_axis, self.fs),
+        )
+        np.testing.assert_array_equal(
+            morph_param.target_spectrogram,
+            pw.cheaptrick(self.target_wave, target_f0, target_time_axis, self.fs),
+        )
+
+    def test_target_f0_method(self):
+        harvest_param = create_morphing_parameter(
+            self.base_wave, self.target_wave, self.fs
+        )
+        for method in [TargetF0Method.DIO, TargetF0Method.BASE]:
+            with self.subTest(method=method):
+                morph_param = create_morphing_parameter(
+                    self.base_wave, self.target_wave, self.fs, method
+                )
+                # ベース話者の解析結果は変わらない
+                np.testing.assert_array_equal(
+                    morph_param.base_spectrogram, harvest_param.base_spectrogram
+                )
+                self.assertEqual(
+                    morph_param.target_spectrogram.shape,
+                    harvest_param.target_spectrogram.shape,
+                )
+
+    def test_quality(self):
+        fs = 48000
+        base_wave = _wave(220.0, fs).astype(np.float32)
+        target_wave = _wave(330.0, fs).astype(np.float32)
+        high_param = create_morphing_parameter(base_wave, target_wave, fs)
+        for quality in [MorphingQuality.STANDARD, MorphingQuality.FAST]:
+            with self.subTest(quality=quality):
+                setting = morphing_quality_settings[quality]
+                morph_param = create_morphing_parameter(
+                    base_wave, target_wave, fs, quality=quality
+                )
+                self.assertEqual(morph_param.fs, setting.analysis_sampling_rate or fs)
+                self.assertEqual(morph_param.frame_period, setting.frame_period)
+                self.assertEqual(morph_param.base_spectrogram.dtype, setting.dtype)
+                self.assertEqual(
+                    morph_param.target_spectrogram.shape,
+                    morph_param.base_spectrogram.shape,
+                )
+                self.assertLess(
+                    morph_param.base_spectrogram.nbytes,
+                    high_param.base_spectrogram.nbytes,
+                )
+
+                # 解析したサンプリングレートによらず、指定したサンプリングレートで出力する
+                morph_wave = synthesis_morphing(morph_param, 0.5, output_fs=fs)
+                self.assertEqual(morph_wave.dtype, np.float32)
+                self.assertAlmostEqual(len(morph_wave), len(base_wave), delta=fs * 0.01)
+
+    def test_fit_target_frames(self):
+        # ターゲット話者の音声の長さが違っても、ベース話者のフレーム数に揃える
+        for seconds in [0.2, 0.4]:
+            with self.subTest(seconds=seconds):
+                morph_param = create_morphing_parameter(
+                    self.base_wave, _wave(330.0, self.fs, seconds), self.fs
+                )
+                self.assertEqual(
+                    morph_param.target_spectrogram.shape,
+                    morph_param.base_spectrogram.shape,
+                )
+
+    def test_pool(self):
+        pool = MorphingAnalysisPool(num_processes=2)
+        try:
+            for method in TargetF0Method:
+                with self.subTest(method=method):
+                    with patch.object(morphing, "morphing_analysis_pool", pool):
+                        pooled_param = create_morphing_parameter(
+                            self.base_wave, self.target_wave, self.fs, method
+                        )
+                    self._assert_parameter_equal(
+                        pooled_param,
+                        create_morphing_parameter(
+                            self.base_wave, self.target_wave, self.fs, method
+                        ),
+                    )
+        finally:
+            pool.shutdown()
+
+
+class TestSynthesisMorphingMulti(TestCase):
+    @classmethod
+    def setUpClass(cls):
+        cls.fs = 8000
+        cls.morph_param = create_morphing_parameter(
+            _wave(220.0, cls.fs), _wave(330.0, cls.fs), cls.fs
+        )
+
+    def test_matches_synthesis_morphing(self):
+        morph_rates = [0.0, 0.3, 1.0]
+        morph_waves = list(
+            synthesis_morphing_multi(self.morph_param, morph_rates, output_fs=16000)
+        )
+        self.assertEqual(len(morph_waves), len(morph_rates))
+        for morph_rate, morph_wave in zip(morph_rates, morph_waves):
+            with self.subTest(morph_rate=morph_rate):
+                self.assertEqual(morph_wave.dtype, np.float32)
+                np.testing.assert_array_equal(
+                    morph_wave,
+                    synthesis_morphing(self.morph_param, morph_rate, output_fs=16000),
+                )
+
+    def test_pool(self):
+        pool = MorphingAnalysisPool(num_processes=2)
+        try:
+            with patch.object(morphing, "morphing_analysis_pool", pool):
+                pooled_waves = list(
+                    synthesis_morphing_multi(
+                        self.morph_param, [0.2, 0.8], output_fs=self.fs
+                    )
+                )
+        finally:
+            pool.shutdown()
+        for pooled_wave, morph_wave in zip(
+            pooled_waves,
+            synthesis_morphing_multi(self.morph_param, [0.2, 0.8], output_fs=self.fs),
+        ):
+            np.testing.assert_array_equal(pooled_wave, morph_wave)
+
+    def test_invalid_morph_rate(self):
+        # 音声を取り出す前にエラーになる
+        with self.assertRaises(ValueError):
+            synthesis_morphing_multi(self.morph_param, [0.5, 1.5], output_fs=self.fs)
+
+
+class TestSynthesisMorphingStream(TestCase):
+    @classmethod
+    def setUpClass(cls):
+        cls.fs = 8000
+        cls.morph_param = create_morphing_parameter(
+            _wave(220.0, cls.fs, seconds=1.0), _wave(330.0, cls.fs, seconds=1.0), cls.fs
+        )
+
+    def test_blocks(self):
+        for output_fs in [8000, 16000]:
+            with self.subTest(output_fs=output_fs):
+                blocks = list(
+                    synthesis_morphing_stream(
+                        self.morph_param, 0.5, output_fs, block_seconds=0.25
+                    )
+                )
+                # 1ブロックは250フレーム
+                num_frames = len(self.morph_param.base_f0)
+                self.assertEqual(len(blocks), -(-num_frames // 250))
+                for block in blocks[:-1]:
+                    self.assertEqual(len(block), output_fs // 4)
+                    self.assertEqual(block.dtype, np.float32)
+
+                # つなげると、まとめて合成した場合と同じ長さになる
+                morph_wave = synthesis_morphing(self.morph_param, 0.5, output_fs)
+                self.assertEqual(len(np.concatenate(blocks)), len(morph_wave))
+
+    def test_length(self):
+        # 1フレームのサンプル数が整数にならないサンプリングレートでも、まとめて合成した場合と同じ長さになる
+        for quality in MorphingQuality:
+            morph_param = create_morphing_parameter(
+                _wave(220.0, self.fs, seconds=1.0),
+                _wave(330.0, self.fs, seconds=1.0),
+                self.fs,
+                quality=quality,
+            )
+            for output_fs in [22050, 44100]:
+                with self.subTest(quality=quality, output_fs=output_fs):
+                    blocks = synthesis_morphing_stream(
+                        morph_param, 0.5, output_fs, block_seconds=0.1
+                    )
+                    morph_wave = synthesis_morphing(morph_param, 0.5, output_fs)
+                    self.assertEqual(len(np.concatenate(list(blocks))), len(morph_wave))
+
+    def test_invalid_morph_rate(self):
+        with self.assertRaises(ValueError):
+            next(synthesis_morphing_stream(self.morph_param, -0.1, self.fs))
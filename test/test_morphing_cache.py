@@ -0,0 +1,172 @@
+import threading
+import time
+from pathlib import Path
+from tempfile import TemporaryDirectory
+from unittest import TestCase
+from unittest.mock import Mock
+
+import numpy as np
+
+from voicevox_engine.model import AudioQuery
+from voicevox_engine.morphing import MorphingParameter
+from voicevox_engine.morphing_cache import (
+    MorphingParameterCache,
+    morphing_parameter_key,
+    morphing_parameter_nbytes,
+)
+
+
+def _query(**kwargs) -> AudioQuery:
+    return AudioQuery(
+        **{
+            "accent_phrases": [],
+            "speedScale": 1.0,
+            "pitchScale": 0.0,
+            "intonationScale": 1.0,
+            "volumeScale": 1.0,
+            "prePhonemeLength": 0.1,
+            "postPhonemeLength": 0.1,
+            "outputSamplingRate": 24000,
+            "outputStereo": False,
+            "kana": "",
+            **kwargs,
+        }
+    )
+
+
+def _morph_param(length: int = 10, value: float = 0.0) -> MorphingParameter:
+    return MorphingParameter(
+        fs=24000,
+        frame_period=1.0,
+        base_f0=np.full(length, value),
+        base_aperiodicity=np.full((length, 4), value),
+        base_spectrogram=np.full((length, 4), value),
+        target_spectrogram=np.full((length, 4), value),
+    )
+
+
+class TestMorphingParameterKey(TestCase):
+    def test_key(self):
+        key = morphing_parameter_key("0.0.0", _query(), 0, 1)
+        # 出力形式は生成されるパラメータに影響しない
+        self.assertEqual(
+            morphing_parameter_key(
+                "0.0.0",
+                _query(outputSamplingRate=48000, outputStereo=True, kana="テスト"),
+                0,
+                1,
+            ),
+            key,
+        )
+        self.assertNotEqual(
+            morphing_parameter_key("0.0.0", _query(speedScale=1.5), 0, 1), key
+        )
+        self.assertNotEqual(morphing_parameter_key("0.0.0", _query(), 1, 0), key)
+        self.assertNotEqual(morphing_parameter_key("0.0.1", _query(), 0, 1), key)
+
+
+class TestMorphingParameterCache(TestCase):
+    def test_hit(self):
+        cache = MorphingParameterCache()
+        create = Mock(return_value=_morph_param())
+        self.assertIs(cache.get_or_create("a", create), create.return_value)
+        self.assertIs(cache.get_or_create("a", create), create.return_value)
+        self.assertEqual(create.call_count, 1)
+
+        info = cache.info()
+        self.assertEqual((info.hits, info.misses, info.size), (1, 1, 1))
+        self.assertEqual(info.memory_bytes, morphing_parameter_nbytes(_morph_param()))
+
+        cache.clear()
+        cache.get_or_create("a", create)
+        self.assertEqual(create.call_count, 2)
+        self.assertEqual(cache.info().misses, 1)
+
+    def test_concurrent_miss(self):
+        cache = MorphingParameterCache()
+        started = threading.Event()
+        release = threading.Event()
+
+        def create():
+            started.set()
+            release.wait(timeout=10)
+            return _morph_param()
+
+        create_mock = Mock(side_effect=create)
+        results = []
+        threads = [
+            threading.Thread(
+                target=lambda: results.append(cache.get_or_create("a", create_mock))
+            )
+            for _ in range(2)
+        ]
+        threads[0].start()
+        self.assertTrue(started.wait(timeout=10))
+        # 1つ目のスレッドが作成している最中に、同じキーで呼ぶ
+        threads[1].start()
+        # 2つ目のスレッドが作成の完了を待ち始めてから、作成を終わらせる
+        while cache.info().hits == 0:
+            time.sleep(0.01)
+        release.set()
+        for thread in threads:
+            thread.join(timeout=10)
+
+        # 作成は1回だけで、両方のスレッドが同じパラメータを受け取る
+        self.assertEqual(create_mock.call_count, 1)
+        self.assertEqual(len(results), 2)
+        self.assertIs(results[0], results[1])
+        info = cache.info()
+        self.assertEqual((info.hits, info.misses), (1, 1))
+
+    def test_concurrent_miss_error(self):
+        cache = MorphingParameterCache()
+        with self.assertRaises(ValueError):
+            cache.get_or_create("a", Mock(side_effect=ValueError))
+        # 作成に失敗した場合は、次の呼び出しで作り直す
+        create = Mock(return_value=_morph_param())
+        self.assertIs(cache.get_or_create("a", create), create.return_value)
+
+    def test_evict_by_bytes(self):
+        size = morphing_parameter_nbytes(_morph_param())
+        cache = MorphingParameterCache(max_bytes=size * 2)
+        cache.get_or_create("a", _morph_param)
+        cache.get_or_create("b", _morph_param)
+        cache.get_or_create("a", _morph_param)
+        # 長い音声のパラメータは複数件分の大きさになる
+        cache.get_or_create("c", lambda: _morph_param(length=15))
+
+        info = cache.info()
+        self.assertEqual((info.size, info.evictions), (1, 2))
+        self.assertLessEqual(info.memory_bytes, info.max_memory_bytes)
+
+        # 上限より大きいパラメータはキャッシュしない
+        cache.get_or_create("d", lambda: _morph_param(length=30))
+        self.assertEqual(cache.info().size, 1)
+
+    def test_spill(self):
+        with TemporaryDirectory() as tmp_dir:
+            spill_dir = Path(tmp_dir)
+            size = morphing_parameter_nbytes(_morph_param())
+            cache = MorphingParameterCache(
+                max_bytes=size, spill_dir=spill_dir, max_disk_bytes=size
+            )
+            cache.get_or_create("a", lambda: _morph_param(value=1.0))
+            cache.get_or_create("b", lambda: _morph_param(value=2.0))
+            self.assertEqual(cache.info().disk_size, 1)
+
+            # ディスクから読み込んだパラメータは保存したものと同じ
+            create = Mock()
+            morph_param = cache.get_or_create("a", create)
+            create.assert_not_called()
+            self.assertEqual(morph_param.fs, 24000)
+            self.assertIsInstance(morph_param.fs, int)
+            np.testing.assert_array_equal(morph_param.base_spectrogram, 1.0)
+            self.assertEqual(cache.info().disk_hits, 1)
+
+            # ディスクの上限を超えた分は削除される
+            cache.get_or_create("c", _morph_param)
+            self.assertEqual(cache.info().disk_size, 1)
+            self.assertEqual(len(list(spill_dir.glob("*.npz"))), 1)
+
+            cache.clear()
+            self.assertEqual(list(spill_dir.glob("*.npz")), [])
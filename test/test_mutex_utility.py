@@ -0,0 +1,73 @@
+import threading
+from unittest import TestCase
+
+from voicevox_engine.utility import ReadWriteLock
+
+
+class TestReadWriteLock(TestCase):
+    def test_concurrent_readers(self):
+        lock = ReadWriteLock()
+        barrier = threading.Barrier(2, timeout=5)
+
+        def read():
+            with lock.read_lock():
+                # 2つのスレッドが同時に読み込みロックを持てなければタイムアウトする
+                barrier.wait()
+
+        threads = [threading.Thread(target=read) for _ in range(2)]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+        self.assertFalse(barrier.broken)
+
+    def test_writer_excludes_readers(self):
+        lock = ReadWriteLock()
+        events = []
+        writer_started = threading.Event()
+        reader_done = threading.Event()
+
+        def read():
+            writer_started.wait()
+            with lock.read_lock():
+                events.append("read")
+            reader_done.set()
+
+        reader = threading.Thread(target=read)
+        reader.start()
+        with lock.write_lock():
+            writer_started.set()
+            # 書き込み中は読み込みが始まらない
+            self.assertFalse(reader_done.wait(timeout=0.2))
+            events.append("write")
+        reader.join()
+        self.assertEqual(events, ["write", "read"])
+
+    def test_waiting_writer_blocks_new_readers(self):
+        lock = ReadWriteLock()
+        events = []
+        writer_waiting = threading.Event()
+
+        def write():
+            writer_waiting.set()
+            with lock.write_lock():
+                events.append("write")
+
+        def read():
+            with lock.read_lock():
+                events.append("read")
+
+        with lock.read_lock():
+            writer = threading.Thread(target=write)
+            writer.start()
+            writer_waiting.wait()
+            # 書き込みが待っている間に始めた読み込みは、書き込みの後に行われる
+            while lock._waiting_writers == 0:
+                writer.join(timeout=0.01)
+            reader = threading.Thread(target=read)
+            reader.start()
+            reader.join(timeout=0.2)
+            self.assertEqual(events, [])
+        writer.join()
+        reader.join()
+        self.assertEqual(events, ["write", "read"])
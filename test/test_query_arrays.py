@@ -0,0 +1,136 @@
+from unittest import TestCase
+
+import numpy
+
+from voicevox_engine.model import AccentPhrase, AudioQuery, Mora
+from voicevox_engine.synthesis_engine.query_arrays import (
+    QueryArrays,
+    apply_intonation_scale,
+    apply_pitch_scale,
+    apply_speed_scale,
+)
+from voicevox_engine.synthesis_engine.synthesis_engine import (
+    to_accent_id_list,
+    to_phoneme_id_list,
+)
+
+
+def _mora(text, consonant, vowel, pitch, consonant_length=0.1, vowel_length=0.2):
+    return Mora(
+        text=text,
+        consonant=consonant,
+        consonant_length=consonant_length if consonant is not None else None,
+        vowel=vowel,
+        vowel_length=vowel_length,
+        pitch=pitch,
+    )
+
+
+class TestQueryArrays(TestCase):
+    def setUp(self):
+        self.accent_phrases = [
+            AccentPhrase(
+                moras=[
+                    _mora("コ", "k", "o", 5.0),
+                    _mora("ン", None, "N", 5.5),
+                    _mora("ニ", "n", "i", 5.8),
+                ],
+                accent=1,
+                pause_mora=_mora("、", None, "pau", 0.0, vowel_length=0.3),
+            ),
+            AccentPhrase(
+                moras=[
+                    _mora("デ", "d", "e", 6.0),
+                    _mora("ス", "s", "U", 0.0),
+                ],
+                accent=2,
+                pause_mora=None,
+                is_interrogative=True,
+            ),
+        ]
+        self.query = AudioQuery(
+            accent_phrases=self.accent_phrases,
+            speedScale=1.0,
+            pitchScale=0.0,
+            intonationScale=1.0,
+            volumeScale=1.0,
+            prePhonemeLength=0.4,
+            postPhonemeLength=0.5,
+            outputSamplingRate=24000,
+            outputStereo=False,
+        )
+
+    def test_from_query(self):
+        query_arrays = QueryArrays.from_query(self.query)
+
+        numpy.testing.assert_array_equal(
+            query_arrays.phoneme_ids,
+            to_phoneme_id_list("pau k o N n i pau d e s U pau".split()),
+        )
+        numpy.testing.assert_array_equal(
+            query_arrays.accent_ids,
+            to_accent_id_list("# _ ] _ _ _ # _ [ _ ? #".split()),
+        )
+        numpy.testing.assert_allclose(
+            query_arrays.durations,
+            [0.4, 0.1, 0.2, 0.2, 0.1, 0.2, 0.3, 0.1, 0.2, 0.1, 0.2, 0.5],
+        )
+        numpy.testing.assert_allclose(
+            query_arrays.pitches,
+            [0.0, 5.0, 5.0, 5.5, 5.8, 5.8, 0.0, 6.0, 6.0, 0.0, 0.0, 0.0],
+        )
+        numpy.testing.assert_array_equal(
+            query_arrays.consonant_indexes, [1, -1, 4, -1, 7, 9]
+        )
+        numpy.testing.assert_array_equal(
+            query_arrays.vowel_indexes, [2, 3, 5, 6, 8, 10]
+        )
+
+    def test_mora_values(self):
+        query_arrays = QueryArrays.from_accent_phrases(self.accent_phrases)
+        values = numpy.arange(12, dtype=numpy.float32)
+
+        self.assertEqual(
+            query_arrays.mora_consonant_values(values),
+            [1.0, None, 4.0, None, 7.0, 9.0],
+        )
+        self.assertEqual(
+            query_arrays.mora_vowel_values(values), [2.0, 3.0, 5.0, 6.0, 8.0, 10.0]
+        )
+        # 無声モーラ(pau, U)の音高は0になる
+        self.assertEqual(
+            query_arrays.mora_pitches(values), [2.0, 3.0, 5.0, 0.0, 8.0, 0.0]
+        )
+
+    def test_unknown_phoneme(self):
+        self.accent_phrases[0].moras[0].vowel = "xx"
+        with self.assertRaises(ValueError):
+            QueryArrays.from_accent_phrases(self.accent_phrases)
+
+
+class TestScale(TestCase):
+    def test_apply_speed_scale(self):
+        durations = numpy.array([0.2, 0.4], dtype=numpy.float32)
+        actual = apply_speed_scale(durations, 2.0)
+        numpy.testing.assert_allclose(actual, [0.1, 0.2])
+        self.assertEqual(actual.dtype, numpy.float32)
+        numpy.testing.assert_allclose(durations, [0.2, 0.4])
+
+    def test_apply_pitch_scale(self):
+        pitches = numpy.array([0.0, 5.0], dtype=numpy.float32)
+        actual = apply_pitch_scale(pitches, 1.0)
+        numpy.testing.assert_allclose(actual, [0.0, 10.0])
+        self.assertEqual(actual.dtype, numpy.float32)
+
+    def test_apply_intonation_scale(self):
+        pitches = numpy.array([0.0, 4.0, 6.0, 0.0], dtype=numpy.float32)
+        actual = apply_intonation_scale(pitches, 2.0)
+        numpy.testing.assert_allclose(actual, [0.0, 3.0, 7.0, 0.0])
+        self.assertEqual(actual.dtype, numpy.float32)
+        numpy.testing.assert_allclose(pitches, [0.0, 4.0, 6.0, 0.0])
+
+        # 有声音素が無い場合はそのまま
+        unvoiced = numpy.zeros(3, dtype=numpy.float32)
+        numpy.testing.assert_array_equal(
+            apply_intonation_scale(unvoiced, 2.0), unvoiced
+        )
@@ -0,0 +1,22 @@
+from io import StringIO
+from unittest import TestCase
+
+from voicevox_engine.utility import StartupProfiler
+
+
+class TestStartupProfiler(TestCase):
+    def test_report(self):
+        profiler = StartupProfiler()
+        profiler.record("core load", 0.5)
+        profiler.record("app init", 0.25)
+        profiler.note("import (cpu time)", 2.0)
+        self.assertEqual(profiler.timings, [("core load", 0.5), ("app init", 0.25)])
+
+        output = StringIO()
+        profiler.report(file=output)
+        lines = output.getvalue().splitlines()
+        # totalにはCPU時間を含めない
+        self.assertEqual(lines[3].split(), ["total", "750.0", "ms"])
+        self.assertEqual(
+            lines[4].split()[-6:], ["2000.0", "ms", "(not", "included", "in", "total)"]
+        )
@@ -1,4 +1,5 @@
 import filecmp
+import hashlib
 import json
 import os
 import shutil
@@ -6,8 +7,20 @@ from pathlib import Path
 from unittest import TestCase
 
 from voicevox_engine.metas.Metas import SpeakerStyle, StyleInfo
-from voicevox_engine.model import ModelConfig, Speaker, SpeakerInfo, SVModelInfo
-from voicevox_engine.sv_model import get_all_sv_models, register_sv_model
+from voicevox_engine.model import (
+    ModelConfig,
+    Speaker,
+    SpeakerInfo,
+    SVModelInfo,
+    SVModelUploadInfo,
+)
+from voicevox_engine.sv_model import (
+    SVModelFileWriter,
+    SVModelUploadError,
+    commit_sv_model,
+    get_all_sv_models,
+    register_sv_model,
+)
 
 
 class TestSVModel(TestCase):
@@ -120,3 +133,114 @@ class TestSVModel(TestCase):
             libraries = json.load(f)
             self.assertIn("official", libraries.keys())
             self.assertIn(sv_model_uuid, libraries.keys())
+
+    def test_upload_and_commit_sv_model(self):
+        # clean up directories
+        for path in ["./test/model", "./test/speaker_info", "./test/sv_model_upload"]:
+            if os.path.exists(path):
+                shutil.rmtree(path)
+
+        os.makedirs("./test/model")
+        with open("./test/model/libraries.json", "w") as f:
+            json.dump({"official": True}, f)
+
+        stored_dir = Path("test")
+        sv_model_uuid = "b351e601-3e98-40d4-ac1d-19529d932c22"
+        speaker_uuid = "7ffcb7ce-00ec-4bdc-82cd-45a8889e43ff"
+        expected_model_dir = stored_dir / "testdata" / "model" / sv_model_uuid
+        expected_speaker_dir = stored_dir / "testdata" / "speaker_info" / speaker_uuid
+
+        files = {
+            f"model/{name}": expected_model_dir / name
+            for name in [
+                "variance_model.onnx",
+                "embedder_model.onnx",
+                "decoder_model.onnx",
+            ]
+        }
+        files.update(
+            {
+                f"speaker_info/{speaker_uuid}/{name}": expected_speaker_dir / name
+                for name in ["portrait.png", "icons/0.png", "voice_samples/0_001.wav"]
+            }
+        )
+        for relative_path, src in files.items():
+            data = src.read_bytes()
+            with SVModelFileWriter(
+                sv_model_uuid,
+                relative_path,
+                hashlib.sha256(data).hexdigest(),
+                stored_dir=stored_dir,
+            ) as writer:
+                # 少しずつ書き込む
+                for i in range(0, len(data), 4):
+                    writer.write(data[i : i + 4])
+
+        sv_model = SVModelUploadInfo(
+            uuid=sv_model_uuid,
+            metas=[
+                Speaker(
+                    name="小春音アミ",
+                    speaker_uuid=speaker_uuid,
+                    styles=[SpeakerStyle(name="ノーマル", id=0)],
+                    version="0.0.1",
+                ),
+            ],
+            model_config=ModelConfig(length_regulator="gaussian", start_id=1),
+            policies={speaker_uuid: "dummy policy"},
+        )
+        commit_sv_model(sv_model, stored_dir=stored_dir)
+
+        for relative_path, src in files.items():
+            dst = stored_dir / relative_path.replace(
+                "model/", f"model/{sv_model_uuid}/"
+            )
+            self.assertTrue(filecmp.cmp(dst, src, shallow=False))
+        self.assertEqual(
+            (stored_dir / "speaker_info" / speaker_uuid / "policy.md").read_text(
+                encoding="utf-8"
+            ),
+            "dummy policy",
+        )
+        self.assertFalse((stored_dir / "sv_model_upload" / sv_model_uuid).exists())
+        with open("./test/model/libraries.json", "r") as f:
+            self.assertIn(sv_model_uuid, json.load(f).keys())
+
+    def test_upload_sv_model_file_error(self):
+        stored_dir = Path("test")
+        sv_model_uuid = "b351e601-3e98-40d4-ac1d-19529d932c22"
+
+        # チェックサムが一致しない
+        with self.assertRaises(SVModelUploadError):
+            with SVModelFileWriter(
+                sv_model_uuid,
+                "model/decoder_model.onnx",
+                hashlib.sha256(b"expected").hexdigest(),
+                stored_dir=stored_dir,
+            ) as writer:
+                writer.write(b"actual")
+        upload_dir = stored_dir / "sv_model_upload" / sv_model_uuid
+        self.assertFalse((upload_dir / "model" / "decoder_model.onnx").exists())
+        self.assertFalse((upload_dir / "model" / "decoder_model.onnx.part").exists())
+
+        # アップロード用ディレクトリの外には書き込めない
+        for uuid, relative_path in [
+            (sv_model_uuid, "model/../../model/libraries.json"),
+            (sv_model_uuid, "speaker_info/../portrait.png"),
+            ("..", "model/decoder_model.onnx"),
+        ]:
+            with self.subTest(uuid=uuid, relative_path=relative_path):
+                with self.assertRaises(SVModelUploadError):
+                    SVModelFileWriter(uuid, relative_path, stored_dir=stored_dir)
+
+        # ファイルが揃っていない
+        with self.assertRaises(SVModelUploadError):
+            commit_sv_model(
+                SVModelUploadInfo(
+                    uuid=sv_model_uuid,
+                    metas=[],
+                    model_config=ModelConfig(length_regulator="gaussian", start_id=1),
+                    policies={},
+                ),
+                stored_dir=stored_dir,
+            )
@@ -513,12 +513,8 @@ class TestSynthesisEngine(TestCase):
         if audio_query.outputSamplingRate != 48000:
             return
 
-        if audio_query.outputStereo:
-            numpy.testing.assert_almost_equal(
-                result, numpy.array([true_result, true_result]).T, decimal=3
-            )
-        else:
-            numpy.testing.assert_almost_equal(result, true_result, decimal=3)
+        # ステレオ化は書き込み時に行うので、outputStereoによらずモノラルの波形が返る
+        numpy.testing.assert_almost_equal(result, true_result, decimal=3)
 
     def test_synthesis(self):
         audio_query = AudioQuery(
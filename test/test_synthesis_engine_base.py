@@ -3,9 +3,15 @@ from unittest import TestCase
 from unittest.mock import Mock
 
 import numpy
+import pyopenjtalk
 
+from voicevox_engine.full_context_label import extract_full_context_label
 from voicevox_engine.model import AccentPhrase, AudioQuery, Mora
 from voicevox_engine.synthesis_engine import SynthesisEngine
+from voicevox_engine.synthesis_engine.synthesis_engine_base import (
+    labels_to_accent_phrase_skeletons,
+    mora_to_text,
+)
 
 
 def variance_mock(
@@ -390,3 +396,73 @@ class TestSynthesisEngineBase(TestCase):
             expected=expected,
             enable_interrogative_upspeak=False,
         )
+
+    def test_synthesis_does_not_modify_query(self):
+        """疑問文モーラ処理を行っても元のqueryは変更されず、変更のないアクセント句は共有される"""
+        accent_phrases = self.synthesis_engine.create_accent_phrases("これはありますか？", 1)
+        query = create_mock_query(accent_phrases=accent_phrases)
+        original = query.copy(deep=True)
+
+        self.synthesis_engine.synthesis(query, 0, enable_interrogative_upspeak=True)
+        actual = self.synthesis_engine._synthesis_impl.call_args[0][0]
+
+        self.assertEqual(query, original)
+        self.assertIsNot(actual, query)
+        self.assertIs(actual.accent_phrases[0], query.accent_phrases[0])
+        self.assertIsNot(actual.accent_phrases[-1], query.accent_phrases[-1])
+        self.assertEqual(
+            len(actual.accent_phrases[-1].moras),
+            len(query.accent_phrases[-1].moras) + 1,
+        )
+
+        self.synthesis_engine.synthesis(query, 0, enable_interrogative_upspeak=False)
+        self.assertIs(self.synthesis_engine._synthesis_impl.call_args[0][0], query)
+
+
+def utterance_to_accent_phrase_skeletons(text: str):
+    """
+    Utteranceを組み立ててからアクセント句を作成する、以前の方法
+    """
+    utterance = extract_full_context_label(text)
+    return tuple(
+        (
+            accent_phrase.accent,
+            accent_phrase.is_interrogative,
+            (
+                i_accent_phrase == len(breath_group.accent_phrases) - 1
+                and i_breath_group != len(utterance.breath_groups) - 1
+            ),
+            tuple(
+                (
+                    mora_to_text("".join([p.phoneme for p in mora.phonemes])),
+                    mora.consonant.phoneme if mora.consonant is not None else None,
+                    mora.vowel.phoneme,
+                )
+                for mora in accent_phrase.moras
+            ),
+        )
+        for i_breath_group, breath_group in enumerate(utterance.breath_groups)
+        for i_accent_phrase, accent_phrase in enumerate(breath_group.accent_phrases)
+    )
+
+
+class TestLabelsToAccentPhraseSkeletons(TestCase):
+    def test_same_as_utterance(self):
+        texts = [
+            "これはありますか？",
+            "こんにちは、ヒホです。",
+            "す？",
+            "、",
+            "えっ、本当ですか？それはちょっと困りますね……。",
+            "2023年4月1日に、バージョン0.1.0をリリースしました。",
+            # アクセント句内のモーラが49を超える場合
+            "ア" * 60 + "、" + "ン" * 55 + "です。",
+        ]
+        for text in texts:
+            with self.subTest(text=text):
+                self.assertEqual(
+                    labels_to_accent_phrase_skeletons(
+                        pyopenjtalk.extract_fullcontext(text)
+                    ),
+                    utterance_to_accent_phrase_skeletons(text),
+                )
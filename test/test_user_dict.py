@@ -1,22 +1,41 @@
 import json
 from copy import deepcopy
+from io import StringIO
 from pathlib import Path
 from tempfile import TemporaryDirectory
 from typing import Dict
 from unittest import TestCase
+from unittest.mock import patch
 
 from fastapi import HTTPException
-from pyopenjtalk import g2p, unset_user_dict
+from pyopenjtalk import create_user_dict, g2p, unset_user_dict
 
-from voicevox_engine.model import UserDictWord, WordTypes
+from voicevox_engine.model import (
+    UserDictImportFormat,
+    UserDictOperation,
+    UserDictOperationType,
+    UserDictWord,
+    WordTypes,
+)
 from voicevox_engine.part_of_speech_data import MAX_PRIORITY, part_of_speech_data
 from voicevox_engine.user_dict import (
+    UserDictCompileWorker,
+    apply_user_dict_operations,
     apply_word,
+    cost2priority,
+    costs2priorities,
     create_word,
     delete_word,
+    get_loaded_user_dict_path,
+    get_user_dict_version,
     import_user_dict,
+    import_user_dict_stream,
+    priorities2costs,
+    priority2cost,
     read_dict,
+    request_update_dict,
     rewrite_word,
+    set_compile_worker,
     update_dict,
 )
 
@@ -229,6 +248,34 @@ class TestUserDict(TestCase):
                     i,
                 )
 
+    def test_cost_priority_conversion(self):
+        context_ids = []
+        priorities = []
+        for pos_detail in part_of_speech_data.values():
+            for priority in range(MAX_PRIORITY + 1):
+                context_ids.append(pos_detail.context_id)
+                priorities.append(priority)
+                cost = pos_detail.cost_candidates[MAX_PRIORITY - priority]
+                self.assertEqual(priority2cost(pos_detail.context_id, priority), cost)
+                # 最も近いcost_candidatesのpriorityに変換される
+                self.assertEqual(cost2priority(pos_detail.context_id, cost), priority)
+                self.assertEqual(
+                    cost2priority(pos_detail.context_id, cost + 1), priority
+                )
+
+        costs = priorities2costs(context_ids, priorities)
+        self.assertEqual(
+            costs.tolist(),
+            [priority2cost(c, p) for c, p in zip(context_ids, priorities)],
+        )
+        self.assertEqual(costs2priorities(context_ids, costs).tolist(), priorities)
+        self.assertEqual(costs2priorities([], []).tolist(), [])
+
+        with self.assertRaises(HTTPException):
+            priority2cost(-1, 5)
+        with self.assertRaises(HTTPException):
+            costs2priorities([context_ids[0], 100000], [0, 0])
+
     def test_import_dict(self):
         user_dict_path = self.tmp_dir_path / "test_import_dict.json"
         compiled_dict_path = self.tmp_dir_path / "test_import_dict.dic"
@@ -346,3 +393,340 @@ class TestUserDict(TestCase):
         )
 
         self.assertEqual(g2p(text=test_text, kana=True), success_pronunciation)
+
+    def test_apply_user_dict_operations(self):
+        user_dict_path = self.tmp_dir_path / "test_apply_user_dict_operations.json"
+        compiled_dict_path = self.tmp_dir_path / "test_apply_user_dict_operations.dic"
+        user_dict_path.write_text(
+            json.dumps(valid_dict_dict_json, ensure_ascii=False), encoding="utf-8"
+        )
+        operations = [
+            UserDictOperation(
+                type=UserDictOperationType.ADD,
+                surface=f"test{i}",
+                pronunciation="テスト",
+                accent_type=1,
+            )
+            for i in range(10)
+        ] + [
+            UserDictOperation(
+                type=UserDictOperationType.UPDATE,
+                word_uuid="aab7dda2-0d97-43c8-8cb7-3f440dab9b4e",
+                surface="test2",
+                pronunciation="テストツー",
+                accent_type=2,
+            ),
+        ]
+
+        # 操作の件数によらず、コンパイルは1回だけ行われる
+        with patch(
+            "voicevox_engine.user_dict.update_dict", wraps=update_dict
+        ) as mock_update_dict:
+            results = apply_user_dict_operations(
+                operations,
+                user_dict_path=user_dict_path,
+                compiled_dict_path=compiled_dict_path,
+            )
+        self.assertEqual(mock_update_dict.call_count, 1)
+        self.assertTrue(all(result.success for result in results))
+
+        user_dict = read_dict(user_dict_path=user_dict_path)
+        self.assertEqual(len(user_dict), 11)
+        for i, result in enumerate(results[:10]):
+            self.assertEqual(
+                user_dict[result.word_uuid],
+                create_word(surface=f"test{i}", pronunciation="テスト", accent_type=1),
+            )
+        self.assertEqual(
+            user_dict["aab7dda2-0d97-43c8-8cb7-3f440dab9b4e"].surface, "ｔｅｓｔ２"
+        )
+
+        results = apply_user_dict_operations(
+            [
+                UserDictOperation(
+                    type=UserDictOperationType.DELETE, word_uuid=result.word_uuid
+                )
+                for result in results[:10]
+            ],
+            user_dict_path=user_dict_path,
+            compiled_dict_path=compiled_dict_path,
+        )
+        self.assertTrue(all(result.success for result in results))
+        self.assertEqual(
+            list(read_dict(user_dict_path=user_dict_path).keys()),
+            ["aab7dda2-0d97-43c8-8cb7-3f440dab9b4e"],
+        )
+
+    def test_apply_user_dict_operations_failure(self):
+        user_dict_path = self.tmp_dir_path / "test_apply_user_dict_operations.json"
+        compiled_dict_path = self.tmp_dir_path / "test_apply_user_dict_operations.dic"
+        user_dict_json = json.dumps(valid_dict_dict_json, ensure_ascii=False)
+        user_dict_path.write_text(user_dict_json, encoding="utf-8")
+
+        results = apply_user_dict_operations(
+            [
+                UserDictOperation(
+                    type=UserDictOperationType.ADD,
+                    surface="test",
+                    pronunciation="テスト",
+                    accent_type=1,
+                ),
+                UserDictOperation(
+                    type=UserDictOperationType.DELETE,
+                    word_uuid="c2be4dc5-d07d-4767-8be1-04a1bb3f05a9",
+                ),
+                UserDictOperation(
+                    type=UserDictOperationType.ADD,
+                    surface="test",
+                    pronunciation="てすと",
+                    accent_type=1,
+                ),
+                UserDictOperation(
+                    type=UserDictOperationType.UPDATE,
+                    word_uuid="aab7dda2-0d97-43c8-8cb7-3f440dab9b4e",
+                ),
+            ],
+            user_dict_path=user_dict_path,
+            compiled_dict_path=compiled_dict_path,
+        )
+        self.assertEqual(
+            [result.success for result in results], [True, False, False, False]
+        )
+        self.assertTrue(all(result.error is not None for result in results[1:]))
+        self.assertIsNone(results[0].word_uuid)
+
+        # 1件でも失敗した場合は辞書を変更しない
+        self.assertEqual(user_dict_path.read_text(encoding="utf-8"), user_dict_json)
+        self.assertFalse(compiled_dict_path.exists())
+
+        # コンパイルに失敗した場合はjsonを元に戻す
+        with patch(
+            "voicevox_engine.user_dict.update_dict", side_effect=RuntimeError
+        ), self.assertRaises(RuntimeError):
+            apply_user_dict_operations(
+                [
+                    UserDictOperation(
+                        type=UserDictOperationType.DELETE,
+                        word_uuid="aab7dda2-0d97-43c8-8cb7-3f440dab9b4e",
+                    )
+                ],
+                user_dict_path=user_dict_path,
+                compiled_dict_path=compiled_dict_path,
+            )
+        self.assertEqual(user_dict_path.read_text(encoding="utf-8"), user_dict_json)
+
+    def test_update_dict_cached_file(self):
+        user_dict_path = self.tmp_dir_path / "test_cached.json"
+        compiled_dict_path = self.tmp_dir_path / "test_cached.dic"
+        with patch(
+            "voicevox_engine.user_dict.pyopenjtalk.create_user_dict",
+            wraps=create_user_dict,
+        ) as mock_create_user_dict:
+            update_dict(
+                user_dict_path=user_dict_path, compiled_dict_path=compiled_dict_path
+            )
+            first_version = get_user_dict_version()
+            first_path = get_loaded_user_dict_path()
+            self.assertTrue(first_path.is_file())
+            self.assertEqual(mock_create_user_dict.call_count, 1)
+
+            # 内容が変わっていなければコンパイルせずに同じファイルを読み込む
+            update_dict(
+                user_dict_path=user_dict_path, compiled_dict_path=compiled_dict_path
+            )
+            self.assertEqual(mock_create_user_dict.call_count, 1)
+            self.assertEqual(get_loaded_user_dict_path(), first_path)
+            self.assertEqual(get_user_dict_version(), first_version + 1)
+
+            # 内容が変わればコンパイルし直し、古いファイルは削除される
+            user_dict_path.write_text(
+                json.dumps(valid_dict_dict_json, ensure_ascii=False), encoding="utf-8"
+            )
+            update_dict(
+                user_dict_path=user_dict_path, compiled_dict_path=compiled_dict_path
+            )
+            self.assertEqual(mock_create_user_dict.call_count, 2)
+            second_path = get_loaded_user_dict_path()
+            self.assertNotEqual(second_path, first_path)
+            self.assertTrue(second_path.is_file())
+            self.assertFalse(first_path.exists())
+            self.assertEqual(get_user_dict_version(), first_version + 2)
+
+    def test_compile_worker_debounce(self):
+        user_dict_path = self.tmp_dir_path / "test_worker.json"
+        compiled_dict_path = self.tmp_dir_path / "test_worker.dic"
+        worker = UserDictCompileWorker(
+            debounce_seconds=0.2,
+            user_dict_path=user_dict_path,
+            compiled_dict_path=compiled_dict_path,
+        )
+        set_compile_worker(worker)
+        try:
+            with patch("voicevox_engine.user_dict.update_dict") as mock_update_dict:
+                for _ in range(10):
+                    request_update_dict(
+                        user_dict_path=user_dict_path,
+                        compiled_dict_path=compiled_dict_path,
+                    )
+                self.assertTrue(worker.pending)
+                self.assertTrue(worker.wait(timeout=10))
+                self.assertFalse(worker.pending)
+                # 続けて要求されたコンパイルは1回にまとめられる
+                self.assertEqual(mock_update_dict.call_count, 1)
+
+                # 別の辞書を変更した場合はワーカーを使わずその場でコンパイルする
+                request_update_dict(
+                    user_dict_path=self.tmp_dir_path / "other.json",
+                    compiled_dict_path=self.tmp_dir_path / "other.dic",
+                )
+                self.assertEqual(mock_update_dict.call_count, 2)
+                self.assertFalse(worker.pending)
+        finally:
+            set_compile_worker(None)
+            worker.close()
+
+    def test_compile_worker_apply_word(self):
+        user_dict_path = self.tmp_dir_path / "test_worker_apply.json"
+        compiled_dict_path = self.tmp_dir_path / "test_worker_apply.dic"
+        update_dict(
+            user_dict_path=user_dict_path, compiled_dict_path=compiled_dict_path
+        )
+        worker = UserDictCompileWorker(
+            debounce_seconds=0.0,
+            user_dict_path=user_dict_path,
+            compiled_dict_path=compiled_dict_path,
+        )
+        set_compile_worker(worker)
+        try:
+            test_text = "テスト用の文字列"
+            success_pronunciation = "デフォルトノジショデハゼッタイニセイセイサレナイヨミ"
+            apply_word(
+                surface=test_text,
+                pronunciation=success_pronunciation,
+                accent_type=1,
+                priority=10,
+                user_dict_path=user_dict_path,
+                compiled_dict_path=compiled_dict_path,
+            )
+            self.assertTrue(worker.wait(timeout=60))
+            self.assertEqual(g2p(text=test_text, kana=True), success_pronunciation)
+        finally:
+            set_compile_worker(None)
+            worker.close()
+
+    def test_import_user_dict_stream_keeps_concurrent_changes(self):
+        user_dict_path = self.tmp_dir_path / "test_import_stream_concurrent.json"
+        compiled_dict_path = self.tmp_dir_path / "test_import_stream_concurrent.dic"
+        user_dict_path.write_text(
+            json.dumps(valid_dict_dict_json, ensure_ascii=False), encoding="utf-8"
+        )
+        jsonl_text = "\n".join(
+            json.dumps(
+                {"surface": f"test{i}", "pronunciation": "テスト", "accent_type": 1}
+            )
+            for i in range(4)
+        )
+        with patch("voicevox_engine.user_dict.update_dict"):
+            progresses = import_user_dict_stream(
+                StringIO(jsonl_text),
+                UserDictImportFormat.JSONL,
+                chunk_size=2,
+                user_dict_path=user_dict_path,
+                compiled_dict_path=compiled_dict_path,
+            )
+            next(progresses)
+            # インポートの途中で登録した言葉も、インポートの書き込みで失われない
+            word_uuid = apply_word(
+                surface="test",
+                pronunciation="テスト",
+                accent_type=1,
+                user_dict_path=user_dict_path,
+                compiled_dict_path=compiled_dict_path,
+            )
+            list(progresses)
+        user_dict = read_dict(user_dict_path=user_dict_path)
+        self.assertIn(word_uuid, user_dict)
+        self.assertEqual(len(user_dict), 6)
+
+    def test_import_user_dict_stream(self):
+        user_dict_path = self.tmp_dir_path / "test_import_stream.json"
+        compiled_dict_path = self.tmp_dir_path / "test_import_stream.dic"
+        user_dict_path.write_text(
+            json.dumps(valid_dict_dict_json, ensure_ascii=False), encoding="utf-8"
+        )
+        csv_text = (
+            "surface,pronunciation,accent_type,word_type,priority,word_uuid\n"
+            "test1,テストイチ,1,,,\n"
+            "test2,テストニ,1,COMMON_NOUN,8,\n"
+            "test3,てすと,1,,,\n"
+            "test4,テストヨン,1,,,aab7dda2-0d97-43c8-8cb7-3f440dab9b4e\n"
+            "test5,テストゴ,10,,,\n"
+        )
+        with patch("voicevox_engine.user_dict.update_dict") as mock_update_dict:
+            progresses = list(
+                import_user_dict_stream(
+                    StringIO(csv_text, newline=""),
+                    UserDictImportFormat.CSV,
+                    chunk_size=2,
+                    user_dict_path=user_dict_path,
+                    compiled_dict_path=compiled_dict_path,
+                )
+            )
+        # 辞書のコンパイルは最後に1回だけ行う
+        self.assertEqual(mock_update_dict.call_count, 1)
+        self.assertEqual(
+            [(p.processed, p.imported, p.failed, p.done) for p in progresses],
+            [(2, 2, 0, False), (4, 2, 1, False), (5, 2, 2, False), (5, 2, 2, True)],
+        )
+        # 読み込めなかった行は行番号とともに報告する
+        self.assertEqual(
+            [[error.line for error in p.errors] for p in progresses],
+            [[], [4], [6], []],
+        )
+        user_dict = read_dict(user_dict_path=user_dict_path)
+        self.assertEqual(len(user_dict), 3)
+        # overrideしない場合は、登録済みの言葉を上書きしない
+        self.assertEqual(
+            user_dict["aab7dda2-0d97-43c8-8cb7-3f440dab9b4e"].surface, "ｔｅｓｔ"
+        )
+        self.assertEqual(
+            sorted(word.surface for word in user_dict.values()),
+            ["ｔｅｓｔ", "ｔｅｓｔ１", "ｔｅｓｔ２"],
+        )
+
+        jsonl_text = "\n".join(
+            [
+                json.dumps(
+                    {
+                        "word_uuid": "aab7dda2-0d97-43c8-8cb7-3f440dab9b4e",
+                        "surface": "test4",
+                        "pronunciation": "テストヨン",
+                        "accent_type": 1,
+                    }
+                ),
+                "",
+                "{",
+                "[]",
+            ]
+        )
+        with patch("voicevox_engine.user_dict.update_dict"):
+            progresses = list(
+                import_user_dict_stream(
+                    StringIO(jsonl_text),
+                    UserDictImportFormat.JSONL,
+                    override=True,
+                    user_dict_path=user_dict_path,
+                    compiled_dict_path=compiled_dict_path,
+                )
+            )
+        self.assertEqual(
+            [error.line for error in progresses[0].errors],
+            [3, 4],
+        )
+        self.assertEqual(progresses[-1].imported, 1)
+        self.assertEqual(
+            read_dict(user_dict_path=user_dict_path)[
+                "aab7dda2-0d97-43c8-8cb7-3f440dab9b4e"
+            ].surface,
+            "ｔｅｓｔ４",
+        )
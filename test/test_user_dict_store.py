@@ -0,0 +1,298 @@
+import json
+from io import StringIO
+from pathlib import Path
+from tempfile import TemporaryDirectory
+from unittest import TestCase
+from unittest.mock import patch
+
+from fastapi import HTTPException
+from pyopenjtalk import g2p, unset_user_dict
+
+from voicevox_engine import user_dict
+from voicevox_engine.model import (
+    UserDictImportFormat,
+    UserDictOperation,
+    UserDictOperationType,
+)
+from voicevox_engine.user_dict import (
+    apply_user_dict_operations,
+    apply_word,
+    create_word,
+    delete_word,
+    export_user_dict_json,
+    import_user_dict,
+    import_user_dict_stream,
+    open_user_dict_store,
+    read_dict,
+    rewrite_word,
+    search_dict,
+    set_user_dict_store,
+)
+from voicevox_engine.user_dict_store import SQLiteUserDictStore
+
+from .test_user_dict import import_word, valid_dict_dict_json
+
+
+class TestSQLiteUserDictStore(TestCase):
+    def setUp(self):
+        self.tmp_dir = TemporaryDirectory()
+        self.tmp_dir_path = Path(self.tmp_dir.name)
+        self.store = SQLiteUserDictStore(
+            db_path=self.tmp_dir_path / "user_dict.sqlite3",
+            user_dict_path=self.tmp_dir_path / "user_dict.json",
+        )
+
+    def tearDown(self):
+        self.tmp_dir.cleanup()
+
+    def test_transaction(self):
+        words = {
+            f"uuid-{i}": create_word(
+                surface=f"test{i}", pronunciation="テスト", accent_type=1
+            )
+            for i in range(3)
+        }
+        with self.store.transaction() as transaction:
+            transaction.update(words)
+        self.assertEqual(self.store.read_all(), words)
+        self.assertEqual(self.store.count(), 3)
+
+        # 更新しても登録順は変わらない
+        new_word = create_word(surface="new", pronunciation="ニュー", accent_type=1)
+        with self.store.transaction() as transaction:
+            self.assertIn("uuid-0", transaction)
+            self.assertNotIn("uuid-3", transaction)
+            self.assertEqual(transaction["uuid-1"], words["uuid-1"])
+            transaction["uuid-0"] = new_word
+            del transaction["uuid-2"]
+            with self.assertRaises(KeyError):
+                del transaction["uuid-3"]
+        self.assertEqual(
+            self.store.read_all(), {"uuid-0": new_word, "uuid-1": words["uuid-1"]}
+        )
+
+    def test_transaction_rollback(self):
+        word = create_word(surface="test", pronunciation="テスト", accent_type=1)
+        with self.store.transaction() as transaction:
+            transaction["uuid-0"] = word
+            transaction.rollback()
+        with self.assertRaises(RuntimeError), self.store.transaction() as transaction:
+            transaction["uuid-1"] = word
+            raise RuntimeError
+        self.assertEqual(self.store.read_all(), {})
+
+    def test_search(self):
+        words = {
+            f"uuid-{i}": create_word(
+                surface=f"test{i % 2}", pronunciation="テスト", accent_type=1
+            )
+            for i in range(5)
+        }
+        with self.store.transaction() as transaction:
+            transaction.update(words)
+        self.assertEqual(
+            list(self.store.search(offset=1, limit=2)), ["uuid-1", "uuid-2"]
+        )
+        self.assertEqual(list(self.store.search(offset=3)), ["uuid-3", "uuid-4"])
+        self.assertEqual(list(self.store.search(surface="ｔｅｓｔ１")), ["uuid-1", "uuid-3"])
+
+
+class TestUserDictWithStore(TestCase):
+    def setUp(self):
+        self.tmp_dir = TemporaryDirectory()
+        self.tmp_dir_path = Path(self.tmp_dir.name)
+        self.user_dict_path = self.tmp_dir_path / "user_dict.json"
+        self.compiled_dict_path = self.tmp_dir_path / "user.dic"
+        self.user_dict_path.write_text(
+            json.dumps(valid_dict_dict_json, ensure_ascii=False), encoding="utf-8"
+        )
+        self.store = open_user_dict_store(
+            db_path=self.tmp_dir_path / "user_dict.sqlite3",
+            user_dict_path=self.user_dict_path,
+        )
+        set_user_dict_store(self.store)
+
+    def tearDown(self):
+        set_user_dict_store(None)
+        unset_user_dict()
+        self.tmp_dir.cleanup()
+
+    def test_migrate_and_export(self):
+        json_dict = read_dict(user_dict_path=self.user_dict_path)
+        self.assertEqual(self.store.read_all(), json_dict)
+
+        word_uuid = apply_word(
+            surface="test2",
+            pronunciation="テストツー",
+            accent_type=1,
+            user_dict_path=self.user_dict_path,
+            compiled_dict_path=self.compiled_dict_path,
+        )
+        # 移行した後はjsonを更新しない
+        self.assertEqual(
+            json.loads(self.user_dict_path.read_text(encoding="utf-8")),
+            valid_dict_dict_json,
+        )
+
+        export_path = self.tmp_dir_path / "exported.json"
+        export_user_dict_json(json_path=export_path, user_dict_path=self.user_dict_path)
+        set_user_dict_store(None)
+        exported_dict = read_dict(user_dict_path=export_path)
+        self.assertEqual(list(exported_dict), [*json_dict, word_uuid])
+
+    def test_edit_words(self):
+        test_text = "テスト用の文字列"
+        success_pronunciation = "デフォルトノジショデハゼッタイニセイセイサレナイヨミ"
+        word_uuid = apply_word(
+            surface=test_text,
+            pronunciation=success_pronunciation,
+            accent_type=1,
+            priority=10,
+            user_dict_path=self.user_dict_path,
+            compiled_dict_path=self.compiled_dict_path,
+        )
+        self.assertEqual(g2p(text=test_text, kana=True), success_pronunciation)
+
+        rewrite_word(
+            word_uuid=word_uuid,
+            surface=test_text,
+            pronunciation="テストヨウ",
+            accent_type=1,
+            user_dict_path=self.user_dict_path,
+            compiled_dict_path=self.compiled_dict_path,
+        )
+        self.assertEqual(
+            search_dict(surface=test_text, user_dict_path=self.user_dict_path)[
+                word_uuid
+            ].pronunciation,
+            "テストヨウ",
+        )
+
+        delete_word(
+            word_uuid=word_uuid,
+            user_dict_path=self.user_dict_path,
+            compiled_dict_path=self.compiled_dict_path,
+        )
+        self.assertNotIn(word_uuid, read_dict(user_dict_path=self.user_dict_path))
+        with self.assertRaises(HTTPException):
+            delete_word(
+                word_uuid=word_uuid,
+                user_dict_path=self.user_dict_path,
+                compiled_dict_path=self.compiled_dict_path,
+            )
+
+    def test_import_dict(self):
+        import_user_dict(
+            {"b1affe2a-d5f0-4050-926c-f28e0c1d9a98": import_word},
+            user_dict_path=self.user_dict_path,
+            compiled_dict_path=self.compiled_dict_path,
+        )
+        self.assertEqual(
+            read_dict(user_dict_path=self.user_dict_path)[
+                "b1affe2a-d5f0-4050-926c-f28e0c1d9a98"
+            ],
+            import_word,
+        )
+
+    def test_apply_user_dict_operations(self):
+        original = self.store.read_all()
+        operations = [
+            UserDictOperation(
+                type=UserDictOperationType.ADD,
+                surface="test",
+                pronunciation="テスト",
+                accent_type=1,
+            ),
+            UserDictOperation(
+                type=UserDictOperationType.DELETE,
+                word_uuid="aab7dda2-0d97-43c8-8cb7-3f440dab9b4e",
+            ),
+        ]
+
+        # 1件でも失敗した場合は辞書を変更しない
+        results = apply_user_dict_operations(
+            [*operations, UserDictOperation(type=UserDictOperationType.UPDATE)],
+            user_dict_path=self.user_dict_path,
+            compiled_dict_path=self.compiled_dict_path,
+        )
+        self.assertEqual([result.success for result in results], [True, True, False])
+        self.assertEqual(self.store.read_all(), original)
+
+        # コンパイルに失敗した場合は元に戻す
+        with patch(
+            "voicevox_engine.user_dict.update_dict", side_effect=RuntimeError
+        ), self.assertRaises(RuntimeError):
+            apply_user_dict_operations(
+                operations,
+                user_dict_path=self.user_dict_path,
+                compiled_dict_path=self.compiled_dict_path,
+            )
+        self.assertEqual(self.store.read_all(), original)
+
+        results = apply_user_dict_operations(
+            operations,
+            user_dict_path=self.user_dict_path,
+            compiled_dict_path=self.compiled_dict_path,
+        )
+        self.assertEqual(list(self.store.read_all()), [results[0].word_uuid])
+
+    def test_import_user_dict_stream(self):
+        jsonl_text = "\n".join(
+            json.dumps(
+                {"surface": f"test{i}", "pronunciation": "テスト", "accent_type": 1}
+            )
+            for i in range(5)
+        )
+        with patch("voicevox_engine.user_dict.update_dict") as mock_update_dict:
+            progresses = import_user_dict_stream(
+                StringIO(jsonl_text),
+                UserDictImportFormat.JSONL,
+                chunk_size=2,
+                user_dict_path=self.user_dict_path,
+                compiled_dict_path=self.compiled_dict_path,
+            )
+            # 読み込んだ分から少しずつ書き込む
+            next(progresses)
+            self.assertEqual(self.store.count(), 3)
+            # 途中で打ち切った場合も、書き込んだ分は辞書に反映する
+            progresses.close()
+            self.assertEqual(mock_update_dict.call_count, 1)
+
+    def test_import_user_dict_stream_failure(self):
+        rows = [
+            {"surface": f"test{i}", "pronunciation": "テスト", "accent_type": 1}
+            for i in range(3)
+        ]
+        jsonl_text = "\n".join(
+            [json.dumps(row) for row in rows]
+            + ["{", json.dumps({**rows[0], "surface": "broken"})]
+        )
+        count = self.store.count()
+
+        parse_import_row = user_dict._parse_import_row
+
+        def fail_on_broken(row):
+            if isinstance(row, dict) and row["surface"] == "broken":
+                raise RuntimeError("broken")
+            return parse_import_row(row)
+
+        with patch("voicevox_engine.user_dict.update_dict"), patch.object(
+            user_dict, "_parse_import_row", side_effect=fail_on_broken
+        ):
+            progresses = list(
+                import_user_dict_stream(
+                    StringIO(jsonl_text),
+                    UserDictImportFormat.JSONL,
+                    chunk_size=3,
+                    user_dict_path=self.user_dict_path,
+                    compiled_dict_path=self.compiled_dict_path,
+                )
+            )
+        # 失敗しても例外は送出せず、最後の進捗で理由を報告する
+        last = progresses[-1]
+        self.assertIsNotNone(last.error)
+        self.assertFalse(last.done)
+        # 書き込みが確定した言葉の数と、まだ報告していない読み込めなかった行を返す
+        self.assertEqual((last.processed, last.imported, last.failed), (5, 3, 1))
+        self.assertEqual([error.line for error in last.errors], [4])
+        self.assertEqual(self.store.count(), count + 3)
@@ -0,0 +1,111 @@
+import io
+import sys
+from unittest import TestCase
+from unittest.mock import patch
+
+import numpy
+import soundfile
+
+from voicevox_engine.utility import (
+    resample_wave,
+    wave_stream_header,
+    wave_to_pcm16,
+    write_wave,
+)
+
+# voicevox_engine.utilityでは同名の関数がexportされているので、モジュールはsys.modulesから取得する
+wave_utility_module = sys.modules["voicevox_engine.utility.wave_utility"]
+
+
+def generate_sine_wave(length: int) -> numpy.ndarray:
+    return (0.5 * numpy.sin(numpy.arange(length) / 10)).astype(numpy.float32)
+
+
+def read_wave(wave_bytes: io.BytesIO):
+    wave_bytes.seek(0)
+    return soundfile.read(wave_bytes, dtype="int16")
+
+
+class TestWriteWave(TestCase):
+    def test_mono(self):
+        wave = generate_sine_wave(1000)
+        f = io.BytesIO()
+        write_wave(file=f, wave=wave, sampling_rate=24000)
+
+        actual, sampling_rate = read_wave(f)
+        self.assertEqual(sampling_rate, 24000)
+        self.assertEqual(actual.shape, (1000,))
+        numpy.testing.assert_allclose(actual / 32768, wave, atol=1e-4)
+
+    def test_stereo(self):
+        wave = generate_sine_wave(1000)
+        expected = io.BytesIO()
+        soundfile.write(
+            file=expected,
+            data=numpy.array([wave, wave]).T,
+            samplerate=24000,
+            format="WAV",
+            subtype="PCM_16",
+        )
+
+        # ブロックの境界をまたいでも同じ結果になる
+        for block_frames in [1, 7, 1000, 4096]:
+            with self.subTest(block_frames=block_frames):
+                f = io.BytesIO()
+                with patch.object(
+                    wave_utility_module, "stereo_block_frames", block_frames
+                ):
+                    write_wave(file=f, wave=wave, sampling_rate=24000, stereo=True)
+                self.assertEqual(f.getvalue(), expected.getvalue())
+
+    def test_stereo_empty(self):
+        f = io.BytesIO()
+        write_wave(
+            file=f,
+            wave=numpy.zeros(0, dtype=numpy.float32),
+            sampling_rate=24000,
+            stereo=True,
+        )
+        actual, _ = read_wave(f)
+        self.assertEqual(len(actual), 0)
+
+
+class TestWaveStream(TestCase):
+    def test_same_as_write_wave(self):
+        # 範囲外の値も含めて、write_waveと同じ値に量子化する
+        wave = numpy.concatenate(
+            [generate_sine_wave(1000) * 2.5, numpy.array([1.0, -1.0], numpy.float32)]
+        )
+        for stereo in [False, True]:
+            with self.subTest(stereo=stereo):
+                f = io.BytesIO()
+                write_wave(file=f, wave=wave, sampling_rate=24000, stereo=stereo)
+                expected = f.getvalue()
+
+                header = wave_stream_header(sampling_rate=24000, stereo=stereo)
+                actual = header + b"".join(
+                    wave_to_pcm16(wave[start : start + 300], stereo=stereo)
+                    for start in range(0, len(wave), 300)
+                )
+                # チャンクの長さ以外は同じになる
+                self.assertEqual(len(header), 44)
+                self.assertEqual(actual[:4], expected[:4])
+                self.assertEqual(actual[8:40], expected[8:40])
+                self.assertEqual(actual[44:], expected[44:])
+
+                # 長さが不明なwavとして読み込める
+                data, sampling_rate = soundfile.read(io.BytesIO(actual), dtype="int16")
+                self.assertEqual(sampling_rate, 24000)
+                self.assertEqual(len(data), len(wave))
+
+
+class TestResampleWave(TestCase):
+    def test_same_sampling_rate(self):
+        wave = generate_sine_wave(1000)
+        self.assertIs(resample_wave(wave, 24000, 24000), wave)
+
+    def test_keep_float32(self):
+        wave = generate_sine_wave(1000)
+        actual = resample_wave(wave, 48000, 24000)
+        self.assertEqual(actual.shape, (500,))
+        self.assertEqual(actual.dtype, numpy.float32)
@@ -0,0 +1,144 @@
+import threading
+from collections import OrderedDict
+from typing import Dict, List, Optional, Tuple
+from uuid import uuid4
+
+from .full_context_label import split_sentences
+from .model import AccentPhrase
+from .synthesis_engine import SynthesisEngineBase
+from .synthesis_engine.accent_phrase_cache import skeletons_to_accent_phrases
+from .synthesis_engine.synthesis_engine_base import analyze_text
+from .user_dict import get_user_dict_version
+
+
+class AnalysisSessionNotFoundError(LookupError):
+    def __init__(self, session_id: str):
+        self.session_id = session_id
+        super().__init__(f"session_id {session_id} is not found.")
+
+
+class AnalysisSession:
+    """
+    エディタなどで少しずつ編集される文章を、変更された文だけ解析し直すためのセッション
+    前回の解析結果を文ごとに保持し、同じ文は音素長・音高の推論もせずにそのまま使う
+
+    文章全体を一度に解析した場合とは文の境界付近の解析結果が変わることがあるが、
+    文末のポーズは文ごとに推論するので、文の間には同じようにポーズが入る
+    """
+
+    def __init__(self) -> None:
+        self.lock = threading.Lock()
+        # (文, 後ろにポーズを付けるかどうか)をキーとした、前回の文章に含まれていた文の解析結果
+        self._sentences: Dict[Tuple[str, bool], List[AccentPhrase]] = {}
+        self._engine: Optional[SynthesisEngineBase] = None
+        self._speaker_id: Optional[int] = None
+        self._user_dict_version: Optional[int] = None
+        self.reused_sentences = 0
+        self.analyzed_sentences = 0
+
+    def create_accent_phrases(
+        self, engine: SynthesisEngineBase, text: str, speaker_id: int
+    ) -> List[AccentPhrase]:
+        """
+        engine.create_accent_phrasesと同様にアクセント句を作成する
+        前回と同じ文はテキスト解析も含めて保持している解析結果を使い、変更された文だけを解析する
+        処理時間が文章全体ではなく変更された文の量で決まるよう、返すアクセント句は保持している解析結果をコピーせずにそのまま返す
+        そのため呼び出し元は、返されたアクセント句を変更してはならない
+        """
+        with self.lock:
+            user_dict_version = get_user_dict_version()
+            if (
+                engine is not self._engine
+                or speaker_id != self._speaker_id
+                or user_dict_version != self._user_dict_version
+            ):
+                self._sentences = {}
+                self._engine = engine
+                self._speaker_id = speaker_id
+                self._user_dict_version = user_dict_version
+
+            sentences = [
+                sentence for sentence in split_sentences(text) if sentence.strip() != ""
+            ]
+
+            new_sentences: Dict[Tuple[str, bool], List[AccentPhrase]] = {}
+            self.reused_sentences = 0
+            self.analyzed_sentences = 0
+
+            def get_sentence(sentence: str, has_pause: bool) -> List[AccentPhrase]:
+                key = (sentence, has_pause)
+                sentence_accent_phrases = new_sentences.get(
+                    key, self._sentences.get(key)
+                )
+                if sentence_accent_phrases is None:
+                    skeletons = analyze_text(sentence)
+                    if len(skeletons) == 0:
+                        sentence_accent_phrases = []
+                    else:
+                        if has_pause:
+                            # 文末のポーズも音素長の推論に含める
+                            accent, is_interrogative, _, moras = skeletons[-1]
+                            skeletons = skeletons[:-1] + (
+                                (accent, is_interrogative, True, moras),
+                            )
+                        sentence_accent_phrases = engine.replace_mora_data(
+                            accent_phrases=skeletons_to_accent_phrases(skeletons),
+                            speaker_id=speaker_id,
+                        )
+                        self.analyzed_sentences += 1
+                elif len(sentence_accent_phrases) > 0:
+                    self.reused_sentences += 1
+                new_sentences[key] = sentence_accent_phrases
+                return sentence_accent_phrases
+
+            # ポーズを付けるかどうかは文の位置だけで決まるので、解析する前に保持している結果を探せる
+            results = [
+                get_sentence(sentence, i < len(sentences) - 1)
+                for i, sentence in enumerate(sentences)
+            ]
+            # 末尾の文がアクセント句を持たない場合は、その前の文が最後の文になるのでポーズを付けない
+            last = max(
+                (i for i, result in enumerate(results) if len(result) > 0), default=None
+            )
+            if last is not None and last < len(sentences) - 1:
+                results[last] = get_sentence(sentences[last], False)
+
+            self._sentences = new_sentences
+            return [
+                accent_phrase
+                for sentence_accent_phrases in results
+                for accent_phrase in sentence_accent_phrases
+            ]
+
+
+class AnalysisSessionManager:
+    """
+    AnalysisSessionをIDで管理する
+    セッション数がmax_sessionsを超えた場合は、最も長く使われていないセッションを破棄する
+    """
+
+    def __init__(self, max_sessions: int = 64) -> None:
+        self.max_sessions = max_sessions
+        self._sessions: "OrderedDict[str, AnalysisSession]" = OrderedDict()
+        self._lock = threading.Lock()
+
+    def create_session(self) -> str:
+        session_id = str(uuid4())
+        with self._lock:
+            self._sessions[session_id] = AnalysisSession()
+            while len(self._sessions) > self.max_sessions:
+                self._sessions.popitem(last=False)
+        return session_id
+
+    def get_session(self, session_id: str) -> AnalysisSession:
+        with self._lock:
+            session = self._sessions.get(session_id)
+            if session is None:
+                raise AnalysisSessionNotFoundError(session_id)
+            self._sessions.move_to_end(session_id)
+            return session
+
+    def delete_session(self, session_id: str) -> None:
+        with self._lock:
+            if self._sessions.pop(session_id, None) is None:
+                raise AnalysisSessionNotFoundError(session_id)
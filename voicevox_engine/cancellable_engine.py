@@ -6,14 +6,12 @@ from multiprocessing.connection import Connection
 from tempfile import NamedTemporaryFile
 from typing import List, Optional, Tuple
 
-import soundfile
-
 # FIXME: remove FastAPI dependency
 from fastapi import HTTPException, Request
 
 from .model import AudioQuery
 from .synthesis_engine import make_synthesis_engines
-from .utility import get_latest_core_version
+from .utility import get_latest_core_version, write_wave
 
 
 class CancellableEngine:
@@ -211,8 +209,11 @@ def start_synthesis_subprocess(
                 continue
             wave = _engine._synthesis_impl(query, speaker_id)
             with NamedTemporaryFile(delete=False) as f:
-                soundfile.write(
-                    file=f, data=wave, samplerate=query.outputSamplingRate, format="WAV"
+                write_wave(
+                    file=f,
+                    wave=wave,
+                    sampling_rate=query.outputSamplingRate,
+                    stereo=query.outputStereo,
                 )
             sub_proc_con.send(f.name)
         except Exception:
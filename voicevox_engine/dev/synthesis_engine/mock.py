@@ -90,19 +90,20 @@ class MockSynthesisEngine(SynthesisEngineBase):
 
         Returns
         -------
-        wave [npt.NDArray[np.int16]]
+        wave [npt.NDArray[np.float32]]
             音声波形データをNumPy配列で返します
         """
         # recall text in katakana
         flatten_moras = to_flatten_moras(query.accent_phrases)
         kana_text = "".join([mora.text for mora in flatten_moras])
 
-        wave = self.forward(kana_text)
+        # 16bitの値域で返ってくるので、SynthesisEngineと同じく-1.0から1.0のfloat32にする
+        wave = (self.forward(kana_text) / 32768).astype(np.float32)
 
         # volume
         wave *= query.volumeScale
 
-        return wave.astype("int16")
+        return wave
 
     def forward(self, text: str, **kwargs: Dict[str, Any]) -> np.ndarray:
         """
@@ -1,24 +1,118 @@
 import re
 from dataclasses import dataclass
 from itertools import chain
-from typing import Dict, List, Optional
+from typing import Dict, List, Optional, Tuple
 
 import pyopenjtalk
 
+# フルコンテキストラベルの仕様は、
+# http://hts.sp.nitech.ac.jp/?Download の HTS-2.3のJapanese tar.bz2 (126 MB)をダウンロードして、data/lab_format.pdfを見るとリストが見つかります。 # noqa
+_label_pattern = re.compile(
+    r"^(?P<p1>.+?)\^(?P<p2>.+?)\-(?P<p3>.+?)\+(?P<p4>.+?)\=(?P<p5>.+?)"
+    r"/A\:(?P<a1>.+?)\+(?P<a2>.+?)\+(?P<a3>.+?)"
+    r"/B\:(?P<b1>.+?)\-(?P<b2>.+?)\_(?P<b3>.+?)"
+    r"/C\:(?P<c1>.+?)\_(?P<c2>.+?)\+(?P<c3>.+?)"
+    r"/D\:(?P<d1>.+?)\+(?P<d2>.+?)\_(?P<d3>.+?)"
+    r"/E\:(?P<e1>.+?)\_(?P<e2>.+?)\!(?P<e3>.+?)\_(?P<e4>.+?)\-(?P<e5>.+?)"
+    r"/F\:(?P<f1>.+?)\_(?P<f2>.+?)\#(?P<f3>.+?)\_(?P<f4>.+?)\@(?P<f5>.+?)\_(?P<f6>.+?)\|(?P<f7>.+?)\_(?P<f8>.+?)"  # noqa
+    r"/G\:(?P<g1>.+?)\_(?P<g2>.+?)\%(?P<g3>.+?)\_(?P<g4>.+?)\_(?P<g5>.+?)"
+    r"/H\:(?P<h1>.+?)\_(?P<h2>.+?)"
+    r"/I\:(?P<i1>.+?)\-(?P<i2>.+?)\@(?P<i3>.+?)\+(?P<i4>.+?)\&(?P<i5>.+?)\-(?P<i6>.+?)\|(?P<i7>.+?)\+(?P<i8>.+?)"  # noqa
+    r"/J\:(?P<j1>.+?)\_(?P<j2>.+?)"
+    r"/K\:(?P<k1>.+?)\+(?P<k2>.+?)\-(?P<k3>.+?)$"
+)
+
+_label_format = (
+    "{p1}^{p2}-{p3}+{p4}={p5}"
+    "/A:{a1}+{a2}+{a3}"
+    "/B:{b1}-{b2}_{b3}"
+    "/C:{c1}_{c2}+{c3}"
+    "/D:{d1}+{d2}_{d3}"
+    "/E:{e1}_{e2}!{e3}_{e4}-{e5}"
+    "/F:{f1}_{f2}#{f3}_{f4}@{f5}_{f6}|{f7}_{f8}"
+    "/G:{g1}_{g2}%{g3}_{g4}_{g5}"
+    "/H:{h1}_{h2}"
+    "/I:{i1}-{i2}@{i3}+{i4}&{i5}-{i6}|{i7}+{i8}"
+    "/J:{j1}_{j2}"
+    "/K:{k1}+{k2}-{k3}"
+)
+
+
+def parse_label_contexts(label: str) -> Dict[str, str]:
+    """
+    ラベルに含まれる全てのcontextを辞書として返す
+    """
+    match = _label_pattern.search(label)
+    if match is None:
+        raise ValueError(f"不正なフルコンテキストラベルです: {label}")
+    return match.groupdict()
+
+
+def split_label(label: str) -> Tuple[str, str, str, str, str, str, str]:
+    """
+    ラベルから、アクセント句の組み立てに使うcontextだけを取り出す
+    Returns
+    -------
+    contexts : Tuple[str, str, str, str, str, str, str]
+        p3, a2, f1, f2, f3, f5, i3の順に返す
+    """
+    # ラベルは"p1^p2-p3+p4=p5/A:a1+a2+a3/B:.../K:k1+k2-k3"の形式で、各contextに"/"は含まれない
+    # 正規表現で全てのcontextを取り出すのは遅いので、必要なものだけをsplitで取り出す
+    try:
+        p, a, _, _, _, _, f, _, _, i, _, _ = label.split("/")
+        f12, f3_ = f[2:].split("#", 1)
+        f1, f2 = f12.split("_", 1)
+        return (
+            p.split("-", 1)[1].split("+", 1)[0],
+            a[2:].split("+", 2)[1],
+            f1,
+            f2,
+            f3_.split("_", 1)[0],
+            f3_.split("@", 1)[1].split("_", 1)[0],
+            i[2:].split("@", 1)[1].split("+", 1)[0],
+        )
+    except (ValueError, IndexError):
+        raise ValueError(f"不正なフルコンテキストラベルです: {label}") from None
+
 
-@dataclass
 class Phoneme:
     """
     音素(母音・子音)クラス、音素の元となるcontextを保持する
     音素には、母音や子音以外にも無音(silent/pause)も含まれる
 
+    アクセント句の組み立てに使うcontextだけをラベルから切り出して保持し、
+    その他のcontextはcontextsが参照されたときに初めてラベルを解析して作成する
+
     Attributes
     ----------
-    contexts: Dict[str, str]
-        音素の元
+    phoneme : str
+        音素(p3)
+    a2 : str
+        アクセント句内でのモーラの位置(a2)
+    f1, f2, f3, f5 : str
+        アクセント句のモーラ数・アクセント型・疑問文かどうか・呼気段落内での位置(f1, f2, f3, f5)
+    i3 : str
+        呼気段落のモーラ数(i3)
     """
 
-    contexts: Dict[str, str]
+    __slots__ = ("phoneme", "a2", "f1", "f2", "f3", "f5", "i3", "_label", "_contexts")
+
+    # 切り出して保持しているcontextのキーと属性名の対応
+    _slot_keys = {
+        "p3": "phoneme",
+        "a2": "a2",
+        "f1": "f1",
+        "f2": "f2",
+        "f3": "f3",
+        "f5": "f5",
+        "i3": "i3",
+    }
+
+    def __init__(self, contexts: Dict[str, str]):
+        self._label: Optional[str] = None
+        self._contexts: Optional[Dict[str, str]] = contexts
+        for key, name in self._slot_keys.items():
+            setattr(self, name, contexts[key])
 
     @classmethod
     def from_label(cls, label: str):
@@ -34,25 +128,44 @@ class Phoneme:
         phoneme: Phoneme
             Phonemeクラスを返す
         """
+        phoneme = cls.__new__(cls)
+        (
+            phoneme.phoneme,
+            phoneme.a2,
+            phoneme.f1,
+            phoneme.f2,
+            phoneme.f3,
+            phoneme.f5,
+            phoneme.i3,
+        ) = split_label(label)
+        phoneme._label = label
+        phoneme._contexts = None
+        return phoneme
 
-        # フルコンテキストラベルの仕様は、
-        # http://hts.sp.nitech.ac.jp/?Download の HTS-2.3のJapanese tar.bz2 (126 MB)をダウンロードして、data/lab_format.pdfを見るとリストが見つかります。 # noqa
-        contexts = re.search(
-            r"^(?P<p1>.+?)\^(?P<p2>.+?)\-(?P<p3>.+?)\+(?P<p4>.+?)\=(?P<p5>.+?)"
-            r"/A\:(?P<a1>.+?)\+(?P<a2>.+?)\+(?P<a3>.+?)"
-            r"/B\:(?P<b1>.+?)\-(?P<b2>.+?)\_(?P<b3>.+?)"
-            r"/C\:(?P<c1>.+?)\_(?P<c2>.+?)\+(?P<c3>.+?)"
-            r"/D\:(?P<d1>.+?)\+(?P<d2>.+?)\_(?P<d3>.+?)"
-            r"/E\:(?P<e1>.+?)\_(?P<e2>.+?)\!(?P<e3>.+?)\_(?P<e4>.+?)\-(?P<e5>.+?)"
-            r"/F\:(?P<f1>.+?)\_(?P<f2>.+?)\#(?P<f3>.+?)\_(?P<f4>.+?)\@(?P<f5>.+?)\_(?P<f6>.+?)\|(?P<f7>.+?)\_(?P<f8>.+?)"  # noqa
-            r"/G\:(?P<g1>.+?)\_(?P<g2>.+?)\%(?P<g3>.+?)\_(?P<g4>.+?)\_(?P<g5>.+?)"
-            r"/H\:(?P<h1>.+?)\_(?P<h2>.+?)"
-            r"/I\:(?P<i1>.+?)\-(?P<i2>.+?)\@(?P<i3>.+?)\+(?P<i4>.+?)\&(?P<i5>.+?)\-(?P<i6>.+?)\|(?P<i7>.+?)\+(?P<i8>.+?)"  # noqa
-            r"/J\:(?P<j1>.+?)\_(?P<j2>.+?)"
-            r"/K\:(?P<k1>.+?)\+(?P<k2>.+?)\-(?P<k3>.+?)$",
-            label,
-        ).groupdict()
-        return cls(contexts=contexts)
+    @property
+    def contexts(self) -> Dict[str, str]:
+        """
+        音素の元となる全てのcontext
+        値を変更する場合はset_contextを使う
+        """
+        if self._contexts is None:
+            assert self._label is not None
+            self._contexts = parse_label_contexts(self._label)
+        return self._contexts
+
+    def set_context(self, key: str, value: str):
+        """
+        contextのうち、指定されたキーの値を変更する
+        Parameters
+        ----------
+        key : str
+            変更したいcontextのキー
+        value : str
+            変更したいcontextの値
+        """
+        self.contexts[key] = value
+        if key in self._slot_keys:
+            setattr(self, self._slot_keys[key], value)
 
     @property
     def label(self):
@@ -63,31 +176,10 @@ class Phoneme:
         lebel: str
             ラベルを返す
         """
-        return (
-            "{p1}^{p2}-{p3}+{p4}={p5}"
-            "/A:{a1}+{a2}+{a3}"
-            "/B:{b1}-{b2}_{b3}"
-            "/C:{c1}_{c2}+{c3}"
-            "/D:{d1}+{d2}_{d3}"
-            "/E:{e1}_{e2}!{e3}_{e4}-{e5}"
-            "/F:{f1}_{f2}#{f3}_{f4}@{f5}_{f6}|{f7}_{f8}"
-            "/G:{g1}_{g2}%{g3}_{g4}_{g5}"
-            "/H:{h1}_{h2}"
-            "/I:{i1}-{i2}@{i3}+{i4}&{i5}-{i6}|{i7}+{i8}"
-            "/J:{j1}_{j2}"
-            "/K:{k1}+{k2}-{k3}"
-        ).format(**self.contexts)
-
-    @property
-    def phoneme(self):
-        """
-        音素クラスの中で、発声に必要な要素を返す
-        Returns
-        -------
-        phoneme : str
-            発声に必要な要素を返す
-        """
-        return self.contexts["p3"]
+        if self._contexts is None:
+            assert self._label is not None
+            return self._label
+        return _label_format.format(**self._contexts)
 
     def is_pause(self):
         """
@@ -97,7 +189,12 @@ class Phoneme:
         is_pose : bool
             音素がポーズ(無音、silent/pause)であるか(True)否か(False)
         """
-        return self.contexts["f1"] == "xx"
+        return self.f1 == "xx"
+
+    def __eq__(self, other):
+        if not isinstance(other, Phoneme):
+            return NotImplemented
+        return self.label == other.label
 
     def __repr__(self):
         return f"<Phoneme phoneme='{self.phoneme}'>"
@@ -131,9 +228,9 @@ class Mora:
         value : str
             変更したいcontextの値
         """
-        self.vowel.contexts[key] = value
+        self.vowel.set_context(key, value)
         if self.consonant is not None:
-            self.consonant.contexts[key] = value
+            self.consonant.set_context(key, value)
 
     @property
     def phonemes(self):
@@ -199,15 +296,12 @@ class AccentPhrase:
             # workaround for Hihosiba/voicevox_engine#57
             # (py)openjtalk によるアクセント句内のモーラへの附番は 49 番目まで
             # 49 番目のモーラについて、続く音素のモーラ番号を単一モーラの特定に使えない
-            if int(phoneme.contexts["a2"]) == 49:
+            if int(phoneme.a2) == 49:
                 break
 
             mora_phonemes.append(phoneme)
 
-            if (
-                next_phoneme is None
-                or phoneme.contexts["a2"] != next_phoneme.contexts["a2"]
-            ):
+            if next_phoneme is None or phoneme.a2 != next_phoneme.a2:
                 if len(mora_phonemes) == 1:
                     consonant, vowel = None, mora_phonemes[0]
                 elif len(mora_phonemes) == 2:
@@ -218,11 +312,11 @@ class AccentPhrase:
                 moras.append(mora)
                 mora_phonemes = []
 
-        accent = int(moras[0].vowel.contexts["f2"])
+        accent = int(moras[0].vowel.f2)
         # workaround for Hihosiba/voicevox_engine#55
         # アクセント位置とするキー f2 の値がアクセント句内のモーラ数を超える場合がある
         accent = accent if accent <= len(moras) else len(moras)
-        is_interrogative = moras[-1].vowel.contexts["f3"] == "1"
+        is_interrogative = moras[-1].vowel.f3 == "1"
         return cls(moras=moras, accent=accent, is_interrogative=is_interrogative)
 
     def set_context(self, key: str, value: str):
@@ -315,8 +409,8 @@ class BreathGroup:
 
             if (
                 next_phoneme is None
-                or phoneme.contexts["i3"] != next_phoneme.contexts["i3"]
-                or phoneme.contexts["f5"] != next_phoneme.contexts["f5"]
+                or phoneme.i3 != next_phoneme.i3
+                or phoneme.f5 != next_phoneme.f5
             ):
                 accent_phrase = AccentPhrase.from_phonemes(accent_phonemes)
                 accent_phrases.append(accent_phrase)
@@ -434,24 +528,23 @@ class Utterance:
         phonemes : List[Phoneme]
             Utteranceクラスに直接的・間接的に含まれる、全てのPhonemeを返す
         """
+        # 長い文章でも線形時間で済むように、リストのコピーやindexによる探索はしない
         accent_phrases = list(
             chain.from_iterable(
                 breath_group.accent_phrases for breath_group in self.breath_groups
             )
         )
-        for prev, cent, post in zip(
-            [None] + accent_phrases[:-1],
-            accent_phrases,
-            accent_phrases[1:] + [None],
-        ):
+        for i_accent_phrase, cent in enumerate(accent_phrases):
             mora_num = len(cent.moras)
             accent = cent.accent
 
-            if prev is not None:
+            if i_accent_phrase > 0:
+                prev = accent_phrases[i_accent_phrase - 1]
                 prev.set_context("g1", str(mora_num))
                 prev.set_context("g2", str(accent))
 
-            if post is not None:
+            if i_accent_phrase < len(accent_phrases) - 1:
+                post = accent_phrases[i_accent_phrase + 1]
                 post.set_context("e1", str(mora_num))
                 post.set_context("e2", str(accent))
 
@@ -462,39 +555,27 @@ class Utterance:
                 mora.set_context("a2", str(i_mora + 1))
                 mora.set_context("a3", str(mora_num - i_mora))
 
-        for prev, cent, post in zip(
-            [None] + self.breath_groups[:-1],
-            self.breath_groups,
-            self.breath_groups[1:] + [None],
-        ):
+        # 呼気段落の最初のアクセント句が、発声全体で何番目のアクセント句か
+        accent_phrase_offset = 0
+        for i_breath_group, cent in enumerate(self.breath_groups):
             accent_phrase_num = len(cent.accent_phrases)
 
-            if prev is not None:
-                prev.set_context("j1", str(accent_phrase_num))
+            if i_breath_group > 0:
+                self.breath_groups[i_breath_group - 1].set_context(
+                    "j1", str(accent_phrase_num)
+                )
 
-            if post is not None:
-                post.set_context("h1", str(accent_phrase_num))
+            if i_breath_group < len(self.breath_groups) - 1:
+                self.breath_groups[i_breath_group + 1].set_context(
+                    "h1", str(accent_phrase_num)
+                )
 
             cent.set_context("i1", str(accent_phrase_num))
-            cent.set_context(
-                "i5", str(accent_phrases.index(cent.accent_phrases[0]) + 1)
-            )
-            cent.set_context(
-                "i6",
-                str(len(accent_phrases) - accent_phrases.index(cent.accent_phrases[0])),
-            )
+            cent.set_context("i5", str(accent_phrase_offset + 1))
+            cent.set_context("i6", str(len(accent_phrases) - accent_phrase_offset))
+            accent_phrase_offset += accent_phrase_num
 
-        self.set_context(
-            "k2",
-            str(
-                sum(
-                    [
-                        len(breath_group.accent_phrases)
-                        for breath_group in self.breath_groups
-                    ]
-                )
-            ),
-        )
+        self.set_context("k2", str(len(accent_phrases)))
 
         phonemes: List[Phoneme] = []
         for i in range(len(self.pauses)):
@@ -518,8 +599,70 @@ class Utterance:
         return [p.label for p in self.phonemes]
 
 
+# OpenJTalkは一度に解析できる文章の長さに上限があるので、これより長い文章は文の区切りで分割して解析する
+max_openjtalk_text_length = 1000
+
+_sentence_pattern = re.compile(r"[^。．！？!?\n]*[。．！？!?\n]*")
+
+
+def split_sentences(text: str) -> List[str]:
+    """
+    文章を文の区切り(句点・感嘆符・疑問符・改行)の直後で分割する
+    分割したものを全て繋げると元の文章になる
+    """
+    return [sentence for sentence in _sentence_pattern.findall(text) if sentence != ""]
+
+
+def split_text(text: str, max_length: int = max_openjtalk_text_length) -> List[str]:
+    """
+    文章を、文の区切りでmax_length文字以下のまとまりに分割する
+    区切りがないまま長さを超える文は、max_length文字ごとに分割する
+    """
+    if len(text) <= max_length:
+        return [text]
+
+    chunks: List[str] = []
+    chunk = ""
+    for sentence in split_sentences(text):
+        while len(sentence) > max_length:
+            if chunk != "":
+                chunks.append(chunk)
+                chunk = ""
+            chunks.append(sentence[:max_length])
+            sentence = sentence[max_length:]
+        if len(chunk) + len(sentence) > max_length:
+            chunks.append(chunk)
+            chunk = ""
+        chunk += sentence
+    if chunk != "":
+        chunks.append(chunk)
+    return chunks
+
+
+def extract_full_context_labels(text: str) -> List[str]:
+    """
+    pyopenjtalk.extract_fullcontextと同様にラベルを返す
+    長い文章は分割して解析し、分割した箇所の無音(sil)は1つのポーズにまとめる
+    """
+    chunks = split_text(text)
+    if len(chunks) == 1:
+        return pyopenjtalk.extract_fullcontext(text)
+
+    labels: List[str] = []
+    for chunk in chunks:
+        chunk_labels = pyopenjtalk.extract_fullcontext(chunk)
+        if len(chunk_labels) == 0:
+            continue
+        if len(labels) > 0:
+            # 前のまとまりの末尾のsilをポーズとして残し、このまとまりの先頭のsilは捨てる
+            labels[-1] = labels[-1].replace("-sil+", "-pau+", 1)
+            chunk_labels = chunk_labels[1:]
+        labels += chunk_labels
+    return labels
+
+
 def extract_full_context_label(text: str):
-    labels = pyopenjtalk.extract_fullcontext(text)
+    labels = extract_full_context_labels(text)
     phonemes = [Phoneme.from_label(label=label) for label in labels]
     utterance = Utterance.from_phonemes(phonemes)
     return utterance
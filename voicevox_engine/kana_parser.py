@@ -1,4 +1,4 @@
-from typing import List, Optional
+from typing import Dict, List, Optional
 
 from .model import AccentPhrase, Mora, ParseKanaError, ParseKanaErrorCode
 from .mora_list import openjtalk_text2mora
@@ -33,17 +33,26 @@ for text, (consonant, vowel) in openjtalk_text2mora.items():
         )
 
 
+# 読み仮名から最長一致でモーラを探すためのトライ木
+# 各ノードは次の文字から子ノードへの辞書で、そのノードまでの文字列が仮名である場合は_MORA_KEYにその仮名を持つ
+_MORA_KEY = ""
+mora_trie: Dict[str, dict] = {}
+for text in text2mora_with_unvoice:
+    node = mora_trie
+    for char in text:
+        node = node.setdefault(char, {})
+    node[_MORA_KEY] = text
+
+
 def _text_to_accent_phrase(phrase: str) -> AccentPhrase:
     """
     longest matchにより読み仮名からAccentPhraseを生成
-    入力長Nに対し計算量O(N^2)
+    トライ木を辿って最長一致する仮名を探すので、入力長Nに対し計算量O(N)
     """
     accent_index: Optional[int] = None
     moras: List[Mora] = []
 
-    base_index = 0  # パース開始位置。ここから右の文字列をstackに詰めていく。
-    stack = ""  # 保留中の文字列
-    matched_text: Optional[str] = None  # 保留中の文字列内で最後にマッチした仮名
+    base_index = 0  # パース開始位置
 
     outer_loop = 0
     while base_index < len(phrase):
@@ -56,21 +65,32 @@ def _text_to_accent_phrase(phrase: str) -> AccentPhrase:
             accent_index = len(moras)
             base_index += 1
             continue
+
+        # トライ木を辿れなくなるまで読み進め、最後にマッチした仮名を採用する
+        # アクセント記号はどの仮名にも含まれないので、アクセント記号の手前で必ず止まる
+        matched_text: Optional[str] = None
+        node = mora_trie
         for watch_index in range(base_index, len(phrase)):
-            if phrase[watch_index] == ACCENT_SYMBOL:
+            next_node = node.get(phrase[watch_index])
+            if next_node is None:
                 break
-            # 普通の文字の場合
-            stack += phrase[watch_index]
-            if stack in text2mora_with_unvoice:
-                matched_text = stack
+            node = next_node
+            matched_text = node.get(_MORA_KEY, matched_text)
+
         # push mora
         if matched_text is None:
-            raise ParseKanaError(ParseKanaErrorCode.UNKNOWN_TEXT, text=stack)
-        else:
-            moras.append(text2mora_with_unvoice[matched_text].copy(deep=True))
-            base_index += len(matched_text)
-            stack = ""
-            matched_text = None
+            # 次のアクセント記号(なければ末尾)までを、解釈できなかった文字列とする
+            accent_position = phrase.find(ACCENT_SYMBOL, base_index)
+            raise ParseKanaError(
+                ParseKanaErrorCode.UNKNOWN_TEXT,
+                text=phrase[
+                    base_index : accent_position if accent_position >= 0 else None
+                ],
+            )
+        # Moraのフィールドは全てイミュータブルなので、浅いコピーで十分
+        moras.append(text2mora_with_unvoice[matched_text].copy())
+        base_index += len(matched_text)
+        # 以前の実装と同じ入力を受け付けるように、ループ回数の上限は残している
         if outer_loop > LOOP_LIMIT:
             raise ParseKanaError(ParseKanaErrorCode.INFINITE_LOOP)
     if accent_index is None:
@@ -1,6 +1,7 @@
 from enum import Enum
 from re import findall, fullmatch
-from typing import Dict, List, Optional
+from typing import Any, Dict, List, Optional
+from uuid import UUID
 
 from pydantic import BaseModel, Field, StrictStr, conint, validator
 
@@ -102,8 +103,11 @@ class ParseKanaBadRequest(BaseModel):
     )
     error_args: Dict[str, str] = Field(title="エラーを起こした箇所")
 
-    def __init__(self, err: ParseKanaError):
-        super().__init__(text=err.text, error_name=err.errname, error_args=err.kwargs)
+    def __init__(self, err: Optional[ParseKanaError] = None, **data: Any):
+        # レスポンスの検証時には、各フィールドの値から作り直される
+        if err is not None:
+            data = dict(text=err.text, error_name=err.errname, error_args=err.kwargs)
+        super().__init__(**data)
 
 
 class MorphableTargetInfo(BaseModel):
@@ -160,6 +164,12 @@ class InstalledLibrary(DownloadableLibrary):
 USER_DICT_MIN_PRIORITY = 0
 USER_DICT_MAX_PRIORITY = 10
 
+# 半角の記号・英数字を全角に変換する表
+zenkaku_table = str.maketrans(
+    "".join(chr(0x21 + i) for i in range(94)),
+    "".join(chr(0xFF01 + i) for i in range(94)),
+)
+
 
 class UserDictWord(BaseModel):
     """
@@ -189,12 +199,7 @@ class UserDictWord(BaseModel):
 
     @validator("surface")
     def convert_to_zenkaku(cls, surface):
-        return surface.translate(
-            str.maketrans(
-                "".join(chr(0x21 + i) for i in range(94)),
-                "".join(chr(0xFF01 + i) for i in range(94)),
-            )
-        )
+        return surface.translate(zenkaku_table)
 
     @validator("pronunciation", pre=True)
     def check_is_katakana(cls, pronunciation):
@@ -273,6 +278,94 @@ class WordTypes(str, Enum):
     SUFFIX = "SUFFIX"
 
 
+class UserDictOperationType(str, Enum):
+    """
+    ユーザー辞書に対する一括操作の種類
+    """
+
+    ADD = "ADD"
+    UPDATE = "UPDATE"
+    DELETE = "DELETE"
+
+
+class UserDictOperation(BaseModel):
+    """
+    ユーザー辞書に対する一括操作の1件分
+    """
+
+    type: UserDictOperationType = Field(title="操作の種類")
+    word_uuid: Optional[str] = Field(title="更新・削除する言葉のUUID")
+    surface: Optional[str] = Field(title="言葉の表層形")
+    pronunciation: Optional[str] = Field(title="言葉の発音（カタカナ）")
+    accent_type: Optional[int] = Field(title="アクセント型")
+    word_type: Optional[WordTypes] = Field(title="品詞")
+    priority: Optional[int] = Field(title="優先度")
+
+
+class UserDictOperationResult(BaseModel):
+    """
+    ユーザー辞書に対する一括操作の1件分の結果
+    """
+
+    success: bool = Field(title="操作に成功したか")
+    word_uuid: Optional[str] = Field(title="操作した言葉のUUID")
+    error: Optional[str] = Field(title="失敗した理由")
+
+
+class UserDictImportFormat(str, Enum):
+    """
+    ユーザー辞書のストリーミングインポートで受け付けるファイルの形式
+    """
+
+    CSV = "csv"
+    JSONL = "jsonl"
+
+
+class UserDictImportRow(BaseModel):
+    """
+    ユーザー辞書のストリーミングインポートで読み込む1行分の言葉
+    CSVでは1行目に列名として、JSONLでは各行のキーとして指定する
+    """
+
+    word_uuid: Optional[UUID] = Field(title="言葉のUUID。指定しない場合は新しく割り振る")
+    surface: str = Field(title="言葉の表層形")
+    pronunciation: str = Field(title="言葉の発音（カタカナ）")
+    accent_type: int = Field(title="アクセント型")
+    word_type: Optional[WordTypes] = Field(title="品詞")
+    priority: Optional[int] = Field(title="優先度")
+
+
+class UserDictImportError(BaseModel):
+    """
+    ユーザー辞書のストリーミングインポートで読み込めなかった行
+    """
+
+    line: int = Field(title="行番号")
+    error: str = Field(title="読み込めなかった理由")
+
+
+class UserDictImportProgress(BaseModel):
+    """
+    ユーザー辞書のストリーミングインポートの進捗
+    """
+
+    processed: int = Field(title="読み込んだ行数")
+    imported: int = Field(title="辞書に書き込んだ言葉の数")
+    failed: int = Field(title="読み込めなかった行数")
+    errors: List[UserDictImportError] = Field(title="前回の進捗から新たに見つかった、読み込めなかった行")
+    done: bool = Field(title="インポートと辞書のコンパイルが終わったか")
+    error: Optional[str] = Field(title="インポートを中断した理由")
+
+
+class UserDictStatus(BaseModel):
+    """
+    ユーザー辞書の反映状況
+    """
+
+    version: int = Field(title="OpenJTalkに読み込まれているユーザー辞書の世代番号")
+    pending: bool = Field(title="OpenJTalkへの反映を待っている変更があるか")
+
+
 class SupportedDevicesInfo(BaseModel):
     """
     対応しているデバイスの情報
@@ -314,6 +407,17 @@ class SVModelInfo(BaseModel):
     )
 
 
+class SVModelUploadInfo(BaseModel):
+    """
+    ファイルを個別にアップロードしたSVモデルを登録するための情報
+    """
+
+    uuid: str = Field(title="モデル固有のUUID")
+    metas: List[Speaker] = Field(title="metas.jsonをlistにしたモデルのメタ情報")
+    model_config: ModelConfig = Field(title="model_config.jsonをdictにした機械学習に利用するための情報")
+    policies: Dict[str, str] = Field(title="keyをspeakerのUUIDとした各話者のpolicy.md")
+
+
 class VvlibManifest(BaseModel):
     """
     vvlib(VOICEVOX Library)に関する情報
@@ -326,3 +430,35 @@ class VvlibManifest(BaseModel):
     brand_name: StrictStr = Field(title="エンジンのブランド名")
     engine_name: StrictStr = Field(title="エンジン名")
     engine_uuid: StrictStr = Field(title="エンジンのUUID")
+
+
+class AccentPhraseCacheInfo(BaseModel):
+    """
+    テキスト解析結果のキャッシュの情報
+    """
+
+    hits: int = Field(title="キャッシュにヒットした回数")
+    misses: int = Field(title="キャッシュにヒットしなかった回数")
+    hit_rate: float = Field(title="キャッシュのヒット率")
+    size: int = Field(title="キャッシュしているテキストの数")
+    maxsize: int = Field(title="キャッシュできるテキストの最大数")
+    memory_bytes: int = Field(title="キャッシュが使用しているおおよそのメモリ量(バイト)")
+    user_dict_version: int = Field(title="キャッシュが対応しているユーザー辞書の世代番号")
+
+
+class MorphingParameterCacheInfo(BaseModel):
+    """
+    モーフィング用パラメータのキャッシュの情報
+    """
+
+    hits: int = Field(title="メモリ上のキャッシュにヒットした回数")
+    disk_hits: int = Field(title="ディスクに保存したキャッシュにヒットした回数")
+    misses: int = Field(title="キャッシュにヒットしなかった回数")
+    hit_rate: float = Field(title="キャッシュのヒット率")
+    evictions: int = Field(title="メモリから追い出したパラメータの数")
+    size: int = Field(title="メモリ上にキャッシュしているパラメータの数")
+    memory_bytes: int = Field(title="メモリ上にキャッシュしているパラメータの合計バイト数")
+    max_memory_bytes: int = Field(title="メモリ上にキャッシュできるパラメータの合計バイト数の上限")
+    disk_size: int = Field(title="ディスクに保存しているパラメータの数")
+    disk_bytes: int = Field(title="ディスクに保存しているパラメータの合計バイト数")
+    max_disk_bytes: int = Field(title="ディスクに保存できるパラメータの合計バイト数の上限")
@@ -1,16 +1,18 @@
-from copy import deepcopy
+import multiprocessing
+from concurrent.futures import Future, ProcessPoolExecutor
 from dataclasses import dataclass
-from itertools import chain
-from typing import Dict, List, Tuple
+from enum import Enum
+from typing import Any, Callable, Dict, Iterator, List, Optional, Tuple, TypeVar
 
 import numpy as np
-import pyworld as pw
-from scipy.signal import resample
 
-from .metas.Metas import Speaker, SpeakerSupportPermittedSynthesisMorphing, StyleInfo
+from .metas.Metas import Speaker, SpeakerSupportPermittedSynthesisMorphing
 from .metas.MetasStore import construct_lookup
 from .model import AudioQuery, MorphableTargetInfo, SpeakerNotFoundError
 from .synthesis_engine import SynthesisEngine
+from .utility.wave_utility import resample_wave
+
+T = TypeVar("T")
 
 
 # FIXME: ndarray type hint, https://github.com/JeremyCCHsu/Python-Wrapper-for-World-Vocoder/blob/2b64f86197573497c685c785c6e0e743f407b63e/pyworld/pyworld.pyx#L398  # noqa
@@ -24,140 +26,414 @@ class MorphingParameter:
     target_spectrogram: np.ndarray
 
 
-def create_morphing_parameter(
-    base_wave: np.ndarray,
-    target_wave: np.ndarray,
+class TargetF0Method(str, Enum):
+    """
+    ターゲット話者のスペクトル包絡を求める際に使う基本周波数の推定方法
+    """
+
+    # harvestで推定する。最も精度が高いが遅い
+    HARVEST = "harvest"
+    # dioで推定した後stonemaskで補正する。harvestより数倍速い
+    DIO = "dio"
+    # 推定せずにベース話者の基本周波数を使う。最も速いが、話者の声の高さが大きく違うと音質が下がる
+    BASE = "base"
+
+
+class MorphingQuality(str, Enum):
+    """
+    モーフィングの品質。品質を下げるほど、解析が速くなりパラメータのキャッシュに必要なメモリが減る
+    """
+
+    HIGH = "high"
+    STANDARD = "standard"
+    FAST = "fast"
+
+
+@dataclass(frozen=True)
+class MorphingQualitySetting:
+    """
+    frame_period: WORLDで解析するフレームの間隔(ミリ秒)
+    analysis_sampling_rate: 解析するサンプリングレート。音声合成のサンプリングレートより高い場合と、Noneの場合は変換しない
+    fft_size: スペクトル包絡と非周期性指標を求めるFFTの長さ。Noneの場合はサンプリングレートから決める
+    dtype: パラメータを保持する型。WORLDで合成する際はfloat64に変換する
+    """
+
+    frame_period: float
+    analysis_sampling_rate: Optional[int]
+    fft_size: Optional[int]
+    dtype: type
+
+
+morphing_quality_settings: Dict[MorphingQuality, MorphingQualitySetting] = {
+    MorphingQuality.HIGH: MorphingQualitySetting(
+        frame_period=1.0, analysis_sampling_rate=None, fft_size=None, dtype=np.float64
+    ),
+    MorphingQuality.STANDARD: MorphingQualitySetting(
+        frame_period=2.5, analysis_sampling_rate=None, fft_size=None, dtype=np.float32
+    ),
+    # 16kHzまで下げると8kHz以上の成分が失われて音質が大きく下がるので、24kHzで解析する
+    MorphingQuality.FAST: MorphingQualitySetting(
+        frame_period=5.0, analysis_sampling_rate=24000, fft_size=None, dtype=np.float32
+    ),
+}
+
+
+def _estimate_f0(
+    wave: np.ndarray, fs: int, frame_period: float, method: TargetF0Method
+) -> Tuple[np.ndarray, np.ndarray]:
+    import pyworld as pw
+
+    if method == TargetF0Method.DIO:
+        f0, time_axis = pw.dio(wave, fs, frame_period=frame_period)
+        return pw.stonemask(wave, f0, time_axis, fs), time_axis
+    return pw.harvest(wave, fs, frame_period=frame_period)
+
+
+def _cheaptrick(
+    wave: np.ndarray,
+    f0: np.ndarray,
+    time_axis: np.ndarray,
     fs: int,
-) -> MorphingParameter:
-    frame_period = 1.0
-    base_f0, base_time_axis = pw.harvest(base_wave, fs, frame_period=frame_period)
-    base_spectrogram = pw.cheaptrick(base_wave, base_f0, base_time_axis, fs)
-    base_aperiodicity = pw.d4c(base_wave, base_f0, base_time_axis, fs)
+    fft_size: Optional[int],
+) -> np.ndarray:
+    import pyworld as pw
 
-    target_f0, morph_time_axis = pw.harvest(target_wave, fs, frame_period=frame_period)
-    target_spectrogram = pw.cheaptrick(target_wave, target_f0, morph_time_axis, fs)
-    target_spectrogram.resize(base_spectrogram.shape)
+    return pw.cheaptrick(wave, f0, time_axis, fs, fft_size=fft_size)
 
-    return MorphingParameter(
-        fs=fs,
-        frame_period=frame_period,
-        base_f0=base_f0,
-        base_aperiodicity=base_aperiodicity,
-        base_spectrogram=base_spectrogram,
-        target_spectrogram=target_spectrogram,
-    )
 
+def _d4c(
+    wave: np.ndarray,
+    f0: np.ndarray,
+    time_axis: np.ndarray,
+    fs: int,
+    fft_size: Optional[int],
+) -> np.ndarray:
+    import pyworld as pw
 
-def get_morphable_targets(
-    speakers: List[Speaker],
-    base_speakers: List[int],
-) -> List[Dict[int, MorphableTargetInfo]]:
+    return pw.d4c(wave, f0, time_axis, fs, fft_size=fft_size)
+
+
+def _fit_frames(spectrogram: np.ndarray, num_frames: int) -> np.ndarray:
     """
-    speakers: 全話者の情報
-    base_speakers: モーフィング可能か判定したいベースの話者リスト（スタイルID）
+    ターゲット話者のスペクトル包絡のフレーム数をベース話者に合わせる。足りないフレームは0で埋める
+    ndarray.resizeと違い、フレーム数が同じ場合はコピーせず、配列がデータを所有していなくても使える
     """
-    speaker_lookup = construct_lookup(speakers)
+    if len(spectrogram) >= num_frames:
+        return spectrogram[:num_frames]
+    return np.pad(spectrogram, ((0, num_frames - len(spectrogram)), (0, 0)))
 
-    morphable_targets_arr = []
-    for base_speaker in base_speakers:
-        morphable_targets = dict()
-        for style in chain.from_iterable(speaker.styles for speaker in speakers):
-            morphable_targets[style.id] = MorphableTargetInfo(
-                is_morphable=is_synthesis_morphing_permitted(
-                    speaker_lookup=speaker_lookup,
-                    base_speaker=base_speaker,
-                    target_speaker=style.id,
-                )
-            )
-        morphable_targets_arr.append(morphable_targets)
 
-    return morphable_targets_arr
+def _warm_up() -> None:
+    """
+    ワーカープロセスで実行される。最初のリクエストの前にpyworldを読み込んでおく
+    """
+    import pyworld  # noqa: F401
 
 
-def is_synthesis_morphing_permitted(
-    speaker_lookup: Dict[int, Tuple[Speaker, StyleInfo]],
-    base_speaker: int,
-    target_speaker: int,
-) -> bool:
+class MorphingAnalysisPool:
     """
-    指定されたspeakerがモーフィング可能かどうか返す
-    speakerが見つからない場合はSpeakerNotFoundErrorを送出する
+    モーフィングのためのWORLDの解析と合成を行うプロセスプール
+    pyworldは処理中にGILを解放しないので、ベース話者とターゲット話者の解析や、複数の割合での合成を別のプロセスで同時に行う
     """
 
-    base_speaker_data = speaker_lookup[base_speaker]
-    target_speaker_data = speaker_lookup[target_speaker]
+    def __init__(self, num_processes: int):
+        # onnxruntimeなどを読み込んだプロセスをforkしないように、spawnでプロセスを作る
+        self._executor = ProcessPoolExecutor(
+            max_workers=num_processes,
+            mp_context=multiprocessing.get_context("spawn"),
+        )
+        self.num_processes = num_processes
+        # プロセスの起動とpyworldの読み込みを最初のモーフィングの待ち時間に含めないよう、先に済ませておく
+        for _ in range(num_processes):
+            self._executor.submit(_warm_up)
+
+    def submit(self, fn: Callable[..., T], *args: Any) -> "Future[T]":
+        return self._executor.submit(fn, *args)
+
+    def shutdown(self) -> None:
+        self._executor.shutdown()
+
+
+# Noneの場合は、呼び出し元のスレッドで順番に解析する
+morphing_analysis_pool: Optional[MorphingAnalysisPool] = None
+
+
+def set_morphing_analysis_pool(pool: Optional[MorphingAnalysisPool]) -> None:
+    global morphing_analysis_pool
+    morphing_analysis_pool = pool
+
+
+def _submit(
+    pool: Optional[MorphingAnalysisPool], fn: Callable[..., T], *args: Any
+) -> "Future[T]":
+    if pool is not None:
+        return pool.submit(fn, *args)
+    future: "Future[T]" = Future()
+    future.set_result(fn(*args))
+    return future
+
+
+class _MorphingAnalysis:
+    """
+    ベース話者とターゲット話者の波形を解析してモーフィング用パラメータを作る
+    各話者の波形が得られた時点で解析を始めるので、ターゲット話者の音声合成とベース話者の解析を重ねられる
+    """
 
-    if base_speaker_data is None or target_speaker_data is None:
-        raise SpeakerNotFoundError(
-            base_speaker if base_speaker_data is None else target_speaker
+    def __init__(
+        self,
+        fs: int,
+        target_f0_method: TargetF0Method,
+        quality: MorphingQuality,
+        pool: Optional[MorphingAnalysisPool],
+    ):
+        self.setting = morphing_quality_settings[quality]
+        self.wave_fs = fs
+        self.fs = min(fs, self.setting.analysis_sampling_rate or fs)
+        self.target_f0_method = target_f0_method
+        self.pool = pool
+
+    def _prepare(self, wave: np.ndarray) -> np.ndarray:
+        # pyworldはfloat64の波形しか受け付けないので、ここでのみfloat64に変換する
+        return resample_wave(wave, self.wave_fs, self.fs).astype(np.float64)
+
+    def analyze_base(self, base_wave: np.ndarray) -> None:
+        self.base_wave = self._prepare(base_wave)
+        self.base_f0 = _submit(
+            self.pool,
+            _estimate_f0,
+            self.base_wave,
+            self.fs,
+            self.setting.frame_period,
+            TargetF0Method.HARVEST,
         )
 
-    base_speaker_info, _ = base_speaker_data
-    target_speaker_info, _ = target_speaker_data
+    def analyze_target(self, target_wave: np.ndarray) -> None:
+        self.target_wave = self._prepare(target_wave)
+        if self.target_f0_method == TargetF0Method.BASE:
+            self.target_f0 = self.base_f0
+        else:
+            self.target_f0 = _submit(
+                self.pool,
+                _estimate_f0,
+                self.target_wave,
+                self.fs,
+                self.setting.frame_period,
+                self.target_f0_method,
+            )
+
+    def result(self) -> MorphingParameter:
+        # 基本周波数が求まったものから、スペクトル包絡と非周期性指標を同時に求める
+        fft_size = self.setting.fft_size
+        base_f0, base_time_axis = self.base_f0.result()
+        base_spectrogram = _submit(
+            self.pool,
+            _cheaptrick,
+            self.base_wave,
+            base_f0,
+            base_time_axis,
+            self.fs,
+            fft_size,
+        )
+        base_aperiodicity = _submit(
+            self.pool, _d4c, self.base_wave, base_f0, base_time_axis, self.fs, fft_size
+        )
+        target_spectrogram = _submit(
+            self.pool,
+            _cheaptrick,
+            self.target_wave,
+            *self.target_f0.result(),
+            self.fs,
+            fft_size,
+        ).result()
+
+        dtype = self.setting.dtype
+        return MorphingParameter(
+            fs=self.fs,
+            frame_period=self.setting.frame_period,
+            base_f0=base_f0.astype(dtype, copy=False),
+            base_aperiodicity=base_aperiodicity.result().astype(dtype, copy=False),
+            base_spectrogram=base_spectrogram.result().astype(dtype, copy=False),
+            target_spectrogram=_fit_frames(target_spectrogram, len(base_f0)).astype(
+                dtype, copy=False
+            ),
+        )
 
-    base_speaker_uuid = base_speaker_info.speaker_uuid
-    target_speaker_uuid = target_speaker_info.speaker_uuid
 
-    base_speaker_morphing_info: SpeakerSupportPermittedSynthesisMorphing = (
-        base_speaker_info.supported_features.permitted_synthesis_morphing
+def create_morphing_parameter(
+    base_wave: np.ndarray,
+    target_wave: np.ndarray,
+    fs: int,
+    target_f0_method: TargetF0Method = TargetF0Method.HARVEST,
+    quality: MorphingQuality = MorphingQuality.HIGH,
+) -> MorphingParameter:
+    analysis = _MorphingAnalysis(
+        fs=fs,
+        target_f0_method=target_f0_method,
+        quality=quality,
+        pool=morphing_analysis_pool,
     )
+    analysis.analyze_base(base_wave)
+    analysis.analyze_target(target_wave)
+    return analysis.result()
 
-    target_speaker_morphing_info: SpeakerSupportPermittedSynthesisMorphing = (
-        target_speaker_info.supported_features.permitted_synthesis_morphing
+
+@dataclass(frozen=True)
+class MorphingPermissionMatrix:
+    """
+    スタイルID同士のモーフィング可否を事前計算した行列
+    matrix[i, j]はstyle_ids[i]をベース、style_ids[j]をターゲットとしたときの可否
+    """
+
+    style_ids: List[int]
+    style_index: Dict[int, int]
+    matrix: np.ndarray
+
+    def row(self, base_speaker: int) -> np.ndarray:
+        """
+        指定したベース話者に対する全スタイルのモーフィング可否を返す
+        speakerが見つからない場合はSpeakerNotFoundErrorを送出する
+        """
+        index = self.style_index.get(base_speaker)
+        if index is None:
+            raise SpeakerNotFoundError(base_speaker)
+        return self.matrix[index]
+
+    def is_permitted(self, base_speaker: int, target_speaker: int) -> bool:
+        """
+        指定したspeakerがモーフィング可能かどうか返す
+        speakerが見つからない場合はSpeakerNotFoundErrorを送出する
+        """
+        target_index = self.style_index.get(target_speaker)
+        if target_index is None:
+            raise SpeakerNotFoundError(target_speaker)
+        return bool(self.row(base_speaker)[target_index])
+
+
+def construct_morphing_permission_matrix(
+    speakers: List[Speaker],
+) -> MorphingPermissionMatrix:
+    """
+    話者ごとの`permitted_synthesis_morphing`から、全スタイル間のモーフィング可否を計算する
+    どちらかがNOTHINGの場合は不可、どちらかがSELF_ONLYの場合は同一話者のみ可、双方がALLの場合は可
+    モーフィングの可否はこの関数で作った表だけをもとに判定する
+    speakers: 全話者の情報
+    """
+    speaker_lookup = construct_lookup(speakers)
+    style_ids = list(speaker_lookup.keys())
+
+    permissions = np.array(
+        [
+            speaker.supported_features.permitted_synthesis_morphing.value
+            for speaker, _ in speaker_lookup.values()
+        ],
+        dtype=object,
+    )
+    _, speaker_indexes = np.unique(
+        [speaker.speaker_uuid for speaker, _ in speaker_lookup.values()],
+        return_inverse=True,
     )
 
-    # 禁止されている場合はFalse
-    if (
-        base_speaker_morphing_info == SpeakerSupportPermittedSynthesisMorphing.NOTHING
-        or target_speaker_morphing_info
-        == SpeakerSupportPermittedSynthesisMorphing.NOTHING
-    ):
-        return False
-    # 同一話者のみの場合は同一話者判定
-    if (
-        base_speaker_morphing_info == SpeakerSupportPermittedSynthesisMorphing.SELF_ONLY
-        or target_speaker_morphing_info
-        == SpeakerSupportPermittedSynthesisMorphing.SELF_ONLY
-    ):
-        return base_speaker_uuid == target_speaker_uuid
-    # 念のため許可されているかチェック
-    return (
-        base_speaker_morphing_info == SpeakerSupportPermittedSynthesisMorphing.ALL
-        and target_speaker_morphing_info == SpeakerSupportPermittedSynthesisMorphing.ALL
+    is_all = permissions == SpeakerSupportPermittedSynthesisMorphing.ALL.value
+    is_nothing = permissions == SpeakerSupportPermittedSynthesisMorphing.NOTHING.value
+    is_same_speaker = speaker_indexes[:, np.newaxis] == speaker_indexes[np.newaxis, :]
+
+    # 禁止されている組み合わせを除き、双方が全て許可しているか同一話者であれば許可
+    matrix = ~(is_nothing[:, np.newaxis] | is_nothing[np.newaxis, :]) & (
+        (is_all[:, np.newaxis] & is_all[np.newaxis, :]) | is_same_speaker
     )
 
+    return MorphingPermissionMatrix(
+        style_ids=style_ids,
+        style_index={style_id: i for i, style_id in enumerate(style_ids)},
+        matrix=matrix,
+    )
+
+
+def get_morphable_targets(
+    permission_matrix: MorphingPermissionMatrix,
+    base_speakers: List[int],
+) -> List[Dict[int, MorphableTargetInfo]]:
+    """
+    permission_matrix: `construct_morphing_permission_matrix`で作成した全話者のモーフィング可否
+    base_speakers: モーフィング可能か判定したいベースの話者リスト（スタイルID）
+    """
+    morphable = MorphableTargetInfo(is_morphable=True)
+    not_morphable = MorphableTargetInfo(is_morphable=False)
+
+    morphable_targets_arr = []
+    for base_speaker in base_speakers:
+        morphable_targets_arr.append(
+            {
+                style_id: morphable if is_morphable else not_morphable
+                for style_id, is_morphable in zip(
+                    permission_matrix.style_ids,
+                    permission_matrix.row(base_speaker).tolist(),
+                )
+            }
+        )
+
+    return morphable_targets_arr
+
 
 def synthesis_morphing_parameter(
     engine: SynthesisEngine,
     query: AudioQuery,
     base_speaker: int,
     target_speaker: int,
+    target_f0_method: TargetF0Method = TargetF0Method.HARVEST,
+    quality: MorphingQuality = MorphingQuality.HIGH,
 ) -> MorphingParameter:
-    query = deepcopy(query)
-
     # 不具合回避のためデフォルトのサンプリングレートでWORLDに掛けた後に指定のサンプリングレートに変換する
-    query.outputSamplingRate = engine.default_sampling_rate
-
-    # WORLDに掛けるため合成はモノラルで行う
-    query.outputStereo = False
+    query = query.copy(update={"outputSamplingRate": engine.default_sampling_rate})
 
-    base_wave = engine.synthesis(query=query, speaker_id=base_speaker).astype("float")
-    target_wave = engine.synthesis(query=query, speaker_id=target_speaker).astype(
-        "float"
+    analysis = _MorphingAnalysis(
+        fs=query.outputSamplingRate,
+        target_f0_method=target_f0_method,
+        quality=quality,
+        pool=morphing_analysis_pool,
     )
+    # 音声合成はエンジンごとに排他されるので、ベース話者の解析をターゲット話者の音声合成と並行して行う
+    analysis.analyze_base(engine.synthesis(query=query, speaker_id=base_speaker))
+    analysis.analyze_target(engine.synthesis(query=query, speaker_id=target_speaker))
+    return analysis.result()
 
-    return create_morphing_parameter(
-        base_wave=base_wave,
-        target_wave=target_wave,
-        fs=query.outputSamplingRate,
+
+def _synthesize_morphing(
+    f0: np.ndarray,
+    base_spectrogram: np.ndarray,
+    target_spectrogram: np.ndarray,
+    aperiodicity: np.ndarray,
+    fs: int,
+    frame_period: float,
+    morph_rate: float,
+) -> np.ndarray:
+    """
+    ワーカープロセスで実行される。スペクトル包絡を補間してからWORLDで合成する
+    補間したスペクトル包絡は割合ごとに作るので、呼び出し元からは解析結果と割合だけを渡せばよい
+    """
+    import pyworld as pw
+
+    rate = np.asarray(morph_rate, dtype=base_spectrogram.dtype)
+    morph_spectrogram = base_spectrogram * (1.0 - rate) + target_spectrogram * rate
+
+    # パラメータをfloat32で保持している場合も、WORLDにはfloat64で渡す
+    return pw.synthesize(
+        f0.astype(np.float64, copy=False),
+        morph_spectrogram.astype(np.float64, copy=False),
+        aperiodicity.astype(np.float64, copy=False),
+        fs,
+        frame_period,
     )
 
 
+# /multi_synthesis_morphingで1回のリクエストに指定できる割合の数の上限
+MAX_MORPH_RATES = 16
+
+
 def synthesis_morphing(
     morph_param: MorphingParameter,
     morph_rate: float,
     output_fs: int,
-    output_stereo: bool = False,
 ) -> np.ndarray:
     """
     指定した割合で、パラメータをもとにモーフィングした音声を生成します。
@@ -174,35 +450,178 @@ def synthesis_morphing(
     Returns
     -------
     generated : np.ndarray
-        モーフィングした音声
+        モーフィングした音声(float32のモノラル波形)
 
     Raises
     -------
     ValueError
         morph_rate ∈ [0, 1]
     """
+    return next(
+        synthesis_morphing_multi(
+            morph_param=morph_param, morph_rates=[morph_rate], output_fs=output_fs
+        )
+    )
 
-    if morph_rate < 0.0 or morph_rate > 1.0:
-        raise ValueError("morph_rateは0.0から1.0の範囲で指定してください")
 
-    morph_spectrogram = (
-        morph_param.base_spectrogram * (1.0 - morph_rate)
-        + morph_param.target_spectrogram * morph_rate
-    )
+def synthesis_morphing_multi(
+    morph_param: MorphingParameter,
+    morph_rates: List[float],
+    output_fs: int,
+) -> Iterator[np.ndarray]:
+    """
+    複数の割合で、パラメータをもとにモーフィングした音声をまとめて生成します。
+    スペクトル包絡の補間とWORLDによる音声の合成は割合ごとに行い、`morphing_analysis_pool`があれば並列に行います。
+    音声は合成できたものから順に返すので、全ての割合の音声を同時に保持する必要はありません。
+
+    Parameters
+    ----------
+    morph_param : MorphingParameter
+        `synthesis_morphing_parameter`または`create_morphing_parameter`で作成したパラメータ
+
+    morph_rates : List[float]
+        モーフィングの割合のリスト
+
+    Returns
+    -------
+    generated : Iterator[np.ndarray]
+        morph_ratesの順に、モーフィングした音声(float32のモノラル波形)を返すイテレータ
 
-    y_h = pw.synthesize(
+    Raises
+    -------
+    ValueError
+        morph_rate ∈ [0, 1]
+    """
+
+    if any(morph_rate < 0.0 or morph_rate > 1.0 for morph_rate in morph_rates):
+        raise ValueError("morph_rateは0.0から1.0の範囲で指定してください")
+
+    args = (
         morph_param.base_f0,
-        morph_spectrogram,
+        morph_param.base_spectrogram,
+        morph_param.target_spectrogram,
         morph_param.base_aperiodicity,
         morph_param.fs,
         morph_param.frame_period,
     )
+    # 1つだけの場合はプロセス間で受け渡すよりその場で合成した方が速い
+    pool = morphing_analysis_pool if len(morph_rates) > 1 else None
+    if pool is None:
+        # 補間したスペクトル包絡が同時に1つしか存在しないよう、取り出されるたびに1つずつ合成する
+        waves: Iterator[np.ndarray] = (
+            _synthesize_morphing(*args, morph_rate) for morph_rate in morph_rates
+        )
+    else:
+        # プロセスプールは空いているプロセスの分しか引数を送らないので、全ての割合を一度に渡してよい
+        futures = [
+            pool.submit(_synthesize_morphing, *args, morph_rate)
+            for morph_rate in morph_rates
+        ]
+        waves = (future.result() for future in futures)
+
+    # WORLDの出力はfloat64なので、リサンプルの前にfloat32にしておく
+    return (
+        resample_wave(wave.astype(np.float32), morph_param.fs, output_fs)
+        for wave in waves
+    )
+
+
+def synthesis_morphing_stream(
+    morph_param: MorphingParameter,
+    morph_rate: float,
+    output_fs: int,
+    block_seconds: float = 0.5,
+    overlap_seconds: float = 0.05,
+) -> Iterator[np.ndarray]:
+    """
+    `synthesis_morphing`と同じ音声を、block_secondsごとに区切って合成しながら返します。
+    最初の音声は音声全体の長さによらず、1ブロック分を合成した時点で得られます。
+
+    WORLDは合成を始めた位置によってパルスの位置が変わるため、ブロックを単純につなぐと境界で波形が不連続になります。
+    そのため各ブロックは前後にoverlap_secondsずつ余分に合成し、境界の後ろのoverlap_secondsの半分の区間で
+    前のブロックから次のブロックへクロスフェードします。
+    余分に合成した区間の残りは、リサンプルによって端に生じる歪みを捨てるために使います。
+
+    Parameters
+    ----------
+    morph_param : MorphingParameter
+        `synthesis_morphing_parameter`または`create_morphing_parameter`で作成したパラメータ
+
+    morph_rate : float
+        モーフィングの割合
+        0.0でベースの話者、1.0でターゲットの話者に近づきます。
 
-    # TODO: synthesis_engine.py でのリサンプル処理と共通化する
-    if output_fs != morph_param.fs:
-        y_h = resample(y_h, output_fs * len(y_h) // morph_param.fs)
+    block_seconds : float
+        1回に合成する長さ(秒)
 
-    if output_stereo:
-        y_h = np.array([y_h, y_h]).T
+    overlap_seconds : float
+        ブロックの前後に余分に合成する長さ(秒)
+
+    Returns
+    -------
+    generated : Iterator[np.ndarray]
+        モーフィングした音声(float32のモノラル波形)を先頭から順に返すイテレータ
+
+    Raises
+    -------
+    ValueError
+        morph_rate ∈ [0, 1]
+    """
+
+    if morph_rate < 0.0 or morph_rate > 1.0:
+        raise ValueError("morph_rateは0.0から1.0の範囲で指定してください")
+
+    num_frames = len(morph_param.base_f0)
+    frame_seconds = morph_param.frame_period / 1000
+    block_frames = max(1, round(block_seconds / frame_seconds))
+    overlap_frames = max(1, round(overlap_seconds / frame_seconds))
+    output_frame_samples = output_fs * frame_seconds
+    crossfade_samples = int(overlap_frames * output_frame_samples / 2)
+    fade_in = np.linspace(0.0, 1.0, crossfade_samples, endpoint=False, dtype=np.float32)
+
+    # synthesis_morphingで音声全体を合成した場合の長さ。最後のブロックはこの長さに合わせる
+    # pyworldの出力はint(フレーム数 * frame_period * fs / 1000)サンプルになり、
+    # resample_waveはそれをoutput_fs * 長さ // fsサンプルに変換する
+    world_samples = int(num_frames * morph_param.frame_period * morph_param.fs / 1000)
+    total_samples = output_fs * world_samples // morph_param.fs
+
+    # 前のブロックが次のブロックの先頭の区間に合成した音声
+    tail: Optional[np.ndarray] = None
+    for start in range(0, num_frames, block_frames):
+        end = min(start + block_frames, num_frames)
+        synthesis_start = max(start - overlap_frames, 0)
+        synthesis_end = min(end + overlap_frames, num_frames)
+
+        wave = _synthesize_morphing(
+            morph_param.base_f0[synthesis_start:synthesis_end],
+            morph_param.base_spectrogram[synthesis_start:synthesis_end],
+            morph_param.target_spectrogram[synthesis_start:synthesis_end],
+            morph_param.base_aperiodicity[synthesis_start:synthesis_end],
+            morph_param.fs,
+            morph_param.frame_period,
+            morph_rate,
+        )
+        wave = resample_wave(wave.astype(np.float32), morph_param.fs, output_fs)
+
+        # 合成した音声のうち、このブロックのフレームに対応する区間を切り出す
+        # 境界は音声全体での位置を丸めてから求め、ブロックごとの丸め誤差が積み重ならないようにする
+        offset = round(synthesis_start * output_frame_samples)
+        block_start = round(start * output_frame_samples) - offset
+        if end < num_frames:
+            block_end = round(end * output_frame_samples) - offset
+        else:
+            block_end = total_samples - offset
+        block = wave[block_start:block_end].copy()
+        if len(block) < block_end - block_start:
+            # 最後のブロックだけを合成すると、リサンプルの切り捨てで全体より短くなることがある
+            block = np.pad(block, (0, block_end - block_start - len(block)))
+
+        if tail is not None:
+            length = min(len(tail), len(block))
+            block[:length] = (
+                tail[:length] * (1.0 - fade_in[:length])
+                + block[:length] * fade_in[:length]
+            )
+        tail = wave[block_end : block_end + crossfade_samples]
 
-    return y_h
+        yield block
@@ -0,0 +1,233 @@
+import re
+import threading
+from collections import OrderedDict
+from concurrent.futures import Future
+from dataclasses import fields
+from hashlib import sha256
+from pathlib import Path
+from typing import Callable, Dict, Optional
+
+import numpy as np
+
+from .model import AudioQuery, MorphingParameterCacheInfo
+from .morphing import MorphingParameter
+
+# morphing_parameter_keyが返すキーの形式
+_key_pattern = re.compile(r"[0-9a-f]{64}")
+
+# モーフィング用パラメータの生成に影響しないAudioQueryのフィールド
+# synthesis_morphing_parameterはデフォルトのサンプリングレートで合成するので、出力の形式は含めない
+_ignored_query_fields = {"outputSamplingRate", "outputStereo", "kana"}
+
+
+def morphing_parameter_key(
+    core_version: str, query: AudioQuery, base_speaker: int, target_speaker: int
+) -> str:
+    """
+    モーフィング用パラメータをキャッシュするためのキーを作る
+    AudioQuery全体を再帰的にハッシュする代わりに、JSONにしたもののダイジェストを使う
+    """
+    digest = sha256()
+    digest.update(f"{core_version}\n{base_speaker}\n{target_speaker}\n".encode())
+    digest.update(query.json(exclude=_ignored_query_fields).encode())
+    return digest.hexdigest()
+
+
+def morphing_parameter_nbytes(morph_param: MorphingParameter) -> int:
+    return sum(
+        value.nbytes
+        for value in (getattr(morph_param, field.name) for field in fields(morph_param))
+        if isinstance(value, np.ndarray)
+    )
+
+
+class MorphingParameterCache:
+    """
+    モーフィング用パラメータのLRUキャッシュ
+    パラメータはスペクトログラムを含み、音声の長さによって大きさが大きく変わるので、件数ではなくバイト数で上限を決める
+    spill_dirを指定すると、メモリから追い出したパラメータをmax_disk_bytesまでディスクに保存し、次に使うときに読み込む
+
+    Parameters
+    ----------
+    max_bytes: int
+        メモリに保持するパラメータの合計バイト数の上限
+    spill_dir: Optional[Path]
+        メモリから追い出したパラメータを保存するディレクトリ
+    max_disk_bytes: int
+        ディスクに保存するパラメータの合計バイト数の上限
+    """
+
+    def __init__(
+        self,
+        max_bytes: int = 512 * 1024**2,
+        spill_dir: Optional[Path] = None,
+        max_disk_bytes: int = 2 * 1024**3,
+    ):
+        self.max_bytes = max_bytes
+        self.spill_dir = spill_dir
+        self.max_disk_bytes = max_disk_bytes if spill_dir is not None else 0
+        if spill_dir is not None:
+            spill_dir.mkdir(parents=True, exist_ok=True)
+            # 前回起動時に保存したファイルは使わないので削除する
+            for path in spill_dir.glob("*.npz"):
+                if _key_pattern.fullmatch(path.stem):
+                    path.unlink()
+
+        self._entries: "OrderedDict[str, MorphingParameter]" = OrderedDict()
+        self._disk_entries: "OrderedDict[str, int]" = OrderedDict()
+        self._memory_bytes = 0
+        self._disk_bytes = 0
+        self._hits = 0
+        self._disk_hits = 0
+        self._misses = 0
+        self._evictions = 0
+        # 作成中のパラメータ。同じキーで同時に呼ばれた場合に、解析を1回で済ませる
+        self._creating: Dict[str, "Future[MorphingParameter]"] = {}
+        self._lock = threading.Lock()
+
+    def get_or_create(
+        self, key: str, create: Callable[[], MorphingParameter]
+    ) -> MorphingParameter:
+        """
+        キーに対応するパラメータを返す。キャッシュになければcreateで作って保存する
+        同じキーのパラメータを作っている最中に呼ばれた場合は、createを呼ばずにその完成を待つ
+        """
+        with self._lock:
+            morph_param = self._entries.get(key)
+            if morph_param is not None:
+                self._entries.move_to_end(key)
+                self._hits += 1
+                return morph_param
+            creating = self._creating.get(key)
+            if creating is None:
+                pending: "Future[MorphingParameter]" = Future()
+                self._creating[key] = pending
+                disk_size = self._disk_entries.pop(key, None)
+                if disk_size is not None:
+                    self._disk_bytes -= disk_size
+                    self._disk_hits += 1
+                else:
+                    self._misses += 1
+            else:
+                self._hits += 1
+        if creating is not None:
+            return creating.result()
+
+        try:
+            if disk_size is not None:
+                morph_param = self._load(key)
+            if morph_param is None:
+                # 生成には時間がかかるので、ロックを持たずに行う
+                morph_param = create()
+            self._put(key, morph_param)
+        except BaseException as e:
+            pending.set_exception(e)
+            raise
+        else:
+            pending.set_result(morph_param)
+        finally:
+            with self._lock:
+                del self._creating[key]
+        return morph_param
+
+    def _put(self, key: str, morph_param: MorphingParameter) -> None:
+        size = morphing_parameter_nbytes(morph_param)
+        if size > self.max_bytes:
+            return
+        with self._lock:
+            old_param = self._entries.pop(key, None)
+            if old_param is not None:
+                self._memory_bytes -= morphing_parameter_nbytes(old_param)
+            self._entries[key] = morph_param
+            self._memory_bytes += size
+            evicted = []
+            while self._memory_bytes > self.max_bytes:
+                evicted_key, evicted_param = self._entries.popitem(last=False)
+                self._memory_bytes -= morphing_parameter_nbytes(evicted_param)
+                self._evictions += 1
+                evicted.append((evicted_key, evicted_param))
+        for evicted_key, evicted_param in evicted:
+            self._spill(evicted_key, evicted_param)
+
+    def _spill_path(self, key: str) -> Path:
+        assert self.spill_dir is not None
+        return self.spill_dir / f"{key}.npz"
+
+    def _spill(self, key: str, morph_param: MorphingParameter) -> None:
+        size = morphing_parameter_nbytes(morph_param)
+        if self.spill_dir is None or size > self.max_disk_bytes:
+            return
+        try:
+            np.savez(
+                self._spill_path(key),
+                **{
+                    field.name: getattr(morph_param, field.name)
+                    for field in fields(morph_param)
+                },
+            )
+        except OSError:
+            # 保存できない場合はメモリから追い出すだけにする
+            self._spill_path(key).unlink(missing_ok=True)
+            return
+        with self._lock:
+            self._disk_entries[key] = size
+            self._disk_bytes += size
+            removed = []
+            while self._disk_bytes > self.max_disk_bytes:
+                removed_key, removed_size = self._disk_entries.popitem(last=False)
+                self._disk_bytes -= removed_size
+                removed.append(removed_key)
+        for removed_key in removed:
+            self._spill_path(removed_key).unlink(missing_ok=True)
+
+    def _load(self, key: str) -> Optional[MorphingParameter]:
+        path = self._spill_path(key)
+        try:
+            with np.load(path) as data:
+                # fsなどのスカラーは0次元の配列として保存されているので元の型に戻す
+                morph_param = MorphingParameter(
+                    **{
+                        field.name: (
+                            data[field.name].item()
+                            if data[field.name].ndim == 0
+                            else data[field.name]
+                        )
+                        for field in fields(MorphingParameter)
+                    }
+                )
+        except (OSError, KeyError):
+            return None
+        finally:
+            path.unlink(missing_ok=True)
+        return morph_param
+
+    def clear(self) -> None:
+        with self._lock:
+            self._entries.clear()
+            removed = list(self._disk_entries)
+            self._disk_entries.clear()
+            self._memory_bytes = 0
+            self._disk_bytes = 0
+            self._hits = 0
+            self._disk_hits = 0
+            self._misses = 0
+            self._evictions = 0
+        for removed_key in removed:
+            self._spill_path(removed_key).unlink(missing_ok=True)
+
+    def info(self) -> MorphingParameterCacheInfo:
+        with self._lock:
+            total = self._hits + self._disk_hits + self._misses
+            return MorphingParameterCacheInfo(
+                hits=self._hits,
+                disk_hits=self._disk_hits,
+                misses=self._misses,
+                hit_rate=(self._hits + self._disk_hits) / total if total > 0 else 0.0,
+                evictions=self._evictions,
+                size=len(self._entries),
+                memory_bytes=self._memory_bytes,
+                max_memory_bytes=self.max_bytes,
+                disk_size=len(self._disk_entries),
+                disk_bytes=self._disk_bytes,
+                max_disk_bytes=self.max_disk_bytes,
+            )
@@ -142,3 +142,8 @@ part_of_speech_data: Dict[WordTypes, PartOfSpeechDetail] = {
         ],
     ),
 }
+
+# context_idから品詞の情報を引くための表
+part_of_speech_data_by_context_id: Dict[int, PartOfSpeechDetail] = {
+    pos_detail.context_id: pos_detail for pos_detail in part_of_speech_data.values()
+}
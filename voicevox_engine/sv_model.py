@@ -1,17 +1,117 @@
 import base64
 import json
 import os
+import re
 import shutil
+from hashlib import sha256
 from pathlib import Path
-from typing import List
+from typing import List, Optional, Tuple
 
-from voicevox_engine.model import SVModelInfo
+from voicevox_engine.model import SVModelInfo, SVModelUploadInfo
 
 # テストでstored_dirを切り替えたいのでmodel_dirは利用しない
 from voicevox_engine.utility import get_save_dir
 
 save_dir = get_save_dir()
 
+# アップロード中のファイルを置くディレクトリ名
+# 全てのファイルが揃ってから/model/${uuid}と/speaker_info/${uuid}に移動する
+upload_dir_name = "sv_model_upload"
+
+uuid_pattern = re.compile(r"[\w\-]+")
+
+# アップロードできるファイルの、アップロード用ディレクトリからの相対パス
+sv_model_file_patterns = [
+    re.compile(r"model/(variance|embedder|decoder)_model\.onnx"),
+    re.compile(r"speaker_info/[\w\-]+/portrait\.png"),
+    re.compile(r"speaker_info/[\w\-]+/icons/\d+\.png"),
+    re.compile(r"speaker_info/[\w\-]+/voice_samples/\d+_\d+\.wav"),
+]
+
+required_model_files = [
+    "model/variance_model.onnx",
+    "model/embedder_model.onnx",
+    "model/decoder_model.onnx",
+]
+
+
+class SVModelUploadError(Exception):
+    def __init__(self, message: str):
+        self.message = message
+        super().__init__(message)
+
+
+def get_upload_dir(uuid: str, stored_dir: Path = save_dir) -> Path:
+    """
+    指定したSVモデルのアップロード用ディレクトリを返す
+    """
+    if not uuid_pattern.fullmatch(uuid):
+        raise SVModelUploadError(f"不正なUUIDです: {uuid}")
+    return stored_dir / upload_dir_name / uuid
+
+
+class SVModelFileWriter:
+    """
+    SVモデルのファイルをアップロード用ディレクトリへ少しずつ書き込み、同時にSHA-256を計算する
+    書き込み中は`.part`の付いたファイルに保存し、チェックサムが一致した場合のみ本来のファイル名にする
+
+    Examples
+    --------
+    >>> with SVModelFileWriter(uuid, "model/decoder_model.onnx", sha256) as writer:
+    ...     for chunk in chunks:
+    ...         writer.write(chunk)
+    """
+
+    def __init__(
+        self,
+        uuid: str,
+        relative_path: str,
+        expected_sha256: Optional[str] = None,
+        stored_dir: Path = save_dir,
+    ):
+        if not any(
+            pattern.fullmatch(relative_path) for pattern in sv_model_file_patterns
+        ):
+            raise SVModelUploadError(f"アップロードできないファイルです: {relative_path}")
+
+        self.path = get_upload_dir(uuid, stored_dir) / relative_path
+        self.expected_sha256 = (
+            expected_sha256.lower() if expected_sha256 is not None else None
+        )
+        self._part_path = self.path.with_name(self.path.name + ".part")
+        self._part_path.parent.mkdir(parents=True, exist_ok=True)
+        self._file = open(self._part_path, "wb")
+        self._sha256 = sha256()
+
+    def write(self, chunk: bytes) -> None:
+        self._file.write(chunk)
+        self._sha256.update(chunk)
+
+    def close(self) -> str:
+        """
+        書き込みを終了し、チェックサムを検証する。検証に成功した場合はSHA-256を返す
+        """
+        self._file.close()
+        digest = self._sha256.hexdigest()
+        if self.expected_sha256 is not None and digest != self.expected_sha256:
+            self._part_path.unlink(missing_ok=True)
+            raise SVModelUploadError(f"チェックサムが一致しません: {self.path.name}")
+        os.replace(self._part_path, self.path)
+        return digest
+
+    def abort(self) -> None:
+        self._file.close()
+        self._part_path.unlink(missing_ok=True)
+
+    def __enter__(self) -> "SVModelFileWriter":
+        return self
+
+    def __exit__(self, exc_type, exc_value, traceback) -> None:
+        if exc_type is None:
+            self.close()
+        else:
+            self.abort()
+
 
 def get_all_sv_models(stored_dir: Path = save_dir) -> List[str]:
     """
@@ -31,94 +131,79 @@ def get_all_sv_models(stored_dir: Path = save_dir) -> List[str]:
     return list(libraries.keys())
 
 
-def register_sv_model(
-    sv_model: SVModelInfo,
+def commit_sv_model(
+    sv_model: SVModelUploadInfo,
     stored_dir: Path = save_dir,
 ):
     """
-    送られた単一のSVModelを保存する。返り値はない。
+    アップロード用ディレクトリに揃ったファイルを、SVモデルとしてまとめて登録する。返り値はない。
     """
+    upload_dir = get_upload_dir(sv_model.uuid, stored_dir)
 
-    try:
-        # 既存のsv_modelsとUUIDの重複があった場合も全て新しく作り直す
-        # 以下のディレクトリを作成する
-        # - /model/${uuid}
-        # - /speaker_info/${uuid}
-        # - /speaker_info/${uuid}/icons/
-        # - /speaker_info/${uuid}/voice_samples/
-        # この後の処理で何らかのExceptionが起きた場合、上記のディレクトリを全て削除する
-
-        # 意味的にはmodelsの方が正しそうだけど、実際に保存されたディレクトリ名はmodelだったので
-        model_uuid_dir = stored_dir / "model" / sv_model.uuid
-        already_exists = os.path.exists(model_uuid_dir)
-        if already_exists:
-            os.rename(model_uuid_dir, f"{model_uuid_dir}.old")
-        os.makedirs(model_uuid_dir)
+    # 異常なUUIDを含んでいないか確認する
+    speaker_uuids = list(sv_model.policies.keys())
+    if sorted(meta.speaker_uuid for meta in sv_model.metas) != sorted(speaker_uuids):
+        raise SVModelUploadError("metasとpoliciesの話者が一致しません")
+    for speaker_uuid in speaker_uuids:
+        if not uuid_pattern.fullmatch(speaker_uuid):
+            raise SVModelUploadError(f"不正なUUIDです: {speaker_uuid}")
 
-        # variance_model, embedder_model, decoder_modelは
-        # それぞれbase64デコードしてから/model/${uuid}/*.onnxに保存する
-        with open(model_uuid_dir / "variance_model.onnx", "wb") as f:
-            f.write(base64.b64decode(sv_model.variance_model.encode("utf-8")))
-        with open(model_uuid_dir / "embedder_model.onnx", "wb") as f:
-            f.write(base64.b64decode(sv_model.embedder_model.encode("utf-8")))
-        with open(model_uuid_dir / "decoder_model.onnx", "wb") as f:
-            f.write(base64.b64decode(sv_model.decoder_model.encode("utf-8")))
-
-        # metasは/model/${uuid}/metas.jsonに保存する
-        with open(model_uuid_dir / "metas.json", "w", encoding="utf-8") as f:
-            json.dump([meta.dict() for meta in sv_model.metas], f, ensure_ascii=False)
-
-        # model_config.jsonは/model/${uuid}/model_config.jsonに保存する
-        with open(model_uuid_dir / "model_config.json", "w", encoding="utf-8") as f:
-            json.dump(sv_model.model_config.dict(), f, ensure_ascii=False)
-
-        # 異常なUUIDを含んでいないか確認する
-        assert len(sv_model.metas) == len(sv_model.speaker_infos)
-        for meta in sv_model.metas:
-            assert meta.speaker_uuid in sv_model.speaker_infos.keys()
-
-        # speaker_infos
-        for speaker_uuid, speaker_info in sv_model.speaker_infos.items():
-            speaker_info_dir = stored_dir / "speaker_info" / speaker_uuid
+    missing_files = [
+        path
+        for path in required_model_files
+        + [
+            f"speaker_info/{speaker_uuid}/portrait.png"
+            for speaker_uuid in speaker_uuids
+        ]
+        if not (upload_dir / path).is_file()
+    ]
+    if len(missing_files) > 0:
+        raise SVModelUploadError("アップロードされていないファイルがあります: " + ", ".join(missing_files))
 
-            # 既にモデルが存在していた場合はrenameしておく
-            if already_exists and os.path.exists(speaker_info_dir):
-                os.rename(speaker_info_dir, f"{speaker_info_dir}.old")
+    # metasは/model/${uuid}/metas.jsonに保存する
+    with open(upload_dir / "model" / "metas.json", "w", encoding="utf-8") as f:
+        json.dump([meta.dict() for meta in sv_model.metas], f, ensure_ascii=False)
 
-            os.makedirs(speaker_info_dir / "icons")
-            os.makedirs(speaker_info_dir / "voice_samples")
+    # model_config.jsonは/model/${uuid}/model_config.jsonに保存する
+    with open(upload_dir / "model" / "model_config.json", "w", encoding="utf-8") as f:
+        json.dump(sv_model.model_config.dict(), f, ensure_ascii=False)
 
-            # - policy => /speaker_info/${speaker_uuid}/policy.md
-            with open(speaker_info_dir / "policy.md", "w", encoding="utf-8") as f:
-                f.write(speaker_info.policy)
+    for speaker_uuid, policy in sv_model.policies.items():
+        speaker_info_dir = upload_dir / "speaker_info" / speaker_uuid
+        (speaker_info_dir / "icons").mkdir(exist_ok=True)
+        (speaker_info_dir / "voice_samples").mkdir(exist_ok=True)
 
-            # - portrait => base64デコードして/speaker_info/${speaker_uuid}/portrait.pngに保存
-            with open(speaker_info_dir / "portrait.png", "wb") as f:
-                f.write(base64.b64decode(speaker_info.portrait.encode("utf-8")))
+        # - policy => /speaker_info/${speaker_uuid}/policy.md
+        with open(speaker_info_dir / "policy.md", "w", encoding="utf-8") as f:
+            f.write(policy)
 
-            # TODO: metas.jsonもSV Model API経由で渡せるようにする
-            # - metas => 空のjsonを保存
-            with open(speaker_info_dir / "metas.json", "w") as f:
-                f.write(json.dumps({}))
+        # TODO: metas.jsonもSV Model API経由で渡せるようにする
+        # - metas => 空のjsonを保存
+        with open(speaker_info_dir / "metas.json", "w") as f:
+            f.write(json.dumps({}))
 
-            # - style_infosは、iconとvoiceをbase64デコードして以下の通り保存する
-            #   - id => iconとvoice_samplesの保存に使う
-            #   - icon => /speaker_info/${uuid}/icons/${id}.png
-            #   - voice_samples => /speaker_info/${uuid}/voice_samples/${id}_00{index}.wav
-            for style_info in speaker_info.style_infos:
-                with open(
-                    speaker_info_dir / "icons" / f"{style_info.id}.png", "wb"
-                ) as f:
-                    f.write(base64.b64decode(style_info.icon.encode("utf-8")))
-                for idx, voice_sample in enumerate(style_info.voice_samples):
-                    # 既存の採番は1-indexedなので
-                    with open(
-                        speaker_info_dir
-                        / "voice_samples"
-                        / f"{style_info.id}_00{idx+1}.wav",
-                        "wb",
-                    ) as f:
-                        f.write(base64.b64decode(voice_sample.encode("utf-8")))
+    # 既存のsv_modelsとUUIDの重複があった場合も全て新しく作り直す
+    # 既存のディレクトリは.oldにrenameしておき、以降の処理で何らかのExceptionが起きた場合は元に戻す
+    # 意味的にはmodelsの方が正しそうだけど、実際に保存されたディレクトリ名はmodelだったので
+    moves = [(upload_dir / "model", stored_dir / "model" / sv_model.uuid)] + [
+        (
+            upload_dir / "speaker_info" / speaker_uuid,
+            stored_dir / "speaker_info" / speaker_uuid,
+        )
+        for speaker_uuid in speaker_uuids
+    ]
+    moved: List[Path] = []
+    backups: List[Tuple[Path, Path]] = []
+    try:
+        for src, dst in moves:
+            if dst.exists():
+                backup = Path(f"{dst}.old")
+                shutil.rmtree(backup, ignore_errors=True)
+                os.rename(dst, backup)
+                backups.append((backup, dst))
+            dst.parent.mkdir(parents=True, exist_ok=True)
+            os.rename(src, dst)
+            moved.append(dst)
 
         # 最後にlibraries.jsonに追記する
         # 2回ロックをかけるよりも1回のrwロックの方が整合性が保たれて良い
@@ -127,37 +212,78 @@ def register_sv_model(
             libraries[sv_model.uuid] = True
             f.seek(0)
             json.dump(libraries, f, ensure_ascii=False)
-
-        # backupを削除する
-        if already_exists:
-            shutil.rmtree(f"{model_uuid_dir}.old")
-            for speaker_uuid in sv_model.speaker_infos.keys():
-                speaker_info_dir = stored_dir / "speaker_info" / speaker_uuid
-                # 新しく追加されるspeaker_info_dirに.oldは存在しないはずなので、exists checkをする
-                if os.path.exists(f"{speaker_info_dir}.old"):
-                    shutil.rmtree(f"{speaker_info_dir}.old")
-
-        # backupを削除する
-        if already_exists:
-            shutil.rmtree(f"{model_uuid_dir}.old")
-            for speaker_uuid in sv_model.speaker_infos.keys():
-                speaker_info_dir = stored_dir / "speaker_info" / speaker_uuid
-                # 新しく追加されるspeaker_info_dirに.oldは存在しないはずなので、exists checkをする
-                if os.path.exists(f"{speaker_info_dir}.old"):
-                    shutil.rmtree(f"{speaker_info_dir}.old")
-
+            f.truncate()
     except Exception as e:
         # 削除時にエラーが発生しても無視する
-        shutil.rmtree(stored_dir / "model" / sv_model.uuid, ignore_errors=True)
-        for speaker_uuid in sv_model.speaker_infos.keys():
-            shutil.rmtree(
-                stored_dir / "speaker_info" / speaker_uuid, ignore_errors=True
-            )
+        for dst in moved:
+            shutil.rmtree(dst, ignore_errors=True)
 
         # backupからrestoreする
-        os.rename(f"{model_uuid_dir}.old", model_uuid_dir)
-        for speaker_uuid in sv_model.speaker_infos.keys():
-            speaker_info_dir = stored_dir / "speaker_info" / speaker_uuid
-            if os.path.exists(f"{speaker_info_dir}.old"):
-                os.rename(f"{speaker_info_dir}.old", speaker_info_dir)
+        for backup, dst in backups:
+            os.rename(backup, dst)
         raise e
+
+    # backupとアップロード用ディレクトリを削除する
+    for backup, _ in backups:
+        shutil.rmtree(backup, ignore_errors=True)
+    shutil.rmtree(upload_dir, ignore_errors=True)
+
+
+def register_sv_model(
+    sv_model: SVModelInfo,
+    stored_dir: Path = save_dir,
+):
+    """
+    送られた単一のSVModelを保存する。返り値はない。
+    """
+
+    def write_file(relative_path: str, data: str) -> None:
+        with SVModelFileWriter(
+            sv_model.uuid, relative_path, stored_dir=stored_dir
+        ) as f:
+            f.write(base64.b64decode(data.encode("utf-8")))
+
+    upload_dir = get_upload_dir(sv_model.uuid, stored_dir)
+    shutil.rmtree(upload_dir, ignore_errors=True)
+    try:
+        # variance_model, embedder_model, decoder_modelは
+        # それぞれbase64デコードしてから/model/${uuid}/*.onnxに保存する
+        write_file("model/variance_model.onnx", sv_model.variance_model)
+        write_file("model/embedder_model.onnx", sv_model.embedder_model)
+        write_file("model/decoder_model.onnx", sv_model.decoder_model)
+
+        for speaker_uuid, speaker_info in sv_model.speaker_infos.items():
+            speaker_info_dir = f"speaker_info/{speaker_uuid}"
+
+            # - portrait => base64デコードして/speaker_info/${speaker_uuid}/portrait.pngに保存
+            write_file(f"{speaker_info_dir}/portrait.png", speaker_info.portrait)
+
+            # - style_infosは、iconとvoiceをbase64デコードして以下の通り保存する
+            #   - id => iconとvoice_samplesの保存に使う
+            #   - icon => /speaker_info/${uuid}/icons/${id}.png
+            #   - voice_samples => /speaker_info/${uuid}/voice_samples/${id}_00{index}.wav
+            for style_info in speaker_info.style_infos:
+                write_file(
+                    f"{speaker_info_dir}/icons/{style_info.id}.png", style_info.icon
+                )
+                for idx, voice_sample in enumerate(style_info.voice_samples):
+                    # 既存の採番は1-indexedなので
+                    write_file(
+                        f"{speaker_info_dir}/voice_samples/{style_info.id}_00{idx+1}.wav",
+                        voice_sample,
+                    )
+
+        commit_sv_model(
+            SVModelUploadInfo(
+                uuid=sv_model.uuid,
+                metas=sv_model.metas,
+                model_config=sv_model.model_config,
+                policies={
+                    speaker_uuid: speaker_info.policy
+                    for speaker_uuid, speaker_info in sv_model.speaker_infos.items()
+                },
+            ),
+            stored_dir=stored_dir,
+        )
+    finally:
+        shutil.rmtree(upload_dir, ignore_errors=True)
@@ -1,12 +1,15 @@
 from .core_wrapper import CoreWrapper, load_runtime_lib
+from .frontend_pool import FrontendPool
 from .make_synthesis_engines import make_synthesis_engines
 from .synthesis_engine import SynthesisEngine
-from .synthesis_engine_base import SynthesisEngineBase
+from .synthesis_engine_base import SynthesisEngineBase, set_frontend_pool
 
 __all__ = [
     "CoreWrapper",
+    "FrontendPool",
     "load_runtime_lib",
     "make_synthesis_engines",
     "SynthesisEngine",
     "SynthesisEngineBase",
+    "set_frontend_pool",
 ]
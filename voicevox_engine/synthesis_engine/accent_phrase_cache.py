@@ -0,0 +1,132 @@
+import sys
+import threading
+from collections import OrderedDict
+from typing import List, Optional, Tuple
+
+from ..model import AccentPhrase, AccentPhraseCacheInfo, Mora
+
+# 音素長・音高を設定する前のアクセント句を、変更できない形で保持する
+# (アクセント位置, 疑問文かどうか, 後ろに無音を付けるかどうか, ((文字, 子音, 母音), ...))
+MoraSkeleton = Tuple[str, Optional[str], str]
+AccentPhraseSkeleton = Tuple[int, bool, bool, Tuple[MoraSkeleton, ...]]
+
+
+def skeletons_to_accent_phrases(
+    skeletons: Tuple[AccentPhraseSkeleton, ...]
+) -> List[AccentPhrase]:
+    return [
+        AccentPhrase(
+            moras=[
+                Mora(
+                    text=text,
+                    consonant=consonant,
+                    consonant_length=0 if consonant is not None else None,
+                    vowel=vowel,
+                    vowel_length=0,
+                    pitch=0,
+                )
+                for text, consonant, vowel in moras
+            ],
+            accent=accent,
+            pause_mora=(
+                Mora(
+                    text="、",
+                    consonant=None,
+                    consonant_length=None,
+                    vowel="pau",
+                    vowel_length=0,
+                    pitch=0,
+                )
+                if has_pause
+                else None
+            ),
+            is_interrogative=is_interrogative,
+        )
+        for accent, is_interrogative, has_pause, moras in skeletons
+    ]
+
+
+def _sizeof(obj) -> int:
+    size = sys.getsizeof(obj)
+    if isinstance(obj, tuple):
+        size += sum(_sizeof(item) for item in obj)
+    return size
+
+
+class AccentPhraseCache:
+    """
+    テキストから作成した、音素長・音高を設定する前のアクセント句のLRUキャッシュ
+    ユーザー辞書が更新されると解析結果が変わるので、辞書の世代番号が変わった時点で全て破棄する
+    """
+
+    def __init__(self, maxsize: int = 1024):
+        self.maxsize = maxsize
+        self._entries: "OrderedDict[str, Tuple[Tuple[AccentPhraseSkeleton, ...], int]]"
+        self._entries = OrderedDict()
+        self._user_dict_version = 0
+        self._memory_bytes = 0
+        self._hits = 0
+        self._misses = 0
+        self._lock = threading.Lock()
+
+    def _sync_user_dict_version(self, user_dict_version: int) -> None:
+        if user_dict_version > self._user_dict_version:
+            self._entries.clear()
+            self._memory_bytes = 0
+            self._user_dict_version = user_dict_version
+
+    def get(
+        self, text: str, user_dict_version: int
+    ) -> Optional[Tuple[AccentPhraseSkeleton, ...]]:
+        with self._lock:
+            self._sync_user_dict_version(user_dict_version)
+            entry = self._entries.get(text)
+            if entry is None or user_dict_version != self._user_dict_version:
+                self._misses += 1
+                return None
+            self._entries.move_to_end(text)
+            self._hits += 1
+        return entry[0]
+
+    def put(
+        self,
+        text: str,
+        user_dict_version: int,
+        skeletons: Tuple[AccentPhraseSkeleton, ...],
+    ) -> None:
+        if self.maxsize <= 0:
+            return
+        size = _sizeof(text) + _sizeof(skeletons)
+        with self._lock:
+            self._sync_user_dict_version(user_dict_version)
+            # 解析中に辞書が更新された場合、古い辞書での解析結果は保存しない
+            if user_dict_version != self._user_dict_version:
+                return
+            old_entry = self._entries.pop(text, None)
+            if old_entry is not None:
+                self._memory_bytes -= old_entry[1]
+            self._entries[text] = (skeletons, size)
+            self._memory_bytes += size
+            while len(self._entries) > self.maxsize:
+                _, (_, evicted_size) = self._entries.popitem(last=False)
+                self._memory_bytes -= evicted_size
+
+    def clear(self) -> None:
+        with self._lock:
+            self._entries.clear()
+            self._memory_bytes = 0
+            self._hits = 0
+            self._misses = 0
+
+    def info(self) -> AccentPhraseCacheInfo:
+        with self._lock:
+            total = self._hits + self._misses
+            return AccentPhraseCacheInfo(
+                hits=self._hits,
+                misses=self._misses,
+                hit_rate=self._hits / total if total > 0 else 0.0,
+                size=len(self._entries),
+                maxsize=self.maxsize,
+                memory_bytes=self._memory_bytes,
+                user_dict_version=self._user_dict_version,
+            )
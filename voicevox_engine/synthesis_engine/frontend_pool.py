@@ -0,0 +1,65 @@
+import multiprocessing
+from concurrent.futures import ProcessPoolExecutor
+from pathlib import Path
+from typing import Optional, Tuple
+
+import pyopenjtalk
+
+from ..full_context_label import extract_full_context_labels
+from .accent_phrase_cache import AccentPhraseSkeleton
+from .synthesis_engine_base import labels_to_accent_phrase_skeletons
+
+# ワーカープロセスに読み込まれているユーザー辞書の世代番号
+# メインプロセスと異なる場合は、解析の前に辞書を読み込み直す
+_worker_user_dict_version = 0
+
+
+def _analyze(
+    text: str, user_dict_version: int, user_dict_path: Optional[str]
+) -> Tuple[AccentPhraseSkeleton, ...]:
+    """
+    ワーカープロセスで実行される。テキストを解析し、音素長・音高を設定する前のアクセント句を返す
+    """
+    global _worker_user_dict_version
+
+    if user_dict_version != _worker_user_dict_version:
+        pyopenjtalk.unset_user_dict()
+        if user_dict_path is not None and Path(user_dict_path).is_file():
+            pyopenjtalk.set_user_dict(user_dict_path)
+        _worker_user_dict_version = user_dict_version
+
+    return labels_to_accent_phrase_skeletons(extract_full_context_labels(text))
+
+
+class FrontendPool:
+    """
+    テキスト解析(OpenJTalkによるフルコンテキストラベルの作成とアクセント句の組み立て)を行うプロセスプール
+    テキスト解析はGILを解放しないので、複数のプロセスに分けることで複数のコアを使えるようにする
+
+    各プロセスはメインプロセスと同じコンパイル済みユーザー辞書を使う
+    ユーザー辞書が更新された場合は、各プロセスが次の解析の前に読み込み直す
+    """
+
+    def __init__(self, num_processes: int):
+        # onnxruntimeなどを読み込んだプロセスをforkしないように、spawnでプロセスを作る
+        self._executor = ProcessPoolExecutor(
+            max_workers=num_processes,
+            mp_context=multiprocessing.get_context("spawn"),
+        )
+        self.num_processes = num_processes
+
+    def analyze(
+        self, text: str, user_dict_version: int, user_dict_path: Optional[Path]
+    ) -> Tuple[AccentPhraseSkeleton, ...]:
+        """
+        テキストをワーカープロセスで解析する。呼び出し元のスレッドは解析が終わるまで待つ
+        """
+        return self._executor.submit(
+            _analyze,
+            text,
+            user_dict_version,
+            str(user_dict_path) if user_dict_path is not None else None,
+        ).result()
+
+    def shutdown(self) -> None:
+        self._executor.shutdown()
@@ -0,0 +1,188 @@
+from dataclasses import dataclass
+from typing import Dict, List, Optional
+
+import numpy
+
+from ..acoustic_feature_extractor import Accent, OjtPhoneme
+from ..model import AccentPhrase, AudioQuery
+
+phoneme_id_table: Dict[str, int] = {
+    phoneme: i for i, phoneme in enumerate(OjtPhoneme.phoneme_list)
+}
+accent_id_table: Dict[str, int] = {
+    accent: i for i, accent in enumerate(Accent.accent_list)
+}
+
+unvoiced_phoneme_ids = numpy.array(
+    [phoneme_id_table[p] for p in ["A", "I", "U", "E", "O", "cl", "pau"]],
+    dtype=numpy.int64,
+)
+
+
+def _to_phoneme_id(phoneme: str) -> int:
+    try:
+        return phoneme_id_table[phoneme]
+    except KeyError:
+        raise ValueError(f"{phoneme} is not defined.")
+
+
+@dataclass
+class QueryArrays:
+    """
+    アクセント句のリストを、音素ごとのnumpy配列として保持する
+    variance forwardがうまく動かないので、音素列の前後にはpauを追加している
+
+    Attributes
+    ----------
+    phoneme_ids : numpy.ndarray
+        音素IDの列 (int64)
+    accent_ids : numpy.ndarray
+        アクセントIDの列 (int64)
+    durations : numpy.ndarray
+        音素ごとの長さ (float32)
+    pitches : numpy.ndarray
+        音素ごとの音高 (float32)。子音には同じモーラの音高が入る
+    consonant_indexes : numpy.ndarray
+        モーラごとの子音の位置 (int64)。子音が無いモーラは-1
+    vowel_indexes : numpy.ndarray
+        モーラごとの母音の位置 (int64)
+    """
+
+    phoneme_ids: numpy.ndarray
+    accent_ids: numpy.ndarray
+    durations: numpy.ndarray
+    pitches: numpy.ndarray
+    consonant_indexes: numpy.ndarray
+    vowel_indexes: numpy.ndarray
+
+    @classmethod
+    def from_accent_phrases(
+        cls,
+        accent_phrases: List[AccentPhrase],
+        pre_phoneme_length: float = 0.0,
+        post_phoneme_length: float = 0.0,
+    ) -> "QueryArrays":
+        """
+        アクセント句のリストを一度だけ走査し、音素ごとの配列を作成する
+        """
+        phonemes = [phoneme_id_table["pau"]]
+        accents = [accent_id_table["#"]]
+        durations: List[Optional[float]] = [pre_phoneme_length]
+        pitches = [0.0]
+        consonant_indexes: List[int] = []
+        vowel_indexes: List[int] = []
+
+        for accent_phrase in accent_phrases:
+            moras = accent_phrase.moras
+            for i, mora in enumerate(moras):
+                if mora.consonant is not None:
+                    consonant_indexes.append(len(phonemes))
+                    phonemes.append(_to_phoneme_id(mora.consonant))
+                    accents.append(accent_id_table["_"])
+                    durations.append(mora.consonant_length)
+                    pitches.append(mora.pitch)
+                else:
+                    consonant_indexes.append(-1)
+                vowel_indexes.append(len(phonemes))
+                phonemes.append(_to_phoneme_id(mora.vowel))
+                if i + 1 == accent_phrase.accent and len(moras) != accent_phrase.accent:
+                    accents.append(accent_id_table["]"])
+                elif i == 0:
+                    accents.append(accent_id_table["["])
+                else:
+                    accents.append(accent_id_table["_"])
+                durations.append(mora.vowel_length)
+                pitches.append(mora.pitch)
+
+            pause_mora = accent_phrase.pause_mora
+            if pause_mora is not None:
+                consonant_indexes.append(-1)
+                vowel_indexes.append(len(phonemes))
+                phonemes.append(_to_phoneme_id(pause_mora.vowel))
+                accents.append(accent_id_table["_"])
+                durations.append(pause_mora.vowel_length)
+                pitches.append(pause_mora.pitch)
+            accents[-1] = accent_id_table[
+                "?" if accent_phrase.is_interrogative else "#"
+            ]
+
+        phonemes.append(phoneme_id_table["pau"])
+        accents.append(accent_id_table["#"])
+        durations.append(post_phoneme_length)
+        pitches.append(0.0)
+
+        return cls(
+            phoneme_ids=numpy.array(phonemes, dtype=numpy.int64),
+            accent_ids=numpy.array(accents, dtype=numpy.int64),
+            durations=numpy.array(durations, dtype=numpy.float32),
+            pitches=numpy.array(pitches, dtype=numpy.float32),
+            consonant_indexes=numpy.array(consonant_indexes, dtype=numpy.int64),
+            vowel_indexes=numpy.array(vowel_indexes, dtype=numpy.int64),
+        )
+
+    @classmethod
+    def from_query(cls, query: AudioQuery) -> "QueryArrays":
+        return cls.from_accent_phrases(
+            query.accent_phrases,
+            pre_phoneme_length=query.prePhonemeLength,
+            post_phoneme_length=query.postPhonemeLength,
+        )
+
+    def mora_consonant_values(self, values: numpy.ndarray) -> List[Optional[float]]:
+        """
+        音素ごとの値から、モーラごとの子音の値を取り出す。子音が無いモーラはNoneになる
+        """
+        has_consonant = self.consonant_indexes >= 0
+        return [
+            value if exists else None
+            for value, exists in zip(
+                values[self.consonant_indexes].tolist(), has_consonant.tolist()
+            )
+        ]
+
+    def mora_vowel_values(self, values: numpy.ndarray) -> List[float]:
+        """
+        音素ごとの値から、モーラごとの母音の値を取り出す
+        """
+        return values[self.vowel_indexes].tolist()
+
+    def mora_pitches(self, pitches: numpy.ndarray) -> List[float]:
+        """
+        音素ごとの音高から、モーラごとの音高を取り出す。無声モーラの音高は0になる
+        """
+        vowel_ids = self.phoneme_ids[self.vowel_indexes]
+        return numpy.where(
+            numpy.isin(vowel_ids, unvoiced_phoneme_ids),
+            0.0,
+            pitches[self.vowel_indexes],
+        ).tolist()
+
+
+def apply_speed_scale(durations: numpy.ndarray, speed_scale: float) -> numpy.ndarray:
+    """
+    音素の長さに話速を適用する
+    """
+    return durations / numpy.float32(speed_scale)
+
+
+def apply_pitch_scale(pitches: numpy.ndarray, pitch_scale: float) -> numpy.ndarray:
+    """
+    音高に2のpitch_scale乗を掛ける
+    """
+    return pitches * numpy.float32(2**pitch_scale)
+
+
+def apply_intonation_scale(
+    pitches: numpy.ndarray, intonation_scale: float
+) -> numpy.ndarray:
+    """
+    有声音素(音高が0より大きいもの)の音高の平均値からの差に、抑揚を掛ける
+    有声音素が無い場合はそのまま返す
+    """
+    voiced = pitches > 0
+    if not voiced.any():
+        return pitches
+    mean_f0 = pitches[voiced].mean()
+    return numpy.where(
+        voiced, (pitches - mean_f0) * numpy.float32(intonation_scale) + mean_f0, pitches
+    ).astype(numpy.float32, copy=False)
@@ -3,11 +3,17 @@ from itertools import chain
 from typing import List, Optional, Tuple
 
 import numpy
-from scipy.signal import resample
 
 from ..acoustic_feature_extractor import Accent, OjtPhoneme
 from ..model import AccentPhrase, AudioQuery, Mora
+from ..utility.wave_utility import resample_wave
 from .core_wrapper import CoreWrapper, OldCoreError
+from .query_arrays import (
+    QueryArrays,
+    apply_intonation_scale,
+    apply_pitch_scale,
+    apply_speed_scale,
+)
 from .synthesis_engine_base import SynthesisEngineBase
 
 unvoiced_mora_phoneme_list = ["A", "I", "U", "E", "O", "cl", "pau"]
@@ -133,41 +139,9 @@ def pre_process(
         accent_phrasesから取り出したアクセントを元に生成されたアクセント列を返す
     """
     flatten_moras = to_flatten_moras(accent_phrases)
-
-    phoneme_each_mora = [
-        ([mora.consonant] if mora.consonant is not None else []) + [mora.vowel]
-        for mora in flatten_moras
-    ]
-    phoneme_str_list = list(chain.from_iterable(phoneme_each_mora))
-    # variance forwardがうまく動かないので、前後にpauを追加する
-    phoneme_str_list = ["pau"] + phoneme_str_list + ["pau"]
-
-    phoneme_id_list = numpy.array(
-        to_phoneme_id_list(phoneme_str_list), dtype=numpy.int64
-    )
-
-    accent_str_list = ["#"]
-    for accent_phrase in accent_phrases:
-        for i, mora in enumerate(accent_phrase.moras):
-            if (
-                i + 1 == accent_phrase.accent
-                and len(accent_phrase.moras) != accent_phrase.accent
-            ):
-                if mora.consonant is not None:
-                    accent_str_list.append("_")
-                accent_str_list.append("]")
-            else:
-                if mora.consonant is not None:
-                    accent_str_list.append("_")
-                if i == 0:
-                    accent_str_list.append("[")
-                else:
-                    accent_str_list.append("_")
-        if accent_phrase.pause_mora is not None:
-            accent_str_list.append("_")
-        accent_str_list[-1] = "?" if accent_phrase.is_interrogative else "#"
-    accent_str_list.append("#")
-    accent_id_list = numpy.array(to_accent_id_list(accent_str_list), dtype=numpy.int64)
+    query_arrays = QueryArrays.from_accent_phrases(accent_phrases)
+    phoneme_id_list = query_arrays.phoneme_ids
+    accent_id_list = query_arrays.accent_ids
 
     return flatten_moras, phoneme_id_list, accent_id_list
 
@@ -257,33 +231,30 @@ class SynthesisEngine(SynthesisEngineBase):
             return [], numpy.array([])
 
         # phoneme
-        # AccentPhraseをすべてMoraおよびOjtPhonemeの形に分解し、処理可能な形にする
-        flatten_moras, phoneme_id_list, accent_id_list = pre_process(accent_phrases)
+        # AccentPhraseを音素ごとの配列に変換し、処理可能な形にする
+        query_arrays = QueryArrays.from_accent_phrases(accent_phrases)
 
-        # Phoneme IDのリスト(phoneme_id_list)とAccent IDのリスト(accent_id_list)をvariance_forwarderにかけ、
+        # Phoneme IDの列とAccent IDの列をvariance_forwarderにかけ、
         # 推論器によって適切な音素ごとの音高・音素長を割り当てる
         pitches: numpy.ndarray
         durations: numpy.ndarray
         with self.mutex:
             pitches, durations = self.core.variance_forward(
-                length=len(phoneme_id_list),
-                phonemes=phoneme_id_list,
-                accents=accent_id_list,
+                length=len(query_arrays.phoneme_ids),
+                phonemes=query_arrays.phoneme_ids,
+                accents=query_arrays.accent_ids,
                 speaker_id=numpy.array(speaker_id, dtype=numpy.int64).reshape(-1),
             )
 
         # variance_forwarderの結果をaccent_phrasesに反映する
-        # flatten_moras変数に展開された値を変更することでコード量を削減しつつaccent_phrases内のデータを書き換えている
-        # 前後にpauを含むため、2番目(indexとしては1)から値を取り始める
-        index = 1
-        for mora in flatten_moras:
-            if mora.consonant is not None:
-                mora.consonant_length = durations[index]
-                index += 1
-            else:
-                mora.consonant_length = None
-            mora.vowel_length = durations[index]
-            index += 1
+        # 音素ごとの配列からモーラごとの値をまとめて取り出し、モーラへの書き込みだけを行う
+        for mora, consonant_length, vowel_length in zip(
+            to_flatten_moras(accent_phrases),
+            query_arrays.mora_consonant_values(durations),
+            query_arrays.mora_vowel_values(durations),
+        ):
+            mora.consonant_length = consonant_length
+            mora.vowel_length = vowel_length
 
         return accent_phrases, pitches
 
@@ -315,33 +286,27 @@ class SynthesisEngine(SynthesisEngineBase):
             return []
 
         # phoneme
-        # AccentPhraseをすべてMoraおよびOjtPhonemeの形に分解し、処理可能な形にする
-        flatten_moras, phoneme_id_list, accent_id_list = pre_process(accent_phrases)
+        # AccentPhraseを音素ごとの配列に変換し、処理可能な形にする
+        query_arrays = QueryArrays.from_accent_phrases(accent_phrases)
 
         # pitchesを取得していない場合のみ、推論を行う
         if pitches is None:
-            # Phoneme IDのリスト(phoneme_id_list)とAccent IDのリスト(accent_id_list)を
-            # variance_forwardにかけ、推論器によって適切な音素ごとの音高・音素長を割り当てる
+            # Phoneme IDの列とAccent IDの列をvariance_forwardにかけ、
+            # 推論器によって適切な音素ごとの音高・音素長を割り当てる
             with self.mutex:
                 pitches, _ = self.core.variance_forward(
-                    length=len(phoneme_id_list),
-                    phonemes=phoneme_id_list,
-                    accents=accent_id_list,
+                    length=len(query_arrays.phoneme_ids),
+                    phonemes=query_arrays.phoneme_ids,
+                    accents=query_arrays.accent_ids,
                     speaker_id=numpy.array(speaker_id, dtype=numpy.int64).reshape(-1),
                 )
 
         # variance_forwarderの結果をaccent_phrasesに反映する
-        # flatten_moras変数に展開された値を変更することでコード量を削減しつつaccent_phrases内のデータを書き換えている
-        # 前後にpauを含むため、2番目(indexとしては1)から値を取り始める
-        index = 1
-        for mora in flatten_moras:
-            if mora.consonant is not None:
-                index += 1
-            if mora.vowel in unvoiced_mora_phoneme_list:
-                mora.pitch = 0.0
-            else:
-                mora.pitch = pitches[index]
-            index += 1
+        # 無声モーラの音高は0にする
+        for mora, pitch in zip(
+            to_flatten_moras(accent_phrases), query_arrays.mora_pitches(pitches)
+        ):
+            mora.pitch = pitch
 
         return accent_phrases
 
@@ -357,64 +322,29 @@ class SynthesisEngine(SynthesisEngineBase):
         Returns
         -------
         wave : numpy.ndarray
-            音声合成結果
+            音声合成結果(float32のモノラル波形)
         """
         # モデルがロードされていない場合はロードする
         self.initialize_speaker_synthesis(speaker_id, skip_reinit=True)
-        # phoneme
-        # AccentPhraseをすべてMoraおよびOjtPhonemeの形に分解し、処理可能な形にする
-        flatten_moras, phoneme_id_list, _ = pre_process(query.accent_phrases)
-
-        # length
-        # 音素の長さをリストに展開・結合する。
-        phoneme_length_list = (
-            [query.prePhonemeLength]
-            + [
-                length
-                for mora in flatten_moras
-                for length in (
-                    [mora.consonant_length] if mora.consonant is not None else []
-                )
-                + [mora.vowel_length]
-            ]
-            + [query.postPhonemeLength]
-        )
-        # floatにキャスト
-        durations = numpy.array(phoneme_length_list, dtype=numpy.float32)
+        # AudioQueryを音素ごとの配列に変換する
+        # 以降の話速・音高・抑揚の調節は、すべて配列に対する演算として行う
+        query_arrays = QueryArrays.from_query(query)
 
         # lengthにSpeed Scale(話速)を適用する
-        durations /= query.speedScale
-
-        # pitch
-        # モーラの音高(ピッチ)を展開・結合し、floatにキャストする
-        f0_list = (
-            [0.0]
-            + [
-                pitch
-                for mora in flatten_moras
-                for pitch in ([mora.pitch] if mora.consonant is not None else [])
-                + [mora.pitch]
-            ]
-            + [0.0]
-        )
-        f0 = numpy.array(f0_list, dtype=numpy.float32)
+        durations = apply_speed_scale(query_arrays.durations, query.speedScale)
+
         # 音高(ピッチ)の調節を適用する(2のPitch Scale乗を掛ける)
-        f0 *= 2**query.pitchScale
+        f0 = apply_pitch_scale(query_arrays.pitches, query.pitchScale)
 
-        # 有声音素(音高(ピッチ)が0より大きいもの)か否かを抽出する
-        voiced = f0 > 0
-        # 有声音素の音高(ピッチ)の平均値を求める
-        mean_f0 = f0[voiced].mean()
-        # 平均値がNaNではないとき、抑揚を適用する
+        # 抑揚を適用する
         # 抑揚は音高と音高の平均値の差に抑揚を掛けたもの((f0 - mean_f0) * Intonation Scale)に抑揚の平均値(mean_f0)を足したもの
-        if not numpy.isnan(mean_f0):
-            f0[voiced] = (f0[voiced] - mean_f0) * query.intonationScale + mean_f0
+        f0 = apply_intonation_scale(f0, query.intonationScale)
 
         # 今まで生成された情報をdecode_forwarderにかけ、推論器によって音声波形を生成する
         with self.mutex:
             wave = self.core.decode_forward(
-                length=phoneme_id_list.shape[0],
-                phonemes=phoneme_id_list,
+                length=query_arrays.phoneme_ids.shape[0],
+                phonemes=query_arrays.phoneme_ids,
                 pitches=f0,
                 durations=durations,
                 speaker_id=numpy.array(speaker_id, dtype=numpy.int64).reshape(-1),
@@ -424,15 +354,7 @@ class SynthesisEngine(SynthesisEngineBase):
         wave *= query.volumeScale
 
         # 出力サンプリングレートがデフォルト(decode forwarderによるもの、48kHz)でなければ、それを適用する
-        if query.outputSamplingRate != self.default_sampling_rate:
-            wave = resample(
-                wave,
-                query.outputSamplingRate * len(wave) // self.default_sampling_rate,
-            )
-
-        # ステレオ変換
-        # 出力設定がステレオなのであれば、ステレオ化する
-        if query.outputStereo:
-            wave = numpy.array([wave, wave]).T
+        # ステレオ化は波形全体を複製しないよう、書き込み時にwrite_waveで行う
+        wave = resample_wave(wave, self.default_sampling_rate, query.outputSamplingRate)
 
         return wave
@@ -1,14 +1,36 @@
-import copy
 from abc import ABCMeta, abstractmethod
-from typing import List, Optional, Tuple
+from typing import TYPE_CHECKING, List, Optional, Tuple
 
 import numpy
 import numpy as np
 
-from .. import full_context_label
-from ..full_context_label import extract_full_context_label
+from ..full_context_label import extract_full_context_labels, split_label
 from ..model import AccentPhrase, AudioQuery, Mora
 from ..mora_list import openjtalk_mora2text
+from ..user_dict import (
+    get_loaded_user_dict_path,
+    get_user_dict_version,
+    openjtalk_dict_lock,
+)
+from .accent_phrase_cache import (
+    AccentPhraseCache,
+    AccentPhraseSkeleton,
+    MoraSkeleton,
+    skeletons_to_accent_phrases,
+)
+
+if TYPE_CHECKING:
+    from .frontend_pool import FrontendPool
+
+# テキスト解析結果はコアに依存しないので、全てのエンジンで共有する
+accent_phrase_cache = AccentPhraseCache()
+# 設定されている場合、テキスト解析はこのプロセスプールで行う
+frontend_pool: Optional["FrontendPool"] = None
+
+
+def set_frontend_pool(pool: Optional["FrontendPool"]) -> None:
+    global frontend_pool
+    frontend_pool = pool
 
 
 def mora_to_text(mora: str) -> str:
@@ -27,27 +49,30 @@ def adjust_interrogative_accent_phrases(
     """
     enable_interrogative_upspeakが有効になっていて与えられたaccent_phrasesに疑問系のものがあった場合、
     各accent_phraseの末尾にある疑問系発音用のMoraに対して直前のMoraより少し音を高くすることで疑問文ぽくする
+    元のaccent_phrasesは変更しない。変更の必要がないAccentPhraseやMoraはコピーせずにそのまま返す
     NOTE: リファクタリング時に適切な場所へ移動させること
     """
     return [
-        AccentPhrase(
-            moras=adjust_interrogative_moras(accent_phrase),
-            accent=accent_phrase.accent,
-            pause_mora=accent_phrase.pause_mora,
-            is_interrogative=accent_phrase.is_interrogative,
-        )
+        accent_phrase.copy(update={"moras": adjust_interrogative_moras(accent_phrase)})
+        if is_upspeak_target(accent_phrase)
+        else accent_phrase
         for accent_phrase in accent_phrases
     ]
 
 
+def is_upspeak_target(accent_phrase: AccentPhrase) -> bool:
+    moras = accent_phrase.moras
+    return accent_phrase.is_interrogative and not (
+        len(moras) == 0 or moras[-1].pitch == 0
+    )
+
+
 def adjust_interrogative_moras(accent_phrase: AccentPhrase) -> List[Mora]:
-    moras = copy.deepcopy(accent_phrase.moras)
-    if accent_phrase.is_interrogative and not (len(moras) == 0 or moras[-1].pitch == 0):
-        interrogative_mora = make_interrogative_mora(moras[-1])
-        moras.append(interrogative_mora)
-        return moras
+    if is_upspeak_target(accent_phrase):
+        # 元のリストは変更せず、疑問系発音用のMoraを追加した新しいリストを返す
+        return accent_phrase.moras + [make_interrogative_mora(accent_phrase.moras[-1])]
     else:
-        return moras
+        return accent_phrase.moras
 
 
 def make_interrogative_mora(last_mora: Mora) -> Mora:
@@ -64,20 +89,110 @@ def make_interrogative_mora(last_mora: Mora) -> Mora:
     )
 
 
-def full_context_label_moras_to_moras(
-    full_context_moras: List[full_context_label.Mora],
-) -> List[Mora]:
-    return [
-        Mora(
-            text=mora_to_text("".join([p.phoneme for p in mora.phonemes])),
-            consonant=(mora.consonant.phoneme if mora.consonant is not None else None),
-            consonant_length=0 if mora.consonant is not None else None,
-            vowel=mora.vowel.phoneme,
-            vowel_length=0,
-            pitch=0,
+def labels_to_accent_phrase_skeletons(
+    labels: List[str],
+) -> Tuple[AccentPhraseSkeleton, ...]:
+    """
+    pyopenjtalk.extract_fullcontextで得られたラベルを先頭から一度だけ走査し、
+    音素長・音高を設定する前のアクセント句を作成する
+    extract_full_context_labelでUtteranceを組み立ててから変換した場合と同じ結果になる
+    """
+    fields = [split_label(label) for label in labels]
+
+    # [アクセント位置, 疑問文かどうか, 後ろに無音を付けるかどうか, モーラ]
+    accent_phrases: List[list] = []
+    # 現在の呼気段落の最初のアクセント句と、直前の呼気段落の最後のアクセント句の位置
+    breath_group_start = 0
+    prev_breath_group_end: Optional[int] = None
+
+    moras: List[MoraSkeleton] = []
+    mora_phonemes: List[str] = []
+    # アクセント句の最初のモーラの母音のf2と、最後のモーラの母音のf3
+    first_f2: Optional[str] = None
+    last_f3 = ""
+    # workaround for Hihosiba/voicevox_engine#57
+    # (py)openjtalk によるアクセント句内のモーラへの附番は 49 番目まで
+    # 49 番目のモーラについて、続く音素のモーラ番号を単一モーラの特定に使えないので、アクセント句の残りを読み飛ばす
+    skipping = False
+
+    for i, (phoneme, a2, f1, f2, f3, f5, i3) in enumerate(fields):
+        if f1 == "xx":
+            # 無音で呼気段落が区切られる
+            if len(accent_phrases) > breath_group_start:
+                if prev_breath_group_end is not None:
+                    accent_phrases[prev_breath_group_end][2] = True
+                prev_breath_group_end = len(accent_phrases) - 1
+                breath_group_start = len(accent_phrases)
+            continue
+
+        next_fields = fields[i + 1] if i + 1 < len(fields) else None
+        is_accent_phrase_end = (
+            next_fields is None or i3 != next_fields[6] or f5 != next_fields[5]
         )
-        for mora in full_context_moras
-    ]
+
+        if not skipping and int(a2) == 49:
+            skipping = True
+        if not skipping:
+            mora_phonemes.append(phoneme)
+            if is_accent_phrase_end or a2 != next_fields[1]:
+                if len(mora_phonemes) == 1:
+                    consonant, vowel = None, mora_phonemes[0]
+                elif len(mora_phonemes) == 2:
+                    consonant, vowel = mora_phonemes
+                else:
+                    raise ValueError(mora_phonemes)
+                moras.append((mora_to_text("".join(mora_phonemes)), consonant, vowel))
+                mora_phonemes = []
+                if first_f2 is None:
+                    first_f2 = f2
+                last_f3 = f3
+
+        if is_accent_phrase_end:
+            if first_f2 is None:
+                raise IndexError("アクセント句にモーラがありません")
+            # workaround for Hihosiba/voicevox_engine#55
+            # アクセント位置とするキー f2 の値がアクセント句内のモーラ数を超える場合がある
+            accent = min(int(first_f2), len(moras))
+            accent_phrases.append([accent, last_f3 == "1", False, tuple(moras)])
+            moras = []
+            mora_phonemes = []
+            first_f2 = None
+            skipping = False
+
+    # 無音で終わっていない呼気段落は含めない
+    return tuple(
+        (accent, is_interrogative, has_pause, moras)
+        for accent, is_interrogative, has_pause, moras in accent_phrases[
+            :breath_group_start
+        ]
+    )
+
+
+def analyze_text(text: str) -> Tuple[AccentPhraseSkeleton, ...]:
+    """
+    テキストを解析し、音素長・音高を設定する前のアクセント句を返す
+    解析結果はキャッシュし、プロセスプールが設定されている場合はそちらで解析する
+    """
+    # 同じテキストでもユーザー辞書によって解析結果が変わるので、辞書の世代番号と合わせてキャッシュする
+    # 解析結果がずれないように、テキストは正規化せずにそのままキーとする
+    user_dict_version = get_user_dict_version()
+    skeletons = accent_phrase_cache.get(text, user_dict_version)
+    if skeletons is not None:
+        return skeletons
+
+    # 解析中に辞書が切り替わると世代番号と解析結果がずれるので、解析が終わるまで切り替えを待たせる
+    with openjtalk_dict_lock.read_lock():
+        user_dict_version = get_user_dict_version()
+        if frontend_pool is not None:
+            skeletons = frontend_pool.analyze(
+                text, user_dict_version, get_loaded_user_dict_path()
+            )
+        else:
+            skeletons = labels_to_accent_phrase_skeletons(
+                extract_full_context_labels(text)
+            )
+    accent_phrase_cache.put(text, user_dict_version, skeletons)
+    return skeletons
 
 
 class SynthesisEngineBase(metaclass=ABCMeta):
@@ -184,40 +299,14 @@ class SynthesisEngineBase(metaclass=ABCMeta):
         if len(text.strip()) == 0:
             return []
 
-        utterance = extract_full_context_label(text)
-        if len(utterance.breath_groups) == 0:
+        skeletons = analyze_text(text)
+        if len(skeletons) == 0:
             return []
 
-        accent_phrases = self.replace_mora_data(
-            accent_phrases=[
-                AccentPhrase(
-                    moras=full_context_label_moras_to_moras(accent_phrase.moras),
-                    accent=accent_phrase.accent,
-                    pause_mora=(
-                        Mora(
-                            text="、",
-                            consonant=None,
-                            consonant_length=None,
-                            vowel="pau",
-                            vowel_length=0,
-                            pitch=0,
-                        )
-                        if (
-                            i_accent_phrase == len(breath_group.accent_phrases) - 1
-                            and i_breath_group != len(utterance.breath_groups) - 1
-                        )
-                        else None
-                    ),
-                    is_interrogative=accent_phrase.is_interrogative,
-                )
-                for i_breath_group, breath_group in enumerate(utterance.breath_groups)
-                for i_accent_phrase, accent_phrase in enumerate(
-                    breath_group.accent_phrases
-                )
-            ],
+        return self.replace_mora_data(
+            accent_phrases=skeletons_to_accent_phrases(skeletons),
             speaker_id=speaker_id,
         )
-        return accent_phrases
 
     def synthesis(
         self,
@@ -240,12 +329,17 @@ class SynthesisEngineBase(metaclass=ABCMeta):
         -------
         wave : numpy.ndarray
             音声合成結果
+            float32のモノラル波形で、outputStereoは書き込み時にwrite_waveで適用する
         """
         # モーフィング時などに同一参照のqueryで複数回呼ばれる可能性があるので、元の引数のqueryに破壊的変更を行わない
-        query = copy.deepcopy(query)
+        # 全体をdeepcopyするのは重いので、疑問文の調整で変わる部分だけを作り直す
         if enable_interrogative_upspeak:
-            query.accent_phrases = adjust_interrogative_accent_phrases(
-                query.accent_phrases
+            query = query.copy(
+                update={
+                    "accent_phrases": adjust_interrogative_accent_phrases(
+                        query.accent_phrases
+                    )
+                }
             )
         return self._synthesis_impl(query, speaker_id)
 
@@ -253,6 +347,7 @@ class SynthesisEngineBase(metaclass=ABCMeta):
     def _synthesis_impl(self, query: AudioQuery, speaker_id: int) -> np.ndarray:
         """
         音声合成クエリから音声合成に必要な情報を構成し、実際に音声合成を行う
+        queryやそれに含まれるAccentPhrase・Moraは呼び出し元と共有されているので、変更してはならない
         Parameters
         ----------
         query : AudioQuery
@@ -263,5 +358,6 @@ class SynthesisEngineBase(metaclass=ABCMeta):
         -------
         wave : numpy.ndarray
             音声合成結果
+            float32のモノラル波形で、outputStereoは書き込み時にwrite_waveで適用する
         """
         raise NotImplementedError()
@@ -1,19 +1,50 @@
+import csv
 import json
 import sys
 import threading
+import time
 import traceback
+from contextlib import contextmanager
+from hashlib import sha256
+from itertools import islice
 from pathlib import Path
-from typing import Dict, List, Optional
+from typing import (
+    Any,
+    Dict,
+    Iterator,
+    List,
+    MutableMapping,
+    Optional,
+    Sequence,
+    TextIO,
+    Tuple,
+)
 from uuid import UUID, uuid4
 
 import numpy as np
 import pyopenjtalk
 from fastapi import HTTPException
-from pydantic import conint
-
-from .model import UserDictWord, WordTypes
-from .part_of_speech_data import MAX_PRIORITY, MIN_PRIORITY, part_of_speech_data
-from .utility import engine_root, get_save_dir, mutex_wrapper
+from pydantic import ValidationError, conint
+
+from .model import (
+    UserDictImportError,
+    UserDictImportFormat,
+    UserDictImportProgress,
+    UserDictImportRow,
+    UserDictOperation,
+    UserDictOperationResult,
+    UserDictOperationType,
+    UserDictWord,
+    WordTypes,
+)
+from .part_of_speech_data import (
+    MAX_PRIORITY,
+    MIN_PRIORITY,
+    part_of_speech_data,
+    part_of_speech_data_by_context_id,
+)
+from .user_dict_store import SQLiteUserDictStore
+from .utility import ReadWriteLock, engine_root, get_save_dir, mutex_wrapper
 
 root_dir = engine_root()
 save_dir = get_save_dir()
@@ -24,20 +55,73 @@ if not save_dir.is_dir():
 default_dict_path = root_dir / "default.csv"
 user_dict_path = save_dir / "user_dict.json"
 compiled_dict_path = save_dir / "user.dic"
+user_dict_db_path = save_dir / "user_dict.sqlite3"
 
 
 mutex_user_dict = threading.Lock()
 mutex_openjtalk_dict = threading.Lock()
+# jsonのユーザー辞書を読み込んでから書き直すまでの間に取るロック
+mutex_edit_json_dict = threading.Lock()
+
+# OpenJTalkに読み込まれているユーザー辞書を切り替える間、テキスト解析を待たせるためのロック
+# テキスト解析は読み込み、辞書の切り替えは書き込みとしてロックを取る
+openjtalk_dict_lock = ReadWriteLock()
+
+# OpenJTalkに読み込まれているユーザー辞書の世代番号
+# update_dictで辞書を読み込み直すたびに増え、テキスト解析結果のキャッシュの無効化に使う
+user_dict_version = 0
+# OpenJTalkに読み込まれているコンパイル済みユーザー辞書のパス
+loaded_user_dict_path: Optional[Path] = None
+
+
+def get_user_dict_version() -> int:
+    return user_dict_version
+
+
+def get_loaded_user_dict_path() -> Optional[Path]:
+    return loaded_user_dict_path
+
+
+def get_dict_digest(csv_text: str) -> str:
+    """
+    コンパイル前の辞書.csvの内容から、コンパイル済み辞書のキャッシュのキーを作る
+    コンパイル結果はpyopenjtalkのバージョンにも依存するので、キーに含める
+    """
+    return sha256(f"{pyopenjtalk.__version__}\n{csv_text}".encode("utf-8")).hexdigest()
+
+
+def get_cached_dict_path(compiled_dict_path: Path, digest: str) -> Path:
+    """
+    辞書の内容ごとのコンパイル済みユーザー辞書のパスを返す
+    内容が変わるたびに別のファイルになるので、読み込み中の辞書ファイルを上書きすることはない
+    """
+    return compiled_dict_path.with_name(
+        f"{compiled_dict_path.stem}-{digest}{compiled_dict_path.suffix}"
+    )
+
+
+def _remove_old_cached_dicts(compiled_dict_path: Path, current_path: Path) -> None:
+    for path in compiled_dict_path.parent.glob(
+        f"{compiled_dict_path.stem}-*{compiled_dict_path.suffix}"
+    ):
+        if path.resolve() != current_path:
+            try:
+                path.unlink()
+            except OSError:
+                # Windowsでは他のプロセスが読み込み中の辞書を削除できないので、次のコンパイル時に削除する
+                pass
 
 
 @mutex_wrapper(mutex_user_dict)
 def write_to_json(user_dict: Dict[str, UserDictWord], user_dict_path: Path):
+    costs = priorities2costs(
+        [word.context_id for word in user_dict.values()],
+        [word.priority for word in user_dict.values()],
+    ).tolist()
     converted_user_dict = {}
-    for word_uuid, word in user_dict.items():
+    for (word_uuid, word), cost in zip(user_dict.items(), costs):
         word_dict = word.dict()
-        word_dict["cost"] = priority2cost(
-            word_dict["context_id"], word_dict["priority"]
-        )
+        word_dict["cost"] = cost
         del word_dict["priority"]
         converted_user_dict[word_uuid] = word_dict
     # 予めjsonに変換できることを確かめる
@@ -51,6 +135,13 @@ def update_dict(
     user_dict_path: Path = user_dict_path,
     compiled_dict_path: Path = compiled_dict_path,
 ):
+    """
+    ユーザー辞書をコンパイルし、OpenJTalkに読み込まれている辞書を切り替える
+    コンパイル中もテキスト解析は以前の辞書で行われ、切り替えの間だけテキスト解析を待たせる
+    同じ内容の辞書をコンパイルしたことがあれば、コンパイルを省略してそのファイルを読み込む
+    """
+    global user_dict_version, loaded_user_dict_path
+
     random_string = uuid4()
     tmp_csv_path = save_dir / f".tmp.dict_csv-{random_string}"
     tmp_compiled_path = save_dir / f".tmp.dict_compiled-{random_string}"
@@ -66,8 +157,11 @@ def update_dict(
             default_dict += "\n"
         csv_text += default_dict
         user_dict = read_dict(user_dict_path=user_dict_path)
-        for word_uuid in user_dict:
-            word = user_dict[word_uuid]
+        costs = priorities2costs(
+            [word.context_id for word in user_dict.values()],
+            [word.priority for word in user_dict.values()],
+        ).tolist()
+        for word, cost in zip(user_dict.values(), costs):
             csv_text += (
                 "{surface},{context_id},{context_id},{cost},{part_of_speech},"
                 + "{part_of_speech_detail_1},{part_of_speech_detail_2},"
@@ -77,7 +171,7 @@ def update_dict(
             ).format(
                 surface=word.surface,
                 context_id=word.context_id,
-                cost=priority2cost(word.context_id, word.priority),
+                cost=cost,
                 part_of_speech=word.part_of_speech,
                 part_of_speech_detail_1=word.part_of_speech_detail_1,
                 part_of_speech_detail_2=word.part_of_speech_detail_2,
@@ -91,18 +185,29 @@ def update_dict(
                 mora_count=word.mora_count,
                 accent_associative_rule=word.accent_associative_rule,
             )
-        tmp_csv_path.write_text(csv_text, encoding="utf-8")
-
-        # 辞書.csvをOpenJTalk用にコンパイル
-        pyopenjtalk.create_user_dict(str(tmp_csv_path), str(tmp_compiled_path))
-        if not tmp_compiled_path.is_file():
-            raise RuntimeError("辞書のコンパイル時にエラーが発生しました。")
 
-        # コンパイル済み辞書の置き換え・読み込み
-        pyopenjtalk.unset_user_dict()
-        tmp_compiled_path.replace(compiled_dict_path)
-        if compiled_dict_path.is_file():
-            pyopenjtalk.set_user_dict(str(compiled_dict_path.resolve(strict=True)))
+        # 同じ内容の辞書がコンパイル済みであれば、コンパイルせずにそれを読み込む
+        new_dict_path = get_cached_dict_path(
+            compiled_dict_path, get_dict_digest(csv_text)
+        )
+        if not new_dict_path.is_file():
+            # 辞書.csvをOpenJTalk用にコンパイル
+            tmp_csv_path.write_text(csv_text, encoding="utf-8")
+            pyopenjtalk.create_user_dict(str(tmp_csv_path), str(tmp_compiled_path))
+            if not tmp_compiled_path.is_file():
+                raise RuntimeError("辞書のコンパイル時にエラーが発生しました。")
+            # 途中まで書き込まれたファイルをキャッシュとして読み込まないように、最後に名前を変える
+            tmp_compiled_path.replace(new_dict_path)
+        new_dict_path = new_dict_path.resolve(strict=True)
+
+        # 辞書の読み込み・切り替え
+        # set_user_dictは新しい辞書を読み込んでから置き換えるので、辞書が読み込まれていない時間はない
+        with openjtalk_dict_lock.write_lock():
+            pyopenjtalk.set_user_dict(str(new_dict_path))
+            loaded_user_dict_path = new_dict_path
+            user_dict_version += 1
+
+        _remove_old_cached_dicts(compiled_dict_path, new_dict_path)
 
     except Exception as e:
         print("Error: Failed to update dictionary.", file=sys.stderr)
@@ -117,27 +222,255 @@ def update_dict(
             tmp_compiled_path.unlink()
 
 
+class UserDictCompileWorker:
+    """
+    ユーザー辞書のコンパイルと切り替えを、バックグラウンドのスレッドで行う
+    続けて更新が要求された場合は、最後の要求からdebounce_seconds秒経ってからまとめて1回だけコンパイルする
+    """
+
+    def __init__(
+        self,
+        debounce_seconds: float = 0.5,
+        default_dict_path: Path = default_dict_path,
+        user_dict_path: Path = user_dict_path,
+        compiled_dict_path: Path = compiled_dict_path,
+    ):
+        self.debounce_seconds = debounce_seconds
+        self.default_dict_path = default_dict_path
+        self.user_dict_path = user_dict_path
+        self.compiled_dict_path = compiled_dict_path
+
+        self._condition = threading.Condition()
+        self._requested_at: Optional[float] = None
+        self._compiling = False
+        self._closed = False
+        self._thread = threading.Thread(target=self._run, daemon=True)
+        self._thread.start()
+
+    def request(self) -> None:
+        """
+        コンパイルを要求する。コンパイルの完了は待たない
+        """
+        with self._condition:
+            if self._closed:
+                raise RuntimeError("UserDictCompileWorker is already closed")
+            self._requested_at = time.monotonic()
+            self._condition.notify_all()
+
+    @property
+    def pending(self) -> bool:
+        """
+        要求されたコンパイルがまだ終わっていないか
+        """
+        with self._condition:
+            return self._requested_at is not None or self._compiling
+
+    def wait(self, timeout: Optional[float] = None) -> bool:
+        """
+        要求されたコンパイルが全て終わるまで待つ。タイムアウトした場合はFalseを返す
+        """
+        with self._condition:
+            return self._condition.wait_for(
+                lambda: self._requested_at is None and not self._compiling,
+                timeout=timeout,
+            )
+
+    def close(self) -> None:
+        """
+        要求済みのコンパイルを待たずに行ってから、スレッドを終了する
+        """
+        with self._condition:
+            self._closed = True
+            self._condition.notify_all()
+        self._thread.join()
+
+    def _run(self) -> None:
+        while True:
+            with self._condition:
+                while self._requested_at is None and not self._closed:
+                    self._condition.wait()
+                if self._requested_at is None:
+                    return
+                # 最後の要求からdebounce_seconds秒経つまで待つ
+                while not self._closed:
+                    remaining = (
+                        self._requested_at + self.debounce_seconds - time.monotonic()
+                    )
+                    if remaining <= 0:
+                        break
+                    self._condition.wait(remaining)
+                self._requested_at = None
+                self._compiling = True
+
+            try:
+                update_dict(
+                    default_dict_path=self.default_dict_path,
+                    user_dict_path=self.user_dict_path,
+                    compiled_dict_path=self.compiled_dict_path,
+                )
+            except Exception:
+                # エラーの内容はupdate_dictが出力する。次の要求で再度コンパイルする
+                pass
+            finally:
+                with self._condition:
+                    self._compiling = False
+                    self._condition.notify_all()
+
+
+# ユーザー辞書を変更したときにコンパイルを行うワーカー
+# 設定されていない場合は、変更した関数の中でコンパイルまで行う
+compile_worker: Optional[UserDictCompileWorker] = None
+
+
+def set_compile_worker(worker: Optional[UserDictCompileWorker]) -> None:
+    global compile_worker
+    compile_worker = worker
+
+
+def get_user_dict_compile_pending() -> bool:
+    return compile_worker is not None and compile_worker.pending
+
+
+def request_update_dict(
+    user_dict_path: Path = user_dict_path,
+    compiled_dict_path: Path = compiled_dict_path,
+    default_dict_path: Path = default_dict_path,
+) -> None:
+    """
+    ユーザー辞書の変更をOpenJTalkに反映する
+    同じ辞書を扱うワーカーが設定されている場合はバックグラウンドでのコンパイルを要求し、完了を待たない
+    """
+    worker = compile_worker
+    if (
+        worker is not None
+        and worker.user_dict_path == user_dict_path
+        and worker.compiled_dict_path == compiled_dict_path
+        and worker.default_dict_path == default_dict_path
+    ):
+        worker.request()
+    else:
+        update_dict(
+            default_dict_path=default_dict_path,
+            user_dict_path=user_dict_path,
+            compiled_dict_path=compiled_dict_path,
+        )
+
+
+# ユーザー辞書をjsonの代わりに保存するSQLiteのデータベース
+# 設定されていない場合は、jsonに保存する
+user_dict_store: Optional[SQLiteUserDictStore] = None
+
+
+def set_user_dict_store(store: Optional[SQLiteUserDictStore]) -> None:
+    global user_dict_store
+    user_dict_store = store
+
+
+def _get_user_dict_store(user_dict_path: Path) -> Optional[SQLiteUserDictStore]:
+    store = user_dict_store
+    if store is not None and store.user_dict_path == user_dict_path:
+        return store
+    return None
+
+
+def open_user_dict_store(
+    db_path: Path = user_dict_db_path, user_dict_path: Path = user_dict_path
+) -> SQLiteUserDictStore:
+    """
+    ユーザー辞書をSQLiteのデータベースに保存するための準備をする
+    データベースを新しく作る場合は、jsonに保存されているユーザー辞書を移行する
+    jsonはそのまま残るが、以後は更新されない
+    """
+    is_new = not db_path.exists()
+    store = SQLiteUserDictStore(db_path=db_path, user_dict_path=user_dict_path)
+    if is_new:
+        user_dict = _read_json_dict(user_dict_path=user_dict_path)
+        with store.transaction() as transaction:
+            transaction.update(user_dict)
+    return store
+
+
+def export_user_dict_json(
+    json_path: Path, user_dict_path: Path = user_dict_path
+) -> None:
+    """
+    ユーザー辞書をjsonに書き出す
+    書き出したjsonは、SQLiteを使わない場合のユーザー辞書としてそのまま使える
+    """
+    write_to_json(read_dict(user_dict_path=user_dict_path), json_path)
+
+
 @mutex_wrapper(mutex_user_dict)
-def read_dict(user_dict_path: Path = user_dict_path) -> Dict[str, UserDictWord]:
+def _read_json_dict(user_dict_path: Path) -> Dict[str, UserDictWord]:
     if not user_dict_path.is_file():
         return {}
     with user_dict_path.open(encoding="utf-8") as f:
-        result = {}
-        for word_uuid, word in json.load(f).items():
-            # cost2priorityで変換を行う際にcontext_idが必要となるが、
-            # 0.12以前の辞書は、context_idがハードコーディングされていたためにユーザー辞書内に保管されていない
-            # ハードコーディングされていたcontext_idは固有名詞を意味するものなので、固有名詞のcontext_idを補完する
-            if word.get("context_id") is None:
-                word["context_id"] = part_of_speech_data[
-                    WordTypes.PROPER_NOUN
-                ].context_id
-            word["priority"] = cost2priority(word["context_id"], word["cost"])
-            del word["cost"]
-            result[str(UUID(word_uuid))] = UserDictWord(**word)
-
+        words = json.load(f)
+    for word in words.values():
+        # cost2priorityで変換を行う際にcontext_idが必要となるが、
+        # 0.12以前の辞書は、context_idがハードコーディングされていたためにユーザー辞書内に保管されていない
+        # ハードコーディングされていたcontext_idは固有名詞を意味するものなので、固有名詞のcontext_idを補完する
+        if word.get("context_id") is None:
+            word["context_id"] = part_of_speech_data[WordTypes.PROPER_NOUN].context_id
+    priorities = costs2priorities(
+        [word["context_id"] for word in words.values()],
+        [word.pop("cost") for word in words.values()],
+    ).tolist()
+    result = {}
+    for (word_uuid, word), priority in zip(words.items(), priorities):
+        word["priority"] = priority
+        result[str(UUID(word_uuid))] = UserDictWord(**word)
     return result
 
 
+def read_dict(user_dict_path: Path = user_dict_path) -> Dict[str, UserDictWord]:
+    store = _get_user_dict_store(user_dict_path)
+    if store is not None:
+        return store.read_all()
+    return _read_json_dict(user_dict_path=user_dict_path)
+
+
+def search_dict(
+    surface: Optional[str] = None,
+    offset: int = 0,
+    limit: Optional[int] = None,
+    user_dict_path: Path = user_dict_path,
+) -> Dict[str, UserDictWord]:
+    """
+    表層形で絞り込んだ言葉を、登録順にoffset件目からlimit件返す
+    表層形は登録時と同じく正規化してから比較する
+    """
+    if surface is not None:
+        surface = UserDictWord.convert_to_zenkaku(surface)
+    store = _get_user_dict_store(user_dict_path)
+    if store is not None:
+        return store.search(surface=surface, offset=offset, limit=limit)
+    words = [
+        (word_uuid, word)
+        for word_uuid, word in read_dict(user_dict_path=user_dict_path).items()
+        if surface is None or word.surface == surface
+    ]
+    return dict(words[offset : None if limit is None else offset + limit])
+
+
+@contextmanager
+def _edit_dict(user_dict_path: Path) -> Iterator[MutableMapping[str, UserDictWord]]:
+    """
+    ユーザー辞書をdictとして編集する。例外が発生した場合は変更を保存しない
+    SQLiteに保存する場合は変更した言葉だけを書き込み、jsonに保存する場合は辞書全体を書き直す
+    """
+    store = _get_user_dict_store(user_dict_path)
+    if store is not None:
+        with store.transaction() as transaction:
+            yield transaction
+    else:
+        # 読み込んでから書き直すまでの間に、他の変更が書き込まれて失われないようにする
+        with mutex_edit_json_dict:
+            user_dict = _read_json_dict(user_dict_path=user_dict_path)
+            yield user_dict
+            write_to_json(user_dict, user_dict_path)
+
+
 def create_word(
     surface: str,
     pronunciation: str,
@@ -188,11 +521,12 @@ def apply_word(
         word_type=word_type,
         priority=priority,
     )
-    user_dict = read_dict(user_dict_path=user_dict_path)
     word_uuid = str(uuid4())
-    user_dict[word_uuid] = word
-    write_to_json(user_dict, user_dict_path)
-    update_dict(user_dict_path=user_dict_path, compiled_dict_path=compiled_dict_path)
+    with _edit_dict(user_dict_path) as user_dict:
+        user_dict[word_uuid] = word
+    request_update_dict(
+        user_dict_path=user_dict_path, compiled_dict_path=compiled_dict_path
+    )
     return word_uuid
 
 
@@ -213,12 +547,13 @@ def rewrite_word(
         word_type=word_type,
         priority=priority,
     )
-    user_dict = read_dict(user_dict_path=user_dict_path)
-    if word_uuid not in user_dict:
-        raise HTTPException(status_code=422, detail="UUIDに該当するワードが見つかりませんでした")
-    user_dict[word_uuid] = word
-    write_to_json(user_dict, user_dict_path)
-    update_dict(user_dict_path=user_dict_path, compiled_dict_path=compiled_dict_path)
+    with _edit_dict(user_dict_path) as user_dict:
+        if word_uuid not in user_dict:
+            raise HTTPException(status_code=422, detail="UUIDに該当するワードが見つかりませんでした")
+        user_dict[word_uuid] = word
+    request_update_dict(
+        user_dict_path=user_dict_path, compiled_dict_path=compiled_dict_path
+    )
 
 
 def delete_word(
@@ -226,12 +561,149 @@ def delete_word(
     user_dict_path: Path = user_dict_path,
     compiled_dict_path: Path = compiled_dict_path,
 ):
-    user_dict = read_dict(user_dict_path=user_dict_path)
-    if word_uuid not in user_dict:
-        raise HTTPException(status_code=422, detail="IDに該当するワードが見つかりませんでした")
-    del user_dict[word_uuid]
-    write_to_json(user_dict, user_dict_path)
-    update_dict(user_dict_path=user_dict_path, compiled_dict_path=compiled_dict_path)
+    with _edit_dict(user_dict_path) as user_dict:
+        if word_uuid not in user_dict:
+            raise HTTPException(status_code=422, detail="IDに該当するワードが見つかりませんでした")
+        del user_dict[word_uuid]
+    request_update_dict(
+        user_dict_path=user_dict_path, compiled_dict_path=compiled_dict_path
+    )
+
+
+def _apply_operation(
+    user_dict: MutableMapping[str, UserDictWord], operation: UserDictOperation
+) -> str:
+    """
+    1件分の操作をメモリ上のユーザー辞書に適用し、操作した言葉のUUIDを返す
+    """
+    if operation.type == UserDictOperationType.ADD:
+        word_uuid = str(uuid4())
+    else:
+        word_uuid = operation.word_uuid
+        if word_uuid not in user_dict:
+            raise HTTPException(status_code=422, detail="UUIDに該当するワードが見つかりませんでした")
+        if operation.type == UserDictOperationType.DELETE:
+            del user_dict[word_uuid]
+            return word_uuid
+
+    if (
+        operation.surface is None
+        or operation.pronunciation is None
+        or operation.accent_type is None
+    ):
+        raise HTTPException(
+            status_code=422, detail="surface, pronunciation, accent_typeを指定してください"
+        )
+    user_dict[word_uuid] = create_word(
+        surface=operation.surface,
+        pronunciation=operation.pronunciation,
+        accent_type=operation.accent_type,
+        word_type=operation.word_type,
+        priority=operation.priority,
+    )
+    return word_uuid
+
+
+def _apply_operations(
+    user_dict: MutableMapping[str, UserDictWord],
+    operations: List[UserDictOperation],
+    originals: Dict[str, Optional[UserDictWord]],
+) -> List[UserDictOperationResult]:
+    """
+    操作を先頭から順にユーザー辞書に適用し、操作ごとの結果を返す
+    変更した言葉の変更前の内容をoriginalsに記録する
+    """
+    results: List[UserDictOperationResult] = []
+    for operation in operations:
+        if operation.word_uuid is not None and operation.word_uuid in user_dict:
+            originals.setdefault(operation.word_uuid, user_dict[operation.word_uuid])
+        try:
+            word_uuid = _apply_operation(user_dict, operation)
+        except HTTPException as e:
+            results.append(
+                UserDictOperationResult(
+                    success=False, word_uuid=operation.word_uuid, error=e.detail
+                )
+            )
+        except ValidationError as e:
+            results.append(
+                UserDictOperationResult(
+                    success=False,
+                    word_uuid=operation.word_uuid,
+                    error="パラメータに誤りがあります。\n" + str(e),
+                )
+            )
+        else:
+            originals.setdefault(word_uuid, None)
+            results.append(UserDictOperationResult(success=True, word_uuid=word_uuid))
+    return results
+
+
+def apply_user_dict_operations(
+    operations: List[UserDictOperation],
+    user_dict_path: Path = user_dict_path,
+    compiled_dict_path: Path = compiled_dict_path,
+) -> List[UserDictOperationResult]:
+    """
+    ユーザー辞書に対する追加・更新・削除をまとめて適用する
+    全ての操作に成功した場合のみ、辞書の保存とコンパイルを1回ずつ行う
+    1件でも失敗した場合はユーザー辞書を変更しない
+    Parameters
+    ----------
+    operations : List[UserDictOperation]
+        操作のリスト。先頭から順に適用される
+    Returns
+    -------
+    results : List[UserDictOperationResult]
+        操作ごとの結果
+    """
+    store = _get_user_dict_store(user_dict_path)
+    # 変更した言葉の変更前の内容(追加した言葉はNone)。SQLiteに保存する場合に、コンパイルに失敗したら元に戻すために使う
+    originals: Dict[str, Optional[UserDictWord]] = {}
+    if store is not None:
+        with store.transaction() as transaction:
+            results = _apply_operations(transaction, operations, originals)
+            if not all(result.success for result in results):
+                transaction.rollback()
+    else:
+        user_dict = _read_json_dict(user_dict_path=user_dict_path)
+        results = _apply_operations(user_dict, operations, originals)
+
+    if not all(result.success for result in results):
+        # 保存されないので、追加した言葉に割り振ったUUIDは返さない
+        for operation, result in zip(operations, results):
+            if operation.type == UserDictOperationType.ADD:
+                result.word_uuid = None
+        return results
+    if len(operations) == 0:
+        return results
+
+    # コンパイルに失敗した場合に元に戻せるよう、書き込み前のjsonを保持しておく
+    # バックグラウンドでコンパイルする場合は、失敗しても元に戻さず次の更新で再度コンパイルする
+    old_user_dict_json = None
+    if store is None:
+        old_user_dict_json = (
+            user_dict_path.read_bytes() if user_dict_path.is_file() else None
+        )
+        write_to_json(user_dict, user_dict_path)
+    try:
+        request_update_dict(
+            user_dict_path=user_dict_path, compiled_dict_path=compiled_dict_path
+        )
+    except Exception:
+        if store is not None:
+            with store.transaction() as transaction:
+                for word_uuid, word in originals.items():
+                    if word is None:
+                        transaction.pop(word_uuid, None)
+                    else:
+                        transaction[word_uuid] = word
+        elif old_user_dict_json is None:
+            user_dict_path.unlink(missing_ok=True)
+        else:
+            user_dict_path.write_bytes(old_user_dict_json)
+        raise
+    return results
 
 
 def import_user_dict(
@@ -245,50 +717,223 @@ def import_user_dict(
     for word_uuid, word in dict_data.items():
         UUID(word_uuid)
         assert isinstance(word, UserDictWord)
-        for pos_detail in part_of_speech_data.values():
-            if word.context_id == pos_detail.context_id:
-                assert word.part_of_speech == pos_detail.part_of_speech
-                assert (
-                    word.part_of_speech_detail_1 == pos_detail.part_of_speech_detail_1
-                )
-                assert (
-                    word.part_of_speech_detail_2 == pos_detail.part_of_speech_detail_2
-                )
-                assert (
-                    word.part_of_speech_detail_3 == pos_detail.part_of_speech_detail_3
-                )
-                assert (
-                    word.accent_associative_rule in pos_detail.accent_associative_rules
-                )
-                break
-        else:
+        pos_detail = part_of_speech_data_by_context_id.get(word.context_id)
+        if pos_detail is None:
             raise ValueError("対応していない品詞です")
-    old_dict = read_dict(user_dict_path=user_dict_path)
-    if override:
-        new_dict = {**old_dict, **dict_data}
-    else:
-        new_dict = {**dict_data, **old_dict}
-    write_to_json(user_dict=new_dict, user_dict_path=user_dict_path)
-    update_dict(
+        assert word.part_of_speech == pos_detail.part_of_speech
+        assert word.part_of_speech_detail_1 == pos_detail.part_of_speech_detail_1
+        assert word.part_of_speech_detail_2 == pos_detail.part_of_speech_detail_2
+        assert word.part_of_speech_detail_3 == pos_detail.part_of_speech_detail_3
+        assert word.accent_associative_rule in pos_detail.accent_associative_rules
+    with _edit_dict(user_dict_path) as user_dict:
+        for word_uuid, word in dict_data.items():
+            if override or word_uuid not in user_dict:
+                user_dict[word_uuid] = word
+    request_update_dict(
         default_dict_path=default_dict_path,
         user_dict_path=user_dict_path,
         compiled_dict_path=compiled_dict_path,
     )
 
 
+def _read_import_rows(
+    file: TextIO, format: UserDictImportFormat
+) -> Iterator[Tuple[int, Dict[str, Any]]]:
+    """
+    インポートするファイルを1行ずつ読み、行番号と列名ごとの値を返す
+    """
+    if format == UserDictImportFormat.CSV:
+        reader = csv.DictReader(file)
+        for row in reader:
+            # 空欄は指定しなかったものとして扱う
+            yield reader.line_num, {
+                key: value for key, value in row.items() if value not in ("", None)
+            }
+    else:
+        for line_num, line in enumerate(file, start=1):
+            if line.strip() == "":
+                continue
+            try:
+                row = json.loads(line)
+            except json.JSONDecodeError as e:
+                row = e
+            yield line_num, row
+
+
+def _parse_import_row(row: Any) -> Tuple[Optional[str], UserDictWord]:
+    if isinstance(row, json.JSONDecodeError):
+        raise ValueError(f"JSONとして読み込めません。({row})")
+    if not isinstance(row, dict):
+        raise ValueError("JSONのオブジェクトではありません。")
+    import_row = UserDictImportRow(**row)
+    word = create_word(
+        surface=import_row.surface,
+        pronunciation=import_row.pronunciation,
+        accent_type=import_row.accent_type,
+        word_type=import_row.word_type,
+        priority=import_row.priority,
+    )
+    word_uuid = None if import_row.word_uuid is None else str(import_row.word_uuid)
+    return word_uuid, word
+
+
+def import_user_dict_stream(
+    file: TextIO,
+    format: UserDictImportFormat,
+    override: bool = False,
+    chunk_size: int = 1000,
+    user_dict_path: Path = user_dict_path,
+    default_dict_path: Path = default_dict_path,
+    compiled_dict_path: Path = compiled_dict_path,
+) -> Iterator[UserDictImportProgress]:
+    """
+    CSVまたはJSONLのファイルから言葉を少しずつ読み込み、ユーザー辞書に追加する
+    chunk_size行ごとに辞書へ書き込んで進捗を返し、全て読み込んだ後に1回だけ辞書をコンパイルする
+    読み込めなかった行は進捗のerrorsで報告し、インポートは中断しない
+    chunk_size行ごとに辞書へ書き込むので、インポート中に行われた他の変更も失われない
+    SQLiteに保存する場合は、辞書全体をメモリに載せない
+    インポートに失敗した場合は例外を送出せず、errorに理由を入れた進捗を最後に返す
+
+    Parameters
+    ----------
+    file: TextIO
+        インポートするファイル。各行の形式はUserDictImportRowを参照
+    format: UserDictImportFormat
+        ファイルの形式
+    override: bool
+        word_uuidが既に登録されている言葉と重複した場合、上書きするかどうか
+    """
+    progress = UserDictImportProgress(
+        processed=0, imported=0, failed=0, errors=[], done=False
+    )
+    # 辞書への書き込みが確定した言葉の数。途中で失敗した場合はこの数を報告する
+    committed = 0
+    try:
+        rows = _read_import_rows(file, format)
+        while True:
+            chunk = list(islice(rows, chunk_size))
+            if len(chunk) == 0:
+                break
+            progress.errors = []
+            # インポート中の他の変更を上書きしないよう、chunk_size行ごとに辞書を読み直して書き込む
+            with _edit_dict(user_dict_path) as user_dict:
+                for line_num, row in chunk:
+                    progress.processed += 1
+                    try:
+                        word_uuid, word = _parse_import_row(row)
+                    except HTTPException as e:
+                        error = e.detail
+                    except ValidationError as e:
+                        error = "パラメータに誤りがあります。\n" + str(e)
+                    except ValueError as e:
+                        error = str(e)
+                    else:
+                        if word_uuid is None:
+                            word_uuid = str(uuid4())
+                        if override or word_uuid not in user_dict:
+                            user_dict[word_uuid] = word
+                            progress.imported += 1
+                        continue
+                    progress.failed += 1
+                    progress.errors.append(
+                        UserDictImportError(line=line_num, error=error)
+                    )
+            committed = progress.imported
+            try:
+                yield progress.copy(deep=True)
+            except GeneratorExit:
+                # 途中で打ち切られた場合も、書き込み済みの言葉は辞書に反映しておく
+                if progress.imported > 0:
+                    request_update_dict(
+                        default_dict_path=default_dict_path,
+                        user_dict_path=user_dict_path,
+                        compiled_dict_path=compiled_dict_path,
+                    )
+                raise
+
+        progress.errors = []
+        if progress.imported > 0:
+            request_update_dict(
+                default_dict_path=default_dict_path,
+                user_dict_path=user_dict_path,
+                compiled_dict_path=compiled_dict_path,
+            )
+    except Exception:
+        traceback.print_exc(file=sys.stderr)
+        # 書き込み中だった言葉は取り消されるので、書き込みが確定した数を報告する
+        # まだ報告していない読み込めなかった行は、errorsに残したまま返す
+        progress.imported = committed
+        progress.error = "ユーザー辞書のインポートに失敗しました。"
+        yield progress
+        return
+    progress.done = True
+    yield progress
+
+
+# 品詞ごとのcost_candidatesを並べた表と、context_idから表の行を引くための表
+# cost2priorityやpriority2costのたびにpart_of_speech_dataを探さないよう、読み込み時に作っておく
+_cost_candidates_table = np.array(
+    [
+        pos_detail.cost_candidates
+        for pos_detail in part_of_speech_data_by_context_id.values()
+    ],
+    dtype=np.int64,
+)
+_cost_candidates_rows: Dict[int, int] = {
+    context_id: row for row, context_id in enumerate(part_of_speech_data_by_context_id)
+}
+
+
+def _search_cost_candidates_row(context_id: int) -> int:
+    row = _cost_candidates_rows.get(context_id)
+    if row is None:
+        raise HTTPException(status_code=422, detail="品詞IDが不正です")
+    return row
+
+
+def _search_cost_candidates_rows(context_ids: Sequence[int]) -> np.ndarray:
+    return np.array(
+        [_search_cost_candidates_row(context_id) for context_id in context_ids],
+        dtype=np.int64,
+    )
+
+
 def search_cost_candidates(context_id: int) -> List[int]:
-    for value in part_of_speech_data.values():
-        if value.context_id == context_id:
-            return value.cost_candidates
-    raise HTTPException(status_code=422, detail="品詞IDが不正です")
+    pos_detail = part_of_speech_data_by_context_id.get(context_id)
+    if pos_detail is None:
+        raise HTTPException(status_code=422, detail="品詞IDが不正です")
+    return pos_detail.cost_candidates
 
 
-def cost2priority(context_id: int, cost: conint(ge=-32768, le=32767)) -> int:
-    cost_candidates = search_cost_candidates(context_id)
+def costs2priorities(context_ids: Sequence[int], costs: Sequence[int]) -> np.ndarray:
+    """
+    複数の言葉のcostをまとめてpriorityに変換する
+    """
+    cost_candidates = _cost_candidates_table[_search_cost_candidates_rows(context_ids)]
     # cost_candidatesの中にある値で最も近い値を元にpriorityを返す
     # 参考: https://qiita.com/Krypf/items/2eada91c37161d17621d
-    # この関数とpriority2cost関数によって、辞書ファイルのcostを操作しても最も近いpriorityのcostに上書きされる
-    return MAX_PRIORITY - np.argmin(np.abs(np.array(cost_candidates) - cost))
+    # この関数とpriorities2costs関数によって、辞書ファイルのcostを操作しても最も近いpriorityのcostに上書きされる
+    distances = np.abs(
+        cost_candidates - np.asarray(costs, dtype=np.int64)[:, np.newaxis]
+    )
+    return MAX_PRIORITY - np.argmin(distances, axis=1)
+
+
+def priorities2costs(
+    context_ids: Sequence[int], priorities: Sequence[int]
+) -> np.ndarray:
+    """
+    複数の言葉のpriorityをまとめてcostに変換する
+    """
+    return _cost_candidates_table[
+        _search_cost_candidates_rows(context_ids),
+        MAX_PRIORITY - np.asarray(priorities, dtype=np.int64),
+    ]
+
+
+def cost2priority(context_id: int, cost: conint(ge=-32768, le=32767)) -> int:
+    cost_candidates = _cost_candidates_table[_search_cost_candidates_row(context_id)]
+    return MAX_PRIORITY - int(np.argmin(np.abs(cost_candidates - cost)))
 
 
 def priority2cost(
@@ -0,0 +1,166 @@
+import sqlite3
+from collections.abc import MutableMapping
+from contextlib import closing, contextmanager
+from pathlib import Path
+from typing import Dict, Iterator, List, Optional, Tuple
+
+from .model import UserDictWord
+
+# データベースに保存するUserDictWordのフィールド
+word_columns: List[str] = list(UserDictWord.__fields__)
+
+
+_select_word_sql = f"SELECT uuid, {', '.join(word_columns)} FROM words"
+# 既に登録されている言葉を更新する場合は、登録順を変えない
+_upsert_word_sql = (
+    f"INSERT INTO words (uuid, {', '.join(word_columns)}) "
+    f"VALUES ({', '.join('?' * (len(word_columns) + 1))}) "
+    "ON CONFLICT (uuid) DO UPDATE SET "
+    + ", ".join(f"{column} = excluded.{column}" for column in word_columns)
+)
+
+
+def _word_to_row(word_uuid: str, word: UserDictWord) -> Tuple:
+    return (word_uuid, *(getattr(word, column) for column in word_columns))
+
+
+def _row_to_word(row: Tuple) -> Tuple[str, UserDictWord]:
+    # 書き込む前に検証しているので、読み込むときには検証を省略する
+    return row[0], UserDictWord.construct(**dict(zip(word_columns, row[1:])))
+
+
+class UserDictStoreTransaction(MutableMapping):
+    """
+    ユーザー辞書をdictのように読み書きするトランザクション
+    変更した言葉だけがデータベースに書き込まれる
+    """
+
+    def __init__(self, connection: sqlite3.Connection):
+        self._connection = connection
+        self._rolled_back = False
+
+    def __getitem__(self, word_uuid: str) -> UserDictWord:
+        row = self._connection.execute(
+            _select_word_sql + " WHERE uuid = ?", (word_uuid,)
+        ).fetchone()
+        if row is None:
+            raise KeyError(word_uuid)
+        return _row_to_word(row)[1]
+
+    def __setitem__(self, word_uuid: str, word: UserDictWord) -> None:
+        self._connection.execute(_upsert_word_sql, _word_to_row(word_uuid, word))
+
+    def __delitem__(self, word_uuid: str) -> None:
+        cursor = self._connection.execute(
+            "DELETE FROM words WHERE uuid = ?", (word_uuid,)
+        )
+        if cursor.rowcount == 0:
+            raise KeyError(word_uuid)
+
+    def __contains__(self, word_uuid: object) -> bool:
+        return (
+            self._connection.execute(
+                "SELECT 1 FROM words WHERE uuid = ?", (word_uuid,)
+            ).fetchone()
+            is not None
+        )
+
+    def __iter__(self) -> Iterator[str]:
+        for (word_uuid,) in self._connection.execute(
+            "SELECT uuid FROM words ORDER BY id"
+        ).fetchall():
+            yield word_uuid
+
+    def __len__(self) -> int:
+        return self._connection.execute("SELECT COUNT(*) FROM words").fetchone()[0]
+
+    def rollback(self) -> None:
+        """
+        トランザクションの終了時に、変更を書き込まずに破棄する
+        """
+        self._rolled_back = True
+
+
+class SQLiteUserDictStore:
+    """
+    ユーザー辞書をSQLiteのデータベースに保存する
+    jsonと違って言葉ごとに読み書きできるので、登録された言葉が多くても変更が遅くならない
+
+    Parameters
+    ----------
+    db_path: Path
+        データベースのパス
+    user_dict_path: Path
+        このデータベースが置き換えるjsonのパス
+        ユーザー辞書の関数にこのパスが渡された場合に、jsonの代わりにデータベースが使われる
+    """
+
+    def __init__(self, db_path: Path, user_dict_path: Path):
+        self.db_path = db_path
+        self.user_dict_path = user_dict_path
+        with closing(sqlite3.connect(self.db_path)) as connection:
+            # 書き込み中も読み込みを待たせないようにする
+            connection.execute("PRAGMA journal_mode=WAL")
+        with self.transaction() as transaction:
+            connection = transaction._connection
+            # idは登録順に並べるために使う
+            connection.execute(
+                "CREATE TABLE IF NOT EXISTS words ("
+                "id INTEGER PRIMARY KEY AUTOINCREMENT, "
+                "uuid TEXT NOT NULL UNIQUE, " + ", ".join(word_columns) + ")"
+            )
+            connection.execute(
+                "CREATE INDEX IF NOT EXISTS words_surface ON words (surface)"
+            )
+
+    @contextmanager
+    def transaction(self, readonly: bool = False) -> Iterator[UserDictStoreTransaction]:
+        """
+        トランザクションを開始する
+        例外が発生した場合とrollbackが呼ばれた場合は変更を破棄し、それ以外の場合は書き込む
+        readonlyでない場合は、存在を確かめてから書き込む間に他のトランザクションが割り込まないよう、
+        開始時に書き込みのロックを取る
+        """
+        connection = sqlite3.connect(self.db_path, isolation_level=None)
+        try:
+            connection.execute("BEGIN" if readonly else "BEGIN IMMEDIATE")
+            transaction = UserDictStoreTransaction(connection)
+            try:
+                yield transaction
+            except BaseException:
+                connection.execute("ROLLBACK")
+                raise
+            if transaction._rolled_back:
+                connection.execute("ROLLBACK")
+            else:
+                connection.execute("COMMIT")
+        finally:
+            connection.close()
+
+    def read_all(self) -> Dict[str, UserDictWord]:
+        return self.search()
+
+    def search(
+        self,
+        surface: Optional[str] = None,
+        offset: int = 0,
+        limit: Optional[int] = None,
+    ) -> Dict[str, UserDictWord]:
+        """
+        表層形で絞り込んだ言葉を、登録順にoffset件目からlimit件返す
+        """
+        query = _select_word_sql
+        parameters: List = []
+        if surface is not None:
+            query += " WHERE surface = ?"
+            parameters.append(surface)
+        # SQLiteではOFFSETの前にLIMITが必要なので、制限しない場合は-1を指定する
+        query += " ORDER BY id LIMIT ? OFFSET ?"
+        parameters += [-1 if limit is None else limit, offset]
+        with self.transaction(readonly=True) as transaction:
+            rows = transaction._connection.execute(query, parameters).fetchall()
+        return dict(_row_to_word(row) for row in rows)
+
+    def count(self) -> int:
+        with self.transaction(readonly=True) as transaction:
+            return len(transaction)
@@ -5,8 +5,10 @@ from .connect_base64_waves import (
 )
 from .copy_model_and_info import copy_model_and_info
 from .core_version_utility import get_latest_core_version, parse_core_version
-from .mutex_utility import mutex_wrapper
+from .mutex_utility import ReadWriteLock, mutex_wrapper
 from .path_utility import delete_file, engine_root, get_save_dir
+from .startup_profiler import StartupProfiler
+from .wave_utility import resample_wave, wave_stream_header, wave_to_pcm16, write_wave
 
 __all__ = [
     "ConnectBase64WavesException",
@@ -19,4 +21,10 @@ __all__ = [
     "engine_root",
     "get_save_dir",
     "mutex_wrapper",
+    "ReadWriteLock",
+    "StartupProfiler",
+    "resample_wave",
+    "wave_stream_header",
+    "wave_to_pcm16",
+    "write_wave",
 ]
@@ -4,7 +4,8 @@ from typing import List, Tuple
 
 import numpy as np
 import soundfile
-from scipy.signal import resample
+
+from .wave_utility import resample_wave
 
 
 class ConnectBase64WavesException(Exception):
@@ -34,7 +35,7 @@ def decode_base64_waves(waves: List[str]) -> List[Tuple[np.ndarray, int]]:
         except ValueError:
             raise ConnectBase64WavesException("base64デコードに失敗しました")
         try:
-            _data = soundfile.read(io.BytesIO(wav_bin))
+            _data = soundfile.read(io.BytesIO(wav_bin), dtype="float32")
         except Exception:
             raise ConnectBase64WavesException("wavファイルを読み込めませんでした")
         waves_nparray_sr.append(_data)
@@ -49,12 +50,22 @@ def connect_base64_waves(waves: List[str]) -> Tuple[np.ndarray, int]:
     max_channels = max([x.ndim for x, _ in waves_nparray_sr])
     assert 0 < max_channels <= 2
 
-    waves_nparray_list = []
-    for nparray, sr in waves_nparray_sr:
-        if sr != max_sampling_rate:
-            nparray = resample(nparray, max_sampling_rate * len(nparray) // sr)
+    waves_nparray_list = [
+        resample_wave(nparray, sr, max_sampling_rate)
+        for nparray, sr in waves_nparray_sr
+    ]
+
+    # 結合先の配列を一度だけ確保して書き込み、モノラルの波形はそのまま両チャンネルに書き込む
+    length = sum(len(nparray) for nparray in waves_nparray_list)
+    shape = (length,) if max_channels == 1 else (length, 2)
+    connected = np.empty(shape, dtype=np.float32)
+    start = 0
+    for nparray in waves_nparray_list:
+        end = start + len(nparray)
         if nparray.ndim < max_channels:
-            nparray = np.array([nparray, nparray]).T
-        waves_nparray_list.append(nparray)
+            connected[start:end] = nparray[:, np.newaxis]
+        else:
+            connected[start:end] = nparray
+        start = end
 
-    return np.concatenate(waves_nparray_list), max_sampling_rate
+    return connected, max_sampling_rate
@@ -2,9 +2,11 @@ import glob
 import json
 import os
 import shutil
+import sys
+from concurrent.futures import ThreadPoolExecutor
 from hashlib import sha256
 from pathlib import Path
-from typing import Dict
+from typing import Dict, List, Optional, Tuple
 
 from .path_utility import get_save_dir
 
@@ -13,6 +15,126 @@ model_dir = user_dir / "model"
 libraries_json_path = model_dir / "libraries.json"
 library_info_dir = user_dir / "library_info"
 speaker_info_dir = user_dir / "speaker_info"
+# ファイルごとの(サイズ, 更新時刻, ハッシュ値)を保存し、変更のないファイルのハッシュ計算を省略する
+file_hashes_json_path = user_dir / "model_file_hashes.json"
+
+# Linuxのioctl(FICLONE)
+_FICLONE = 0x40049409
+
+
+def reflink_or_copy2(src: str, dst: str) -> str:
+    """
+    ファイルシステムが対応していればreflink(コピーオンライト)でファイルをコピーし、
+    対応していなければshutil.copy2でコピーする
+    ハードリンクはコピー先への書き込みがコピー元にも反映されてしまうので使わない
+    """
+    if sys.platform == "linux":
+        import fcntl
+
+        try:
+            with open(src, "rb") as fsrc, open(dst, "wb") as fdst:
+                fcntl.ioctl(fdst.fileno(), _FICLONE, fsrc.fileno())
+            shutil.copystat(src, dst)
+            return dst
+        except OSError:
+            pass
+    return shutil.copy2(src, dst)
+
+
+def _calc_file_hash(path: Path) -> str:
+    s256 = sha256()
+    with open(path, "rb") as f:
+        while True:
+            chunk = f.read(2048 * s256.block_size)
+            if len(chunk) == 0:
+                break
+            s256.update(chunk)
+    return s256.hexdigest()
+
+
+def _load_file_hashes(file_hashes_path: Path) -> Dict[str, Tuple[int, int, str]]:
+    # 壊れている場合は全てのハッシュを計算し直せばよいので、空として扱う
+    try:
+        with open(file_hashes_path, encoding="utf-8") as f:
+            return {
+                path: (int(size), int(mtime_ns), str(file_hash))
+                for path, (size, mtime_ns, file_hash) in json.load(f).items()
+            }
+    except Exception:
+        return {}
+
+
+def sync_files(
+    file_pairs: List[Tuple[Path, Path]],
+    file_hashes_path: Path,
+    max_workers: Optional[int] = None,
+) -> List[Path]:
+    """
+    (コピー元, コピー先)のファイルの組について、内容が異なるか、コピー先が存在しなければコピーする
+    サイズと更新時刻が前回から変わっていないファイルは保存済みのハッシュ値を使い、
+    それ以外のファイルのハッシュ値は並列に計算する
+
+    Parameters
+    ----------
+    file_pairs : List[Tuple[Path, Path]]
+        (コピー元, コピー先)のリスト
+    file_hashes_path : Path
+        ファイルごとのハッシュ値を保存するjsonのパス
+    max_workers : Optional[int]
+        ハッシュ値を計算するスレッド数
+
+    Returns
+    -------
+    copied : List[Path]
+        コピーしたコピー先のリスト
+    """
+    cached_hashes = _load_file_hashes(file_hashes_path)
+    file_hashes: Dict[str, Tuple[int, int, str]] = {}
+
+    stats: Dict[str, Optional[os.stat_result]] = {}
+    for path in {str(p) for pair in file_pairs for p in pair}:
+        try:
+            stats[path] = os.stat(path)
+        except OSError:
+            stats[path] = None
+
+    hash_targets = []
+    for path, stat in stats.items():
+        if stat is None:
+            continue
+        cached = cached_hashes.get(path)
+        if cached is not None and cached[:2] == (stat.st_size, stat.st_mtime_ns):
+            file_hashes[path] = cached
+        else:
+            hash_targets.append(path)
+
+    with ThreadPoolExecutor(max_workers=max_workers) as executor:
+        for path, file_hash in zip(
+            hash_targets, executor.map(_calc_file_hash, map(Path, hash_targets))
+        ):
+            stat = stats[path]
+            assert stat is not None
+            file_hashes[path] = (stat.st_size, stat.st_mtime_ns, file_hash)
+
+    copied = []
+    for src, dst in file_pairs:
+        src_hash = file_hashes.get(str(src))
+        dst_hash = file_hashes.get(str(dst))
+        if src_hash is None or (dst_hash is not None and src_hash[2] == dst_hash[2]):
+            continue
+        reflink_or_copy2(str(src), str(dst))
+        stat = os.stat(dst)
+        file_hashes[str(dst)] = (stat.st_size, stat.st_mtime_ns, src_hash[2])
+        copied.append(dst)
+
+    try:
+        with open(file_hashes_path, "w", encoding="utf-8") as f:
+            json.dump(file_hashes, f)
+    except OSError:
+        # 保存できなくても次回起動時にハッシュ値を計算し直すだけなので無視する
+        pass
+
+    return copied
 
 
 def copy_model_and_info(root_dir: Path):
@@ -27,7 +149,7 @@ def copy_model_and_info(root_dir: Path):
     if not model_dir.is_dir():
         # 開発環境などで、modelフォルダが存在しない場合はコピーしない
         if root_model_dir.is_dir():
-            shutil.copytree(root_model_dir, model_dir)
+            shutil.copytree(root_model_dir, model_dir, copy_function=reflink_or_copy2)
     else:
         # モデルディレクトリが存在する場合、libraries.jsonを参照しながらモデルの追加があるか確認する
         with open(root_model_dir / "libraries.json") as f:
@@ -41,6 +163,7 @@ def copy_model_and_info(root_dir: Path):
             installed_libraries = {}
         # インストール済みだが、root_librariesに含まれない非推奨ライブラリの
         # 更新がある場合もあるので、installed_librariesとのsetを探索する
+        file_pairs: List[Tuple[Path, Path]] = []
         for uuid in set(list(root_libraries.keys()) + list(installed_libraries.keys())):
             value = installed_libraries.get(uuid)
             if value is None:
@@ -48,7 +171,10 @@ def copy_model_and_info(root_dir: Path):
                 # libraries.jsonが壊れている場合は、フォルダが存在してもコピーが発生するので
                 # dirs_exist_okをTrueにしておく
                 shutil.copytree(
-                    root_model_dir / uuid, model_dir / uuid, dirs_exist_ok=True
+                    root_model_dir / uuid,
+                    model_dir / uuid,
+                    dirs_exist_ok=True,
+                    copy_function=reflink_or_copy2,
                 )
             else:
                 # モデルの更新はしないが、metas.jsonの更新やモデルが壊れている可能性があるので、
@@ -58,26 +184,11 @@ def copy_model_and_info(root_dir: Path):
                     for path in glob.glob(str(root_model_dir / uuid / "*.onnx"))
                     + glob.glob(str(root_model_dir / uuid / "*.json"))
                 ]
-                dirname_list = [root_model_dir / uuid, model_dir / uuid]
-                for filename in filename_list:
-                    hash_list = []
-                    for dirname in dirname_list:
-                        s256 = sha256()
-                        try:
-                            with open(dirname / filename, "rb") as f:
-                                while True:
-                                    chunk = f.read(2048 * s256.block_size)
-                                    if len(chunk) == 0:
-                                        break
-                                    s256.update(chunk)
-                        # ファイルが存在しない場合
-                        except Exception:
-                            pass
-                        hash_list.append(s256.hexdigest())
-                    if hash_list[0] != hash_list[1]:
-                        shutil.copy2(
-                            dirname_list[0] / filename, dirname_list[1] / filename
-                        )
+                file_pairs += [
+                    (root_model_dir / uuid / filename, model_dir / uuid / filename)
+                    for filename in filename_list
+                ]
+        sync_files(file_pairs, file_hashes_json_path)
 
         with open(libraries_json_path, "w") as f:
             json.dump(installed_libraries, f)
@@ -1,4 +1,6 @@
 import threading
+from contextlib import contextmanager
+from typing import Iterator
 
 
 def mutex_wrapper(lock: threading.Lock):
@@ -13,3 +15,48 @@ def mutex_wrapper(lock: threading.Lock):
         return func
 
     return wrap
+
+
+class ReadWriteLock:
+    """
+    読み込みは同時に複数のスレッドに許可し、書き込みは1つのスレッドにのみ許可するロック
+    書き込みを待っているスレッドがある間は新しい読み込みを待たせるので、書き込みが待たされ続けることはない
+    再入はできないので、同じスレッドでロックを取り直してはならない
+    """
+
+    def __init__(self) -> None:
+        self._condition = threading.Condition()
+        self._readers = 0
+        self._waiting_writers = 0
+        self._writing = False
+
+    @contextmanager
+    def read_lock(self) -> Iterator[None]:
+        with self._condition:
+            while self._writing or self._waiting_writers > 0:
+                self._condition.wait()
+            self._readers += 1
+        try:
+            yield
+        finally:
+            with self._condition:
+                self._readers -= 1
+                if self._readers == 0:
+                    self._condition.notify_all()
+
+    @contextmanager
+    def write_lock(self) -> Iterator[None]:
+        with self._condition:
+            self._waiting_writers += 1
+            try:
+                while self._writing or self._readers > 0:
+                    self._condition.wait()
+            finally:
+                self._waiting_writers -= 1
+            self._writing = True
+        try:
+            yield
+        finally:
+            with self._condition:
+                self._writing = False
+                self._condition.notify_all()
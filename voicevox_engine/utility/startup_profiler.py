@@ -0,0 +1,52 @@
+import sys
+import time
+from contextlib import contextmanager
+from typing import Iterator, List, Optional, TextIO, Tuple
+
+
+class StartupProfiler:
+    """
+    起動時の各処理にかかった時間を記録し、一覧として出力する
+    """
+
+    def __init__(self) -> None:
+        self._timings: List[Tuple[str, float]] = []
+        self._notes: List[Tuple[str, float]] = []
+
+    @contextmanager
+    def measure(self, phase: str) -> Iterator[None]:
+        """
+        withブロック内の処理にかかった時間をphaseとして記録する
+        """
+        start = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.record(phase, time.perf_counter() - start)
+
+    def record(self, phase: str, seconds: float) -> None:
+        self._timings.append((phase, seconds))
+
+    def note(self, phase: str, seconds: float) -> None:
+        """
+        CPU時間など、経過時間とは別の尺度の値をtotalに含めない参考値として記録する
+        """
+        self._notes.append((phase, seconds))
+
+    @property
+    def timings(self) -> List[Tuple[str, float]]:
+        return list(self._timings)
+
+    def report(self, file: Optional[TextIO] = None) -> None:
+        if file is None:
+            file = sys.stderr
+        print("Startup profile:", file=file)
+        for phase, seconds in self._timings:
+            print(f"  {phase:<24}{seconds * 1000:10.1f} ms", file=file)
+        total = sum(seconds for _, seconds in self._timings)
+        print(f"  {'total':<24}{total * 1000:10.1f} ms", file=file)
+        for phase, seconds in self._notes:
+            print(
+                f"  {phase:<24}{seconds * 1000:10.1f} ms (not included in total)",
+                file=file,
+            )
@@ -0,0 +1,122 @@
+import struct
+from typing import BinaryIO, Union
+
+import numpy
+import soundfile
+
+# ステレオで書き込む際に、一度に2チャンネルへ複製するフレーム数
+stereo_block_frames = 65536
+
+
+def resample_wave(
+    wave: numpy.ndarray, input_sampling_rate: int, output_sampling_rate: int
+) -> numpy.ndarray:
+    """
+    波形のサンプリングレートを変換する。float32の波形はfloat32のまま変換される
+    Parameters
+    ----------
+    wave : numpy.ndarray
+        波形データ
+    input_sampling_rate : int
+        入力のサンプリングレート
+    output_sampling_rate : int
+        出力のサンプリングレート
+    Returns
+    -------
+    wave : numpy.ndarray
+        変換後の波形データ。サンプリングレートが同じ場合は入力をそのまま返す
+    """
+    if input_sampling_rate == output_sampling_rate:
+        return wave
+
+    # scipy.signalは読み込みが重いので、リサンプルが必要になったときに読み込む
+    from scipy.signal import resample
+
+    return resample(wave, output_sampling_rate * len(wave) // input_sampling_rate)
+
+
+def write_wave(
+    file: Union[str, BinaryIO],
+    wave: numpy.ndarray,
+    sampling_rate: int,
+    stereo: bool = False,
+) -> None:
+    """
+    float32の波形を16bit PCMのwavファイルとして書き込む
+    stereoがTrueの場合は、モノラルの波形を書き込みながら少しずつ2チャンネルに複製するので、
+    波形全体のステレオ配列は作らない
+    Parameters
+    ----------
+    file : Union[str, BinaryIO]
+        書き込み先
+    wave : numpy.ndarray
+        波形データ。-1.0から1.0の範囲で、モノラルは1次元、複数チャンネルは(フレーム数, チャンネル数)の配列
+    sampling_rate : int
+        サンプリングレート
+    stereo : bool
+        モノラルの波形をステレオとして書き込むか否か
+    """
+    wave = numpy.asarray(wave, dtype=numpy.float32)
+    if not stereo or wave.ndim != 1:
+        soundfile.write(
+            file=file,
+            data=wave,
+            samplerate=sampling_rate,
+            format="WAV",
+            subtype="PCM_16",
+        )
+        return
+
+    block = numpy.empty((min(len(wave), stereo_block_frames), 2), dtype=numpy.float32)
+    with soundfile.SoundFile(
+        file,
+        mode="w",
+        samplerate=sampling_rate,
+        channels=2,
+        format="WAV",
+        subtype="PCM_16",
+    ) as f:
+        for start in range(0, len(wave), stereo_block_frames):
+            chunk = wave[start : start + stereo_block_frames]
+            block[: len(chunk)] = chunk[:, numpy.newaxis]
+            f.write(block[: len(chunk)])
+
+
+def wave_stream_header(sampling_rate: int, stereo: bool = False) -> bytes:
+    """
+    長さが決まっていない16bit PCMのwavのヘッダを返す
+    ストリーミングで送る場合に、先にヘッダを送ってから`wave_to_pcm16`で変換した波形を続けて送る
+    RIFFとdataのチャンクの長さには、長さが不明であることを表す0xFFFFFFFFを入れる
+    """
+    channels = 2 if stereo else 1
+    block_align = channels * 2
+    return b"".join(
+        [
+            b"RIFF",
+            struct.pack("<I", 0xFFFFFFFF),
+            b"WAVE",
+            b"fmt ",
+            struct.pack(
+                "<IHHIIHH",
+                16,
+                1,
+                channels,
+                sampling_rate,
+                sampling_rate * block_align,
+                block_align,
+                16,
+            ),
+            b"data",
+            struct.pack("<I", 0xFFFFFFFF),
+        ]
+    )
+
+
+def wave_to_pcm16(wave: numpy.ndarray, stereo: bool = False) -> bytes:
+    """
+    float32のモノラルの波形を16bit PCMのバイト列に変換する。`write_wave`と同じ値に量子化する
+    """
+    pcm = numpy.clip(numpy.floor(wave * 32768), -32768, 32767).astype("<i2")
+    if stereo:
+        pcm = numpy.repeat(pcm, 2)
+    return pcm.tobytes()